@@ -0,0 +1,94 @@
+"""Ken Burns throughput: in-process NumPy/Pillow frames vs ffmpeg zoompan.
+
+    python benchmarks/kenburns_bench.py --duration 4 --out kb.json
+
+Frames are rendered from the same synthetic plate and discarded (``-f null``), so
+the numbers compare frame generation cost, not x264 encode speed.
+"""
+from __future__ import annotations
+import argparse
+import json
+import math
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+from PIL import Image
+from reelctxt.media.kenburns import ken_burns_filter, ken_burns_frames, rawvideo_input_args
+
+
+def synthetic_plate(path: Path, width: int, height: int) -> None:
+    rng = np.random.default_rng(0)
+    noise = rng.integers(0, 255, (height // 8, width // 8, 3), dtype=np.uint8)
+    Image.fromarray(noise).resize((width, height), Image.BICUBIC).save(path, quality=95)
+
+
+def bench_numpy(plate: Path, args) -> dict:
+    with Image.open(plate) as im:
+        im.load()
+        t0 = time.perf_counter()
+        n = sum(1 for _ in ken_burns_frames(im, args.duration, args.width, args.height, args.fps, args.zoom, args.path))
+    dt = time.perf_counter() - t0
+    return {'frames': n, 'seconds': dt, 'fps': n / dt}
+
+
+def bench_numpy_pipe(plate: Path, args) -> dict:
+    cmd = ['ffmpeg', '-v', 'error', '-y', *rawvideo_input_args(args.width, args.height, args.fps), '-f', 'null', '-']
+    with Image.open(plate) as im:
+        im.load()
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        n = 0
+        for frame in ken_burns_frames(im, args.duration, args.width, args.height, args.fps, args.zoom, args.path):
+            proc.stdin.write(frame)
+            n += 1
+        proc.stdin.close()
+        proc.wait()
+    dt = time.perf_counter() - t0
+    return {'frames': n, 'seconds': dt, 'fps': n / dt}
+
+
+def bench_zoompan(plate: Path, args) -> dict:
+    vf = ken_burns_filter(args.duration, args.zoom, args.width, args.height, args.fps)
+    cmd = [
+        'ffmpeg', '-v', 'error', '-y', '-framerate', str(args.fps), '-loop', '1', '-t', str(args.duration),
+        '-i', str(plate), '-vf', vf, '-f', 'null', '-',
+    ]
+    t0 = time.perf_counter()
+    subprocess.run(cmd, check=True)
+    dt = time.perf_counter() - t0
+    n = int(round(args.duration * args.fps))
+    return {'frames': n, 'seconds': dt, 'fps': n / dt}
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument('--duration', type=float, default=4.0)
+    p.add_argument('--width', type=int, default=1080)
+    p.add_argument('--height', type=int, default=1920)
+    p.add_argument('--fps', type=int, default=30)
+    p.add_argument('--zoom', type=float, default=1.08)
+    p.add_argument('--path', default='center')
+    p.add_argument('--out', help='Write results JSON here (default: stdout)')
+    args = p.parse_args()
+
+    results = {'params': vars(args).copy()}
+    with tempfile.TemporaryDirectory() as tmp:
+        plate = Path(tmp) / 'plate.jpg'
+        synthetic_plate(plate, math.ceil(args.width * args.zoom), math.ceil(args.height * args.zoom))
+        results['numpy'] = bench_numpy(plate, args)
+        if shutil.which('ffmpeg'):
+            results['numpy_pipe'] = bench_numpy_pipe(plate, args)
+            results['zoompan'] = bench_zoompan(plate, args)
+        else:
+            results['skipped'] = ['numpy_pipe', 'zoompan (ffmpeg not found)']
+    out = json.dumps(results, indent=2)
+    if args.out:
+        Path(args.out).write_text(out)
+    print(out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""Offline pipeline benchmarks over synthetic corpora at several scale points.
+
+    python -m benchmarks.pipeline_bench --scales 10,100,1000 --out bench.json
+    python -m benchmarks.pipeline_bench --scales 10,100 --compare bench.json   # exit 1 on regression
+
+No network or LLM key is needed: OPENAI_API_KEY is ignored and the LLMClient
+no-key fallback produces the summary/storyboard. TTS uses a stub engine and
+create_video is skipped when ffmpeg is not installed.
+"""
+from __future__ import annotations
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from reelctxt import __version__
+from reelctxt.ingestion.text_loader import load_text_from_files
+from reelctxt.ingestion.image_loader import load_images
+from reelctxt.llm.client import LLMClient
+from reelctxt.planning.summarizer import build_summary
+from reelctxt.planning.storyboard import build_storyboard
+from reelctxt.planning.selector import select_images_for_segments
+from reelctxt.planning.tfidf_index import TfidfIndex
+from reelctxt.planning.image_index import ImageFeatureIndex
+from reelctxt.media.tts import synthesize_segments
+from reelctxt.media.compose import build_timeline, create_video
+from .synthetic import (
+    have_ffmpeg, make_image_library, make_lavfi_audio, make_text_corpus, stub_tts_engine,
+)
+
+
+def timed(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return {'best': min(runs), 'mean': statistics.mean(runs), 'runs': runs}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmarks(
+    scales: List[int],
+    repeat: int = 3,
+    segments: int = 6,
+    video: bool = True,
+    video_segments: int = 3,
+    video_profile: str = 'draft',
+    workdir: Optional[Path] = None,
+) -> Dict:
+    os.environ.pop('OPENAI_API_KEY', None)  # force the offline LLM fallback
+    llm = LLMClient()
+    results = []
+    skipped = []
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        tmp = Path(tmp)
+        for scale in scales:
+            text_root = make_text_corpus(tmp / f'text_{scale}', files=scale)
+            img_root = make_image_library(tmp / f'img_{scale}', count=scale)
+
+            def record(name: str, stats: Dict[str, float]) -> None:
+                results.append({'bench': name, 'scale': scale, **stats})
+                print(f"{name:<28} scale={scale:<6} best={stats['best']:.4f}s", file=sys.stderr)
+
+            record('load_text_from_files', timed(lambda: load_text_from_files(text_root), repeat))
+            index = tmp / f'corpus_{scale}.sqlite'
+            load_text_from_files(text_root, index=index)  # cold build; the bench measures warm re-syncs
+            record('load_text_from_files[indexed]', timed(lambda: load_text_from_files(text_root, index=index), repeat))
+            record('load_images', timed(lambda: load_images(img_root), repeat))
+            thumbs = tmp / f'images_{scale}.sqlite'
+            load_images(img_root, store=thumbs)
+            record('load_images[cached]', timed(lambda: load_images(img_root, store=thumbs), repeat))
+
+            corpus_texts = [d['content'] for d in load_text_from_files(text_root)]
+            images = load_images(img_root)
+            prompt = 'serverless video pipeline cost and latency'
+            summary = build_summary(prompt, corpus_texts, llm)
+            segs = build_storyboard(prompt, summary, segments, llm)
+            record('select_images_for_segments', timed(lambda: select_images_for_segments(segs, images, corpus_texts), repeat))
+            tfidf = TfidfIndex(tmp / f'tfidf_{scale}')
+            features = tmp / f'image_features_{scale}'
+            # warm the persisted indexes; the bench measures repeat jobs
+            select_images_for_segments(segs, images, corpus_texts, index=tfidf,
+                                       image_index=ImageFeatureIndex.build(images, root=features))
+            record('select_images_for_segments[indexed]', timed(
+                lambda: select_images_for_segments(segs, images, corpus_texts, index=TfidfIndex(tmp / f'tfidf_{scale}'),
+                                                   image_index=ImageFeatureIndex.build(images, root=features)), repeat))
+
+            # Cold: a fresh output dir (and so a fresh TTS cache) per repeat, so every run synthesizes
+            cold_dirs = (tmp / f'audio_{scale}_cold{i}' for i in itertools.count())
+            record('synthesize_segments', timed(lambda: synthesize_segments(segs, next(cold_dirs), engine=stub_tts_engine), repeat))
+            audio_dir = tmp / f'audio_{scale}'
+            synthesize_segments(segs, audio_dir, engine=stub_tts_engine)
+            record('synthesize_segments[cached]', timed(lambda: synthesize_segments(segs, audio_dir, engine=stub_tts_engine), repeat))
+
+            if not video:
+                continue
+            if not have_ffmpeg():
+                skipped.append({'bench': 'create_video', 'scale': scale, 'reason': 'ffmpeg not found'})
+                continue
+            vsegs = segs[:video_segments]
+            build_timeline(vsegs)
+            audio = synthesize_segments(vsegs, audio_dir, engine=stub_tts_engine)
+            music = make_lavfi_audio(tmp / 'bed.wav', sum(s.duration for s in vsegs))
+            out = tmp / f'reel_{scale}.mp4'
+            record('create_video', timed(lambda: create_video(
+                vsegs, audio, str(out), music_path=str(music), profile=video_profile, tmp_dir=tmp / 'reel_tmp',
+            ), repeat))
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'version': __version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'params': {'scales': scales, 'repeat': repeat, 'segments': segments, 'video_profile': video_profile},
+        },
+        'results': results,
+        'skipped': skipped,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = 1.25) -> List[Dict]:
+    """Rows for every (bench, scale) in both runs; ``regression`` when best time grew past threshold."""
+    base = {(r['bench'], r['scale']): r for r in baseline['results']}
+    rows = []
+    for r in current['results']:
+        old = base.get((r['bench'], r['scale']))
+        if not old or old['best'] <= 0:
+            continue
+        ratio = r['best'] / old['best']
+        rows.append({'bench': r['bench'], 'scale': r['scale'], 'old': old['best'], 'new': r['best'],
+                     'ratio': ratio, 'regression': ratio > threshold})
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description='Offline ReelCtxt pipeline benchmarks')
+    p.add_argument('--scales', default='10,100', help='Comma separated corpus/image library sizes')
+    p.add_argument('--repeat', type=int, default=3)
+    p.add_argument('--segments', type=int, default=6)
+    p.add_argument('--no-video', action='store_true', help='Skip create_video')
+    p.add_argument('--video-segments', type=int, default=3)
+    p.add_argument('--video-profile', default='draft')
+    p.add_argument('--out', help='Write results JSON here')
+    p.add_argument('--compare', help='Baseline results JSON to compare against')
+    p.add_argument('--threshold', type=float, default=1.25, help='Slowdown ratio counted as a regression')
+    args = p.parse_args(argv)
+
+    report = run_benchmarks(
+        [int(s) for s in args.scales.split(',')], args.repeat, args.segments,
+        video=not args.no_video, video_segments=args.video_segments, video_profile=args.video_profile,
+    )
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+    if not args.compare:
+        print(json.dumps(report['results'], indent=2))
+        return 0
+    rows = compare(report, json.loads(Path(args.compare).read_text()), args.threshold)
+    for r in rows:
+        flag = '  REGRESSION' if r['regression'] else ''
+        print(f"{r['bench']:<28} scale={r['scale']:<6} {r['old']:.4f}s -> {r['new']:.4f}s  x{r['ratio']:.2f}{flag}")
+    return 1 if any(r['regression'] for r in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Deterministic synthetic inputs for the benchmarks: text/HTML corpora, image libraries, audio."""
+from __future__ import annotations
+import random
+import shutil
+import subprocess
+import wave
+from pathlib import Path
+from typing import List
+import numpy as np
+from PIL import Image
+
+VOCAB = (
+    "serverless cloud latency cache edge container kubernetes pipeline data model agent token "
+    "storage network security cost scale throughput queue event stream batch index query "
+    "render video audio caption image frame encoder music reel story segment narration"
+).split()
+
+
+def _words(rng: random.Random, n: int) -> str:
+    return ' '.join(rng.choice(VOCAB) for _ in range(n))
+
+
+def make_text_corpus(root: Path, files: int, words_per_file: int = 400, html_fraction: float = 0.3, seed: int = 0) -> Path:
+    """Write ``files`` documents (.md and .html) under nested folders of ``root``."""
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(files):
+        sub = root / f"d{i % 10}"
+        sub.mkdir(exist_ok=True)
+        words = _words(rng, words_per_file).split()
+        paras = [' '.join(words[j:j + 60]) for j in range(0, len(words), 60)]
+        if rng.random() < html_fraction:
+            html = (
+                f"<html><head><title>Doc {i}</title><style>p{{color:red}}</style></head><body>"
+                f"<nav><a href='/d{i}'>link</a></nav><h1>{_words(rng, 5)}</h1>"
+                + ''.join(f"<p>{para}</p>" for para in paras)
+                + "<script>var x = 1;</script></body></html>"
+            )
+            (sub / f"doc_{i}.html").write_text(html)
+        else:
+            (sub / f"doc_{i}.md").write_text(f"# {_words(rng, 5)}\n\n" + '\n\n'.join(paras) + "\n")
+    return root
+
+
+def make_image_library(root: Path, count: int, size=(1600, 1200), seed: int = 0) -> Path:
+    """Write ``count`` JPEGs with smooth random colour fields (cheap to generate, realistic to decode)."""
+    rng = np.random.default_rng(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        small = rng.integers(0, 255, (6, 8, 3), dtype=np.uint8)
+        img = Image.fromarray(small).resize(size, Image.BICUBIC)
+        img.save(root / f"{VOCAB[i % len(VOCAB)]}_{i}.jpg", quality=90)
+    return root
+
+
+def write_silence(path: Path, seconds: float, rate: int = 22050) -> None:
+    with wave.open(str(path), 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b'\x00\x00' * int(seconds * rate))
+
+
+def stub_tts_engine(text: str, path: Path, **_) -> None:
+    """Offline TTS stand-in: silence lasting as long as the narration would (155 wpm)."""
+    write_silence(Path(path), max(0.5, len(text.split()) / 155.0 * 60.0))
+
+
+def make_lavfi_audio(path: Path, seconds: float, freq: int = 220) -> Path:
+    """Music-bed stand-in generated by ffmpeg's lavfi sine source."""
+    subprocess.run(
+        ['ffmpeg', '-v', 'error', '-y', '-f', 'lavfi', '-i', f'sine=frequency={freq}:sample_rate=44100',
+         '-t', f'{seconds:.2f}', str(path)],
+        check=True,
+    )
+    return path
+
+
+def have_ffmpeg() -> bool:
+    return shutil.which('ffmpeg') is not None
@@ -0,0 +1,133 @@
+from __future__ import annotations
+import argparse
+import dataclasses
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+from .cli import RunContext, build_parser, run
+from .llm.client import LLMClient
+from .media.workers import EncodePool
+from .util.logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def job_argv(job: Dict[str, Any]) -> List[str]:
+    """Turn one manifest line into CLI arguments.
+
+    Keys are the CLI long options with or without dashes (``image_folder`` ==
+    ``image-folder``); ``true`` sets a flag, lists repeat the option (``url``).
+    """
+    argv: List[str] = []
+    for key, value in job.items():
+        if key == 'id' or value is None or value is False:
+            continue
+        flag = '--' + key.replace('_', '-')
+        if value is True:
+            argv.append(flag)
+        elif isinstance(value, list):
+            for v in value:
+                argv += [flag, str(v)]
+        else:
+            argv += [flag, str(value)]
+    return argv
+
+
+def read_jobs(path: str | Path) -> List[Tuple[str, Dict[str, Any]]]:
+    jobs = []
+    for lineno, line in enumerate(Path(path).read_text(encoding='utf-8').splitlines(), start=1):
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        job = json.loads(line)
+        jobs.append((str(job.get('id', lineno)), job))
+    return jobs
+
+
+def completed_jobs(status_path: Path) -> Set[str]:
+    """Ids whose latest status record is 'ok' (so an interrupted batch resumes after them)."""
+    latest: Dict[str, str] = {}
+    if status_path.exists():
+        for line in status_path.read_text(encoding='utf-8').splitlines():
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from an interrupted run
+            latest[str(rec.get('id'))] = rec.get('status')
+    return {k for k, v in latest.items() if v == 'ok'}
+
+
+def run_batch(
+    jobs_path: str | Path,
+    status_path: Optional[str | Path] = None,
+    jobs: int = 1,
+    workers: int = 1,
+    threads: Optional[int] = None,
+    rerun: bool = False,
+) -> List[Dict[str, Any]]:
+    """Run every job of a JSONL manifest in this process, sharing LLM client, caches, TTS workers and encoder pool.
+
+    One status record per finished job is appended to ``status_path``
+    (default ``<jobs>.status.jsonl``); completed jobs are skipped on the next run.
+    """
+    jobs_path = Path(jobs_path)
+    status_path = Path(status_path) if status_path else jobs_path.with_name(jobs_path.name + '.status.jsonl')
+    manifest = read_jobs(jobs_path)
+    done = set() if rerun else completed_jobs(status_path)
+    pending = [(job_id, job) for job_id, job in manifest if job_id not in done]
+    logger.info("Batch %s: %d jobs, %d already done, %d to run", jobs_path, len(manifest), len(manifest) - len(pending), len(pending))
+
+    parser = build_parser()
+    shared = RunContext(llm=LLMClient(), pool=EncodePool(workers, threads))
+    status_lock = threading.Lock()
+    results: List[Dict[str, Any]] = []
+
+    def _run(job_id: str, job: Dict[str, Any]) -> Dict[str, Any]:
+        t0 = time.time()
+        rec: Dict[str, Any] = {'id': job_id}
+        safe_id = re.sub(r'[^\w.-]', '_', job_id)
+        try:
+            args = parser.parse_args(job_argv(job))
+            # Parts are per job; TTS/segment/plate caches are content-addressed and shared
+            ctx = dataclasses.replace(shared, tmp_dir=shared.tmp_dir / safe_id)
+            rec.update(status='ok', output=run(args, ctx))
+        except SystemExit:
+            rec.update(status='failed', error=f'invalid options: {job_argv(job)}')
+        except Exception as e:
+            logger.exception("Job %s failed", job_id)
+            rec.update(status='failed', error=f'{type(e).__name__}: {e}')
+        rec['seconds'] = round(time.time() - t0, 3)
+        with status_lock:
+            with status_path.open('a', encoding='utf-8') as f:
+                f.write(json.dumps(rec) + '\n')
+            results.append(rec)
+        logger.info("Job %s %s in %.1fs", job_id, rec['status'], rec['seconds'])
+        return rec
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as ex:
+            list(ex.map(lambda item: _run(*item), pending))
+    finally:
+        shared.close()  # stop the warm TTS workers
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(prog='reelctxt batch', description='Render many reels from a JSONL job manifest in one process')
+    p.add_argument('jobs', help='JSONL file; each line holds the CLI options of one reel, e.g. {"id": "a", "prompt": "...", "output": "a.mp4"}')
+    p.add_argument('--status', help='Status/progress file (default: <jobs>.status.jsonl)')
+    p.add_argument('--jobs', dest='concurrency', type=int, default=1, help='Reels processed concurrently (default 1)')
+    p.add_argument('--workers', type=int, default=1, help='ffmpeg encoders shared by all jobs (default 1)')
+    p.add_argument('--threads', type=int, help='Total ffmpeg thread budget shared by all encoders')
+    p.add_argument('--rerun', action='store_true', help='Ignore the status file and run every job again')
+    p.add_argument('--log-level', default='INFO')
+    args = p.parse_args(argv)
+    setup_logging(args.log_level)
+    results = run_batch(args.jobs, args.status, args.concurrency, args.workers, args.threads, args.rerun)
+    failed = [r for r in results if r['status'] != 'ok']
+    print(f"Batch finished: {len(results) - len(failed)} ok, {len(failed)} failed")
+    return 1 if failed else 0
@@ -1,30 +1,103 @@
 from __future__ import annotations
 import argparse
+import sys
+import threading
+import wave
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
 from .util.logging import setup_logging
-from .ingestion.text_loader import load_text_from_files, fetch_url
+from .util.cache import DiskCache, DEFAULT_CACHE_DIR
+from .util.pipeline import Stage
+from .util.trace import Tracer, span
+from .ingestion.text_loader import iter_text_from_files
+from .ingestion.chunks import DEFAULT_CHUNK_CHARS, Chunk, iter_chunks
 from .ingestion.crawler import crawl
+from .ingestion.http_cache import HttpCache
 from .ingestion.image_loader import load_images
+from .llm.cache import LLMCache
 from .llm.client import LLMClient
-from .planning.summarizer import build_summary
-from .planning.storyboard import build_storyboard
+from .planning.summarizer import SUMMARY_MODES, build_summary
+from .planning.context import ContextWindow
+from .planning.storyboard import build_storyboard, iter_storyboard
 from .planning.selector import select_images_for_segments
-from .planning.segment import validate_segments
+from .planning.tfidf_index import TfidfIndex
+from .planning.image_index import ImageFeatureIndex
+from .planning.segment import Segment, normalize_segments, validate_segments
 from .media.tts import synthesize_segments
+from .media.tts_worker import BACKENDS as TTS_BACKENDS, TTSBackend, TTSWorker, get_backend, wav_seconds
 from .media.compose import build_timeline, create_video
+from .media.kenburns import PAN_PATHS
+from .media.workers import EncodePool
+from .media.profiles import PROFILES
+from .media.renditions import RENDITIONS, parse_rendition, plan_renditions, rendition_path
+from .state import JobState, state_path
 
 
-def parse_args():
-    p = argparse.ArgumentParser(description="Generate a reel video from prompt + context")
+logger = logging.getLogger(__name__)
+
+
+def _focus(value: str):
+    x, y = (float(v) for v in value.split(','))
+    return (x, y)
+
+
+def _rendition(value: str) -> str:
+    # Validate now, keep the spec string so it round-trips through the job state
+    try:
+        parse_rendition(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+    return value
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Generate a reel video from prompt + context",
+                                epilog="Batch mode: reelctxt batch jobs.jsonl (see reelctxt batch --help). "
+                                       "Resume: reelctxt render --from reel.state.json [options]")
     p.add_argument('--prompt', required=True)
     p.add_argument('--text-folder', help='Folder with text files')
+    p.add_argument('--no-corpus-index', action='store_true', help='Re-read every text file instead of using the incremental corpus index')
+    p.add_argument('--chunk-chars', type=int, default=DEFAULT_CHUNK_CHARS, help=f'Corpus chunk size in characters (default {DEFAULT_CHUNK_CHARS})')
+    p.add_argument('--context-mb', type=float, default=16,
+                   help='Memory ceiling for retained corpus text; the most prompt-relevant chunks are kept (default 16)')
+    p.add_argument('--no-tfidf-index', action='store_true', help='Vectorize the corpus from scratch instead of using the persisted TF-IDF index')
+    p.add_argument('--tfidf-index-mb', type=int, default=256, help='Size cap of the persisted TF-IDF index in MB (LRU eviction)')
+    p.add_argument('--summary-mode', choices=SUMMARY_MODES, default='map_reduce',
+                   help="'map_reduce': BM25-ranked chunks summarized in parallel then merged; 'simple': one truncated call")
+    p.add_argument('--summary-top-k', type=int, default=24, help='Chunks considered for the summary (default 24)')
+    p.add_argument('--summary-token-budget', type=int, default=8000, help='Context tokens sent to map calls in total (default 8000)')
+    p.add_argument('--llm-concurrency', type=int, default=4, help='Concurrent LLM requests (default 4)')
+    p.add_argument('--llm-retries', type=int, default=2, help='Retries per LLM request on connection/429/5xx errors (default 2)')
+    p.add_argument('--no-llm-cache', action='store_true', help='Always call the LLM instead of reusing cached answers to identical requests')
+    p.add_argument('--llm-cache-ttl', type=float, default=7 * 24 * 3600,
+                   help='Seconds a cached LLM answer stays valid (default 7 days)')
+    p.add_argument('--llm-cache-mb', type=int, default=64, help='Size cap of the LLM response cache in MB')
     p.add_argument('--image-folder', help='Folder with images')
+    p.add_argument('--no-image-index', action='store_true', help='Do not persist image metadata, thumbnails and feature index')
+    p.add_argument('--image-index-mb', type=int, default=256, help='Size cap of the persisted image feature indexes in MB (LRU eviction)')
     p.add_argument('--url', action='append', help='Seed URL(s) to crawl (same domain)')
     p.add_argument('--crawl-depth', type=int, default=0)
+    p.add_argument('--crawl-max-pages', type=int, default=10, help='Page budget across all --url seeds (default 10)')
+    p.add_argument('--crawl-concurrency', type=int, default=8, help='Pages fetched concurrently (default 8)')
+    p.add_argument('--crawl-per-host', type=int, default=2, help='Concurrent requests per host (default 2)')
+    p.add_argument('--no-http-cache', action='store_true', help='Always download and parse crawled pages')
+    p.add_argument('--http-cache-ttl', type=float, default=3600,
+                   help='Seconds a cached page is used without asking the server; later it is revalidated (default 3600)')
+    p.add_argument('--http-cache-mb', type=int, default=256, help='Size cap of the HTTP response cache in MB')
     p.add_argument('--segments', type=int, default=6)
     p.add_argument('--output', default='reel.mp4')
     p.add_argument('--dry-run', action='store_true')
+    p.add_argument('--profile', choices=list(PROFILES), default='final',
+                   help="'draft': fast low-res preview of the same timeline (540x960@15, ultrafast, no loudnorm)")
+    p.add_argument('--rendition', action='append', type=_rendition, default=None,
+                   help=f"Extra output encoded from the same frames as the reel: {', '.join(RENDITIONS)} or "
+                        "name=WIDTHxHEIGHT[:crop|pad][:bitrate]; written as <output stem>.<name>.mp4 (repeatable)")
     p.add_argument('--log-level', default='INFO')
+    p.add_argument('--no-checkpoint', action='store_true', help='Do not write the <output>.state.json job state')
+    p.add_argument('--trace', action='store_true', help='Write a per-stage timing profile to <output>.trace.json')
+    p.add_argument('--trace-summary', action='store_true', help='Also print a human-readable timing summary on exit (implies --trace)')
     p.add_argument('--music', help='Optional background music audio file (loops/trimmed)')
     p.add_argument('--music-intro', help='Optional intro music stem (plays at start, auto-fade)')
     p.add_argument('--music-outro', help='Optional outro music stem (fades in near end)')
@@ -36,83 +109,385 @@ def parse_args():
     p.add_argument('--caption-color', default='white')
     p.add_argument('--caption-box-color', default='black@0.5')
     p.add_argument('--caption-max-chars', type=int, default=80)
+    p.add_argument('--caption-renderer', choices=['drawtext', 'overlay'], default='drawtext',
+                   help="'drawtext': ffmpeg draws the text on every frame; 'overlay': wrapped captions rendered "
+                        "once with Pillow, cached and composited (parts engine)")
+    p.add_argument('--caption-highlight', action='store_true',
+                   help='Highlight each narration word while it is spoken (overlay renderer, --caption-mode narration)')
+    p.add_argument('--caption-highlight-color', default='yellow')
     p.add_argument('--ken-burns', action='store_true', help='Enable Ken Burns slow zoom on still images')
     p.add_argument('--ken-burns-zoom', type=float, default=1.08, help='Final zoom factor for Ken Burns (default 1.08)')
+    p.add_argument('--ken-burns-engine', choices=['zoompan', 'numpy'], default='zoompan',
+                   help="'zoompan': ffmpeg filter; 'numpy': sub-pixel crops rendered in-process and piped to the encoder")
+    p.add_argument('--ken-burns-path', choices=list(PAN_PATHS), default='center', help='Pan path for the numpy Ken Burns engine')
+    p.add_argument('--ken-burns-focus', type=_focus, default=(0.5, 0.5), help="Focal point 'x,y' (fractions) for --ken-burns-path focus")
     p.add_argument('--no-continuous-music', action='store_true', help='Disable continuous music bed (loop per segment instead)')
     p.add_argument('--fade-in', type=float, default=1.5, help='Music fade-in duration (continuous mode)')
     p.add_argument('--fade-out', type=float, default=1.5, help='Music fade-out duration (continuous mode)')
     p.add_argument('--no-voice-normalize', action='store_true', help='Disable loudness normalization on narration track')
     p.add_argument('--keep-temp', action='store_true', help='Keep temporary build directory and intermediate files')
     p.add_argument('--pre-cleanup', action='store_true', help='Remove previous temp directory before starting')
-    return p.parse_args()
+    p.add_argument('--workers', type=int, default=1, help='Number of segment parts encoded in parallel (default 1)')
+    p.add_argument('--threads', type=int, help='Total ffmpeg thread budget split across workers (default: CPU count)')
+    p.add_argument('--no-pipeline', action='store_true',
+                   help='Run storyboard, TTS and part encodes one stage after another instead of overlapping them')
+    p.add_argument('--render-engine', choices=['parts', 'graph'], default='parts',
+                   help="'parts': encode per segment then concat; 'graph': one ffmpeg filtergraph, single encode")
+    p.add_argument('--audio-mode', choices=['parts', 'master'], default='parts',
+                   help="'parts': narration encoded into every part; 'master': video-only parts, narration and "
+                        "music mastered once (two-pass loudnorm) and muxed in a single audio encode")
+    p.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help=f'Persistent cache root (default {DEFAULT_CACHE_DIR})')
+    p.add_argument('--no-render-cache', action='store_true', help='Always re-encode every segment part')
+    p.add_argument('--render-cache-mb', type=int, default=4096, help='Size cap of the segment render cache in MB (LRU eviction)')
+    p.add_argument('--tts-backend', choices=list(TTS_BACKENDS), default='espeak',
+                   help="TTS engine, run in a warm worker process ('coqui' needs the voice extra; 'stub' is offline/silent)")
+    p.add_argument('--tts-model', help='Model name for the coqui backend (e.g. tts_models/en/vctk/vits)')
+    p.add_argument('--voice', help='TTS voice name passed to the engine (e.g. espeak -v)')
+    p.add_argument('--tts-rate', type=int, help='TTS speaking rate in words per minute (e.g. espeak -s)')
+    p.add_argument('--tts-workers', type=int, default=4, help='Narration lines synthesized in parallel (default 4)')
+    p.add_argument('--tts-cache-mb', type=int, default=512, help='Size cap of the narration audio cache in MB (LRU eviction)')
+    p.add_argument('--no-plate-cache', action='store_true', help='Feed full-resolution images to ffmpeg instead of cached pre-scaled plates')
+    p.add_argument('--plate-cache-mb', type=int, default=2048, help='Size cap of the pre-scaled image plate cache in MB')
+    return p
 
 
-def main():
-    args = parse_args()
-    setup_logging(args.log_level)
+def parse_args(argv: Optional[List[str]] = None):
+    return build_parser().parse_args(argv)
+
+
+@dataclass
+class RunContext:
+    """State shared by every job run in one process (see reelctxt.batch)."""
+    llm: Optional[LLMClient] = None
+    pool: Optional[EncodePool] = None
+    tmp_dir: Path = Path('.reel_tmp')
+    audio_dir: Optional[Path] = None  # TTS cache dir (default: <cache-dir>/tts)
+    memo: Dict[tuple, Any] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    tts: Dict[tuple, TTSWorker] = field(default_factory=dict)
+
+    def cached(self, key: tuple, fn: Callable[[], Any]) -> Any:
+        """Memoize an ingestion result (folder listing, fetched page) for later jobs."""
+        with self.lock:
+            if key in self.memo:
+                return self.memo[key]
+        value = fn()
+        with self.lock:
+            self.memo[key] = value
+        return value
+
+    def tts_worker(self, backend: str, **options: Any) -> TTSWorker:
+        """One warm worker per backend/model, loaded on first use and reused by every job."""
+        key = (backend, *sorted(options.items()))
+        with self.lock:
+            if key not in self.tts:
+                self.tts[key] = TTSWorker(backend, **options)
+            return self.tts[key]
+
+    def tts_engine(self, backend: str, **options: Any) -> TTSBackend | TTSWorker:
+        """The warm worker for model backends; subprocess backends (espeak) run in-process per line,
+        so synthesize_segments can spread them over --tts-workers threads."""
+        if TTS_BACKENDS[backend].resident:
+            return self.tts_worker(backend, **options)
+        return get_backend(backend, **options)
+
+    def close(self) -> None:
+        for worker in self.tts.values():
+            worker.close()
+        self.tts.clear()
+
+
+def run(args: argparse.Namespace, ctx: Optional[RunContext] = None, resume: Optional[JobState] = None) -> Optional[str]:
+    """Run the whole pipeline for one set of parsed options; returns the output path (None on dry run).
+
+    With --trace / --trace-summary every stage is timed and the profile is written
+    to ``<output>.trace.json`` next to the sidecar. With ``resume`` (a loaded job
+    state), stages whose options and inputs are unchanged are restored from it.
+    """
+    own_ctx = ctx is None
+    ctx = ctx or RunContext()
+    try:
+        if not (args.trace or args.trace_summary):
+            return _run_pipeline(args, ctx, resume)
+        tracer = Tracer(name=f'reel {args.output}')
+        try:
+            with tracer.activate():
+                return _run_pipeline(args, ctx, resume)
+        finally:
+            trace_path = tracer.write(Path(args.output).with_suffix('.trace.json'))
+            logger.info("Wrote trace %s", trace_path)
+            if args.trace_summary:
+                print(tracer.summary())
+    finally:
+        if own_ctx:
+            ctx.close()
+
+
+def _run_pipeline(args: argparse.Namespace, ctx: RunContext, resume: Optional[JobState] = None) -> Optional[str]:
+    # Every stage output is checkpointed to <output>.state.json; stages whose options and
+    # inputs are unchanged since ``resume`` are restored instead of re-run
+    state = JobState(None if args.no_checkpoint else state_path(args.output), dict(vars(args)),
+                     resume.stages if resume else None)
+
+    ingest = state.restore('ingest', args, valid=lambda out: not out['chunks'] or JobState.read_corpus(out['corpus']) is not None)
+    if ingest is not None:
+        corpus_texts = JobState.read_corpus(ingest['corpus']) or []
+        images: List[Any] = [{'path': p} for p in ingest['images']]
+    else:
+        chunks, images = _ingest(args, ctx)
+        corpus_texts = [c.text for c in chunks]
+        state.checkpoint('ingest', args, {
+            'chunks': [{'source': c.source, 'offset': c.offset, 'chars': len(c.text)} for c in chunks],
+            'corpus': state.write_corpus(corpus_texts),
+            'images': [im['path'] for im in images],
+        })
 
-    # Ingest text
-    corpus = []
-    if args.text_folder:
-        corpus.extend(load_text_from_files(args.text_folder))
-    if args.url:
-        for u in args.url:
-            if args.crawl_depth > 0:
-                pages = crawl(u, max_depth=args.crawl_depth)
-                for p in pages:
-                    corpus.append({'path': p.url, 'content': p.text})
+    llm = ctx.llm or LLMClient(max_concurrency=args.llm_concurrency, max_retries=args.llm_retries)
+    llm_cache = None
+    if not args.no_llm_cache:
+        llm_root = Path(args.cache_dir) / 'llm'
+        llm_cache = ctx.cached(('llm_cache', str(llm_root), args.llm_cache_ttl, args.llm_cache_mb),
+                               lambda: LLMCache(llm_root, ttl=args.llm_cache_ttl, max_bytes=args.llm_cache_mb * 1024 * 1024))
+    llm = llm.with_cache(llm_cache)
+    summary = state.restore('summary', args)
+    if summary is None:
+        with span('summary', mode=args.summary_mode):
+            summary = args.prompt
+            if corpus_texts:
+                summary = build_summary(args.prompt, corpus_texts, llm, mode=args.summary_mode, top_k=args.summary_top_k,
+                                        token_budget=args.summary_token_budget, concurrency=args.llm_concurrency)
+        state.checkpoint('summary', args, summary)
+
+    storyboard = state.restore('storyboard', args)
+    tts = None
+    if storyboard is not None and not args.dry_run:
+        tts = state.restore('tts', args, valid=lambda out: all(Path(p).is_file() for p in out['audio']))
+    # Pipelined: narration is synthesized while the storyboard is still streaming in, and each
+    # part is encoded as soon as its narration exists (bounded queues between the stages)
+    pipelined = not (args.no_pipeline or args.dry_run)
+    tts_stage = None
+    if pipelined and tts is None:
+        tts_stage = Stage('tts', lambda seg: _synthesize(args, ctx, [seg])[0], workers=args.tts_workers)
+    segments: List[Segment] = []
+    audio_paths: List[Any] = []
+    storyboard_done = False
+    try:
+        with span('storyboard', streamed=pipelined and storyboard is None, restored=storyboard is not None) as sp:
+            if storyboard is not None:
+                segments = normalize_segments(storyboard)
+            elif tts_stage is not None:
+                for seg in iter_storyboard(args.prompt, summary, args.segments, llm):
+                    segments.append(seg)
+                    audio_paths.append(tts_stage.submit(seg))
             else:
-                txt = fetch_url(u)
-                if txt:
-                    corpus.append({'path': u, 'content': txt})
-    corpus_texts = [c['content'] for c in corpus]
-
-    # Images
-    images = []
-    if args.image_folder:
-        images = load_images(args.image_folder)
-
-    llm = LLMClient()
-    summary = build_summary(args.prompt, corpus_texts, llm) if corpus_texts else args.prompt
-    segments = build_storyboard(args.prompt, summary, args.segments, llm)
-
-    select_images_for_segments(segments, images, corpus_texts or [summary])
-    # Validation (images optional)
-    validate_segments(segments, require_images=False)
-
-    if args.dry_run:
-        from pprint import pprint
-        pprint(segments)
-        return
+                segments = build_storyboard(args.prompt, summary, args.segments, llm)
+            sp.set(segments=len(segments))
+        if storyboard is None:
+            state.checkpoint('storyboard', args, [s.model_dump(include={'idx', 'title', 'narration', 'hint'}) for s in segments])
+        storyboard_done = True
+        if llm_cache is not None and llm.available():
+            logger.info("LLM cache: %s", dict(llm_cache.stats))
+        if tts is not None:
+            audio_paths = tts['audio']
+            for seg, words in zip(segments, tts['words']):
+                if words is not None:
+                    seg.meta['words'] = words
+        elif tts_stage is not None and not audio_paths:
+            audio_paths = [tts_stage.submit(seg) for seg in segments]  # storyboard restored, narration not
+
+        picks = state.restore('images', args)
+        if picks is not None:
+            for seg, image in zip(segments, picks):
+                seg.image = image
+        else:
+            with span('select_images'):
+                tfidf = None
+                if not args.no_tfidf_index:
+                    tfidf_root = Path(args.cache_dir) / 'tfidf'
+                    tfidf = ctx.cached(('tfidf', str(tfidf_root), args.tfidf_index_mb),
+                                       lambda: TfidfIndex(tfidf_root, max_bytes=args.tfidf_index_mb * 1024 * 1024))
+                image_index = None
+                if images:
+                    features_root = None if args.no_image_index else Path(args.cache_dir) / 'image_features'
+                    image_index = ctx.cached(('image_features', args.image_folder, str(features_root), args.image_index_mb),
+                                             lambda: ImageFeatureIndex.build(images, root=features_root,
+                                                                             max_bytes=args.image_index_mb * 1024 * 1024))
+                select_images_for_segments(segments, images, corpus_texts or [summary], index=tfidf, image_index=image_index)
+            state.checkpoint('images', args, [s.image for s in segments])
+        # Validation (images optional)
+        validate_segments(segments, require_images=False)
+
+        if args.dry_run:
+            from pprint import pprint
+            pprint(segments)
+            return None
+
+        build_timeline(segments)
+        if tts is None and tts_stage is None:
+            with span('tts', segments=len(segments), backend=args.tts_backend):
+                audio_paths = _synthesize(args, ctx, segments)
+            state.checkpoint('tts', args, _tts_output(segments, audio_paths))
+        segment_cache = None
+        if not args.no_render_cache:
+            segment_cache = DiskCache(Path(args.cache_dir) / 'segments', max_bytes=args.render_cache_mb * 1024 * 1024)
+        plate_cache = None
+        if not args.no_plate_cache:
+            plate_cache = DiskCache(Path(args.cache_dir) / 'plates', max_bytes=args.plate_cache_mb * 1024 * 1024)
+        caption_cache = None
+        if args.caption_renderer == 'overlay':
+            caption_cache = DiskCache(Path(args.cache_dir) / 'captions', max_bytes=256 * 1024 * 1024)
+        loudnorm_cache = None
+        if args.audio_mode == 'master' and not args.no_render_cache:
+            loudnorm_cache = DiskCache(Path(args.cache_dir) / 'loudnorm')
+        with span('compose', engine=args.render_engine, profile=args.profile):
+            create_video(
+                segments,
+                audio_paths,
+                args.output,
+                music_path=args.music,
+                music_intro_path=args.music_intro,
+                music_outro_path=args.music_outro,
+                music_volume=args.music_volume,
+                duck=not args.no_duck,
+                captions=not args.no_captions,
+                caption_mode=args.caption_mode,
+                caption_max_chars=args.caption_max_chars,
+                caption_color=args.caption_color,
+                caption_box=True,
+                caption_box_color=args.caption_box_color,
+                caption_font=args.caption_font,
+                caption_renderer=args.caption_renderer,
+                caption_highlight=args.caption_highlight,
+                caption_highlight_color=args.caption_highlight_color,
+                caption_cache=caption_cache,
+                ken_burns=args.ken_burns,
+                ken_burns_zoom=args.ken_burns_zoom,
+                ken_burns_engine=args.ken_burns_engine,
+                ken_burns_path=args.ken_burns_path,
+                ken_burns_focus=args.ken_burns_focus,
+                continuous_music=not args.no_continuous_music,
+                fade_in=args.fade_in,
+                fade_out=args.fade_out,
+                normalize_voice=not args.no_voice_normalize,
+                keep_temp=args.keep_temp,
+                pre_cleanup=args.pre_cleanup,
+                workers=args.workers,
+                threads=args.threads,
+                pool=ctx.pool,
+                engine=args.render_engine,
+                audio_mode=args.audio_mode,
+                segment_cache=segment_cache,
+                plate_cache=plate_cache,
+                loudnorm_cache=loudnorm_cache,
+                tmp_dir=ctx.tmp_dir,
+                profile=args.profile,
+                renditions=args.rendition or (),
+            )
+        state.checkpoint('compose', args, {
+            'output': args.output,
+            'sidecar': str(Path(args.output).with_suffix('.json')),
+            'renditions': {r.name: rendition_path(args.output, r) for r in plan_renditions(
+                args.rendition or (), PROFILES[args.profile].width, PROFILES[args.profile].height)},
+        })
+    finally:
+        if tts_stage is not None:
+            tts_stage.close(cancel=True)  # no-op after a full render; drops queued lines on failure
+            # Checkpoint narration even when the render failed, so a retry starts at compose
+            if storyboard_done and all(f.done() and not f.cancelled() and f.exception() is None for f in audio_paths):
+                state.checkpoint('tts', args, _tts_output(segments, [f.result() for f in audio_paths]))
+    return args.output
+
+
+def _tts_output(segments: List[Segment], audio_paths: List[str]) -> Dict[str, Any]:
+    """TTS checkpoint: wav paths, measured durations and word timings per segment."""
+    seconds: List[Optional[float]] = []
+    for p in audio_paths:
+        try:
+            seconds.append(round(wav_seconds(p), 3))
+        except (OSError, EOFError, wave.Error):
+            seconds.append(None)
+    return {'audio': list(audio_paths), 'seconds': seconds, 'words': [s.meta.get('words') for s in segments]}
+
+
+def _ingest(args: argparse.Namespace, ctx: RunContext) -> Tuple[List[Chunk], List[Any]]:
+    """Retained corpus chunks (most relevant first) and the image library."""
+    with span('ingest') as sp:
+        # Ingest text as a stream of chunks; only the most prompt-relevant ones are kept
+        window = ContextWindow(args.prompt, max_chars=int(args.context_mb * 1024 * 1024))
+        if args.text_folder:
+            index = None if args.no_corpus_index else Path(args.cache_dir) / 'corpus.sqlite'
+            window.extend(iter_chunks(iter_text_from_files(args.text_folder, index=index), args.chunk_chars))
+        if args.url:
+            # All seeds in one concurrent crawl; depth 0 fetches just the seeds
+            max_pages = args.crawl_max_pages if args.crawl_depth > 0 else len(args.url)
+            http_cache = None
+            if not args.no_http_cache:
+                http_cache = HttpCache(Path(args.cache_dir) / 'http', ttl=args.http_cache_ttl,
+                                       max_bytes=args.http_cache_mb * 1024 * 1024)
+            pages = ctx.cached(
+                ('crawl', tuple(args.url), args.crawl_depth, max_pages),
+                lambda: crawl(args.url, max_pages=max_pages, max_depth=args.crawl_depth,
+                              concurrency=args.crawl_concurrency, per_host=args.crawl_per_host, cache=http_cache),
+            )
+            window.extend(iter_chunks(({'path': p.url, 'content': p.text} for p in pages), args.chunk_chars))
 
-    build_timeline(segments)
-    audio_paths = synthesize_segments(segments, out_dir=Path('audio_cache'))
-    create_video(
+        # Images
+        images = []
+        if args.image_folder:
+            image_store = None if args.no_image_index else Path(args.cache_dir) / 'images.sqlite'
+            images = ctx.cached(('images', args.image_folder), lambda: load_images(args.image_folder, store=image_store))
+        sp.set(chunks=window.seen, kept_chunks=len(window), context_chars=window.chars, images=len(images))
+    return window.chunks(), images
+
+
+def _synthesize(args: argparse.Namespace, ctx: RunContext, segments: List[Segment]) -> List[str]:
+    tts_options = {'model': args.tts_model} if args.tts_model and args.tts_backend == 'coqui' else {}
+    return synthesize_segments(
         segments,
-        audio_paths,
-        args.output,
-        music_path=args.music,
-    music_intro_path=args.music_intro,
-    music_outro_path=args.music_outro,
-        music_volume=args.music_volume,
-        duck=not args.no_duck,
-        captions=not args.no_captions,
-        caption_mode=args.caption_mode,
-        caption_max_chars=args.caption_max_chars,
-        caption_color=args.caption_color,
-        caption_box=True,
-        caption_box_color=args.caption_box_color,
-        caption_font=args.caption_font,
-        ken_burns=args.ken_burns,
-        ken_burns_zoom=args.ken_burns_zoom,
-        continuous_music=not args.no_continuous_music,
-        fade_in=args.fade_in,
-        fade_out=args.fade_out,
-        normalize_voice=not args.no_voice_normalize,
-        keep_temp=args.keep_temp,
-        pre_cleanup=args.pre_cleanup,
+        engine=ctx.tts_engine(args.tts_backend, **tts_options),
+        out_dir=ctx.audio_dir or Path(args.cache_dir) / 'tts',
+        voice=args.voice,
+        rate=args.tts_rate,
+        max_bytes=args.tts_cache_mb * 1024 * 1024,
+        workers=args.tts_workers,
     )
-    print(f"Created {args.output}")
+
+
+def render_main(argv: List[str]) -> Optional[str]:
+    """``reelctxt render --from STATE [options]``: re-render from a job state, re-running only invalidated stages."""
+    p = argparse.ArgumentParser(prog='reelctxt render', description='Resume a reel from its job state file',
+                                epilog='Any reelctxt option may follow; it overrides the saved value.')
+    p.add_argument('--from', dest='state', required=True, help='Job state written by a previous run (<output>.state.json)')
+    known, rest = p.parse_known_args(argv)
+    resume = JobState.load(known.state)
+    parser = build_parser()
+    saved = {k: v for k, v in resume.options.items() if k != 'dry_run'}
+    # Append options would add to a saved list: parse them from None so a given value replaces it
+    lists = {a.dest for a in parser._actions if isinstance(a, argparse._AppendAction)}
+    parser.set_defaults(**{k: v for k, v in saved.items() if k not in lists})
+    args = parser.parse_args(['--prompt', resume.options['prompt'], *rest])
+    for dest in lists:
+        if getattr(args, dest) is None:
+            setattr(args, dest, saved.get(dest))
+    setup_logging(args.log_level)
+    output = run(args, resume=resume)
+    if output:
+        print(f"Created {output}")
+    return output
+
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == 'batch':
+        from .batch import main as batch_main
+        return batch_main(argv[1:])
+    if argv and argv[0] == 'render':
+        render_main(argv[1:])
+        return
+    args = parse_args(argv)
+    setup_logging(args.log_level)
+    if run(args):
+        print(f"Created {args.output}")
 
 if __name__ == '__main__':
     main()
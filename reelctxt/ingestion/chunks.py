@@ -0,0 +1,34 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator
+
+DEFAULT_CHUNK_CHARS = 1200
+
+
+@dataclass
+class Chunk:
+    source: str  # file path or URL
+    offset: int  # character offset of ``text`` in the source document
+    text: str
+
+
+def chunk_text(source: str, text: str, size: int = DEFAULT_CHUNK_CHARS) -> Iterator[Chunk]:
+    """Split a document into ~``size`` character chunks, cutting at whitespace when possible."""
+    start, n = 0, len(text)
+    while start < n:
+        end = min(n, start + size)
+        if end < n:
+            cut = text.rfind(' ', start + size // 2, end)
+            if cut > start:
+                end = cut
+        raw = text[start:end]
+        piece = raw.strip()
+        if piece:
+            yield Chunk(source, start + len(raw) - len(raw.lstrip()), piece)
+        start = end
+
+
+def iter_chunks(docs: Iterable[Dict], size: int = DEFAULT_CHUNK_CHARS) -> Iterator[Chunk]:
+    """Chunks of a stream of ``{path, content}`` records, one document in memory at a time."""
+    for doc in docs:
+        yield from chunk_text(doc['path'], doc['content'], size)
@@ -0,0 +1,174 @@
+from __future__ import annotations
+import hashlib
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import logging
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+TEXT_EXTS = {".txt", ".md", ".markdown", ".html", ".htm"}
+HTML_EXTS = {".html", ".htm"}
+PARALLEL_MIN = 64  # below this many changed files a process pool costs more than it saves
+WRITE_BATCH = 256  # parsed files written per transaction, so a cold sync never holds the corpus in RAM
+
+try:  # lxml is several times faster than html.parser on large documents
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Bump when extraction changes so existing indexes re-parse everything
+EXTRACT_VERSION = f'1:{HTML_PARSER}'
+
+
+def extract_text(path: str | Path, data: bytes) -> str:
+    text = data.decode('utf-8', errors='ignore')
+    if Path(path).suffix.lower() in HTML_EXTS:
+        text = BeautifulSoup(text, HTML_PARSER).get_text(separator=' ', strip=True)
+    return text
+
+
+def read_text_file(path: str) -> Tuple[str, Optional[str], Optional[str], Optional[str]]:
+    """(path, sha256, text, error) for one file; runs in worker processes."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        return path, hashlib.sha256(data).hexdigest(), extract_text(path, data), None
+    except Exception as e:
+        return path, None, None, str(e)
+
+
+def scan_files(folder: Path, exts: Set[str] = TEXT_EXTS) -> Iterator[Tuple[str, os.stat_result]]:
+    """(path, stat) of every file with one of ``exts`` under ``folder`` (os.scandir: no extra stat per entry on most platforms)."""
+    stack = [str(folder)]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except OSError as e:
+            logger.warning("Cannot list %s: %s", e.filename, e)
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=True):
+                stack.append(entry.path)
+            elif os.path.splitext(entry.name)[1].lower() in exts and entry.is_file():
+                yield entry.path, entry.stat()
+
+
+class CorpusIndex:
+    """sqlite manifest of extracted text keyed by file path, size and mtime.
+
+    ``sync`` re-reads only new files and files whose size/mtime changed (and, when
+    only the mtime moved, whose content hash changed), parsing them in a process
+    pool; rows of deleted files are dropped. ``':memory:'`` gives a throwaway index.
+    """
+
+    def __init__(self, path: str | Path = ':memory:'):
+        self.path = str(path)
+        if self.path != ':memory:':
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        if self.path != ':memory:':
+            self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, root TEXT, size INTEGER, mtime_ns INTEGER, sha256 TEXT, content TEXT
+            );
+            CREATE INDEX IF NOT EXISTS files_root ON files(root);
+            """
+        )
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'extract_version'").fetchone()
+        if row is None or row[0] != EXTRACT_VERSION:
+            with self.db:
+                self.db.execute('DELETE FROM files')
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('extract_version', ?)", (EXTRACT_VERSION,))
+
+    def close(self) -> None:
+        self.db.close()
+
+    def sync(self, folder: str | Path, workers: Optional[int] = None) -> List[Dict]:
+        """Bring the index up to date with ``folder``; returns ``{path, content}`` records sorted by path."""
+        self.update(folder, workers)
+        return list(self.records(folder))
+
+    def records(self, folder: str | Path) -> Iterator[Dict]:
+        """Stream the indexed ``{path, content}`` records of ``folder`` (sorted by path) from disk."""
+        cursor = self.db.execute('SELECT path, content FROM files WHERE root = ? ORDER BY path', (str(folder),))
+        for path, content in cursor:
+            yield {'path': path, 'content': content}
+
+    def update(self, folder: str | Path, workers: Optional[int] = None) -> None:
+        root = str(folder)
+        known = {
+            path: (size, mtime_ns, sha)
+            for path, size, mtime_ns, sha in self.db.execute(
+                'SELECT path, size, mtime_ns, sha256 FROM files WHERE root = ?', (root,)
+            )
+        }
+        seen: Dict[str, os.stat_result] = {}
+        touched: List[Tuple[str, os.stat_result, str]] = []  # mtime moved, size same: hash decides
+        todo: List[str] = []
+        for path, st in scan_files(Path(folder)):
+            seen[path] = st
+            old = known.get(path)
+            if old is None or old[0] != st.st_size:
+                todo.append(path)
+            elif old[1] != st.st_mtime_ns:
+                touched.append((path, st, old[2]))
+
+        refreshed = []  # (mtime_ns, path): content unchanged
+        for path, st, old_sha in touched:
+            try:
+                with open(path, 'rb') as f:
+                    sha = hashlib.sha256(f.read()).hexdigest()
+            except OSError:
+                sha = None
+            if sha == old_sha:
+                refreshed.append((st.st_mtime_ns, path))
+            else:
+                todo.append(path)
+
+        failed = set()
+        parsed = 0
+        updates = []  # (path, root, size, mtime_ns, sha256, content)
+        for path, sha, text, error in self._parse(todo, workers):
+            if error is not None:
+                logger.error("Failed reading %s: %s", path, error)
+                failed.add(path)
+                continue
+            st = seen[path]
+            updates.append((path, root, st.st_size, st.st_mtime_ns, sha, text))
+            if len(updates) >= WRITE_BATCH:
+                parsed += self._write(updates)
+                updates = []
+        parsed += self._write(updates)
+
+        deleted = [(p,) for p in known if p not in seen or p in failed]
+        with self.db:
+            self.db.executemany('UPDATE files SET mtime_ns = ? WHERE path = ?', refreshed)
+            self.db.executemany('DELETE FROM files WHERE path = ?', deleted)
+        logger.info(
+            "Corpus %s: %d files, %d parsed, %d unchanged, %d removed",
+            root, len(seen), parsed, len(seen) - parsed - len(failed), len(deleted),
+        )
+
+    @staticmethod
+    def _parse(todo: List[str], workers: Optional[int]) -> Iterator[Tuple[str, Optional[str], Optional[str], Optional[str]]]:
+        """read_text_file over ``todo`` in order; the pool is fed one window at a time so
+        parsed texts waiting to be written stay bounded."""
+        if len(todo) < PARALLEL_MIN or workers == 1:
+            yield from map(read_text_file, todo)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            for start in range(0, len(todo), 4 * WRITE_BATCH):
+                yield from ex.map(read_text_file, todo[start:start + 4 * WRITE_BATCH], chunksize=16)
+
+    def _write(self, updates: List[tuple]) -> int:
+        with self.db:
+            self.db.executemany('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)', updates)
+        return len(updates)
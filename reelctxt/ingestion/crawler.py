@@ -1,14 +1,19 @@
 from __future__ import annotations
 import urllib.parse as urlparse
-from collections import deque
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import List, Set
-from bs4 import BeautifulSoup
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 import logging
+from .http_cache import HttpCache, fetch_page, normalize_url
 
 logger = logging.getLogger(__name__)
 
+HEADERS = {"User-Agent": "ReelCtxtCrawler/0.1"}
+
+
 @dataclass
 class CrawledPage:
     url: str
@@ -21,34 +26,96 @@ def same_domain(seed: str, target: str) -> bool:
     return (s.netloc == t.netloc) and t.scheme in {"http", "https"}
 
 
-def crawl(start_url: str, max_pages: int = 10, max_depth: int = 1) -> List[CrawledPage]:
-    visited: Set[str] = set()
-    q = deque([(start_url, 0)])
-    out: List[CrawledPage] = []
-    headers = {"User-Agent": "ReelCtxtCrawler/0.1"}
-
-    while q and len(out) < max_pages:
-        url, depth = q.popleft()
-        if url in visited or depth > max_depth:
-            continue
-        visited.add(url)
-        try:
-            r = requests.get(url, headers=headers, timeout=15)
-            r.raise_for_status()
-        except Exception as e:
-            logger.warning("Failed %s: %s", url, e)
-            continue
-        ct = r.headers.get('content-type', '')
-        if 'text/html' not in ct:
-            continue
-        soup = BeautifulSoup(r.text, 'html.parser')
-        for tag in soup(['script', 'style', 'noscript']):
-            tag.decompose()
-        text = soup.get_text(separator=' ', strip=True)
-        out.append(CrawledPage(url=url, text=text))
-        if depth < max_depth:
-            for a in soup.find_all('a', href=True):
-                href = urlparse.urljoin(url, a['href'])
-                if same_domain(start_url, href) and href not in visited:
-                    q.append((href, depth + 1))
-    return out
+def make_session(pool_size: int = 10) -> requests.Session:
+    """Keep-alive session whose connection pool fits ``pool_size`` concurrent requests."""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _fetch(session: requests.Session, url: str, timeout: float, cache: Optional[HttpCache]) -> Tuple[Optional[CrawledPage], List[str]]:
+    page = fetch_page(url, session=session, timeout=timeout, cache=cache)
+    if page is None:
+        return None, []
+    return CrawledPage(url=url, text=page.text), page.links
+
+
+def crawl(
+    start_urls: str | Iterable[str],
+    max_pages: int = 10,
+    max_depth: int = 1,
+    concurrency: int = 8,
+    per_host: int = 2,
+    timeout: float = 15,
+    session: Optional[requests.Session] = None,
+    cache: Optional[HttpCache] = None,
+) -> List[CrawledPage]:
+    """Breadth-first crawl of one or more seeds, each restricted to its own domain.
+
+    Up to ``concurrency`` pages are fetched at once over a shared keep-alive
+    session, at most ``per_host`` per host. URLs are normalized before dedup and
+    ``max_pages`` caps the total across all seeds. Pages are returned in
+    breadth-first order, independent of which request finished first. With
+    ``cache``, unchanged pages cost a conditional request (or none within its TTL).
+    """
+    seeds = [start_urls] if isinstance(start_urls, str) else list(start_urls)
+    seen: Set[str] = set()
+    # (BFS order key, url, depth, seed); the key (depth, parent key, link index) ranks
+    # pages as a sequential breadth-first crawl would, whatever the completion order
+    frontier: Deque[Tuple[tuple, str, int, str]] = deque()
+
+    def enqueue(key: tuple, url: str, depth: int, seed: str) -> None:
+        if url not in seen:
+            seen.add(url)
+            frontier.append((key, url, depth, seed))
+
+    for i, s in enumerate(seeds):
+        n = normalize_url(s)
+        enqueue((0, (), i), n, 0, n)
+
+    def next_ready() -> Optional[Tuple[tuple, str, int, str]]:
+        for i, item in enumerate(frontier):
+            if in_flight[urlparse.urlsplit(item[1]).netloc] < per_host:
+                del frontier[i]
+                return item
+        return None
+
+    out: List[Tuple[tuple, CrawledPage]] = []
+    in_flight: Counter = Counter()
+    running: Dict = {}
+    own_session = session is None
+    session = session or make_session(concurrency)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as ex:
+            while (frontier or running) and len(out) < max_pages:
+                # Never have more requests in flight than pages we could still keep
+                while len(running) < concurrency and len(running) + len(out) < max_pages:
+                    item = next_ready()
+                    if item is None:
+                        break
+                    in_flight[urlparse.urlsplit(item[1]).netloc] += 1
+                    running[ex.submit(_fetch, session, item[1], timeout, cache)] = item
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    key, url, depth, seed = running.pop(fut)
+                    in_flight[urlparse.urlsplit(url).netloc] -= 1
+                    page, links = fut.result()
+                    if page is None or len(out) >= max_pages:
+                        continue
+                    out.append((key, page))
+                    if depth < max_depth:
+                        for i, href in enumerate(links):
+                            n = normalize_url(href)
+                            if same_domain(seed, n):
+                                enqueue((depth + 1, key, i), n, depth + 1, seed)
+    finally:
+        if own_session:
+            session.close()
+    out.sort(key=lambda item: item[0])
+    logger.info("Crawled %d pages from %d seed(s)%s", len(out), len(seeds), f" (cache: {dict(cache.stats)})" if cache else '')
+    return [page for _, page in out]
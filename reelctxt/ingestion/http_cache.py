@@ -0,0 +1,143 @@
+from __future__ import annotations
+import json
+import threading
+import time
+import urllib.parse as urlparse
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from bs4 import BeautifulSoup
+import requests
+import logging
+from ..util.cache import DiskCache, stable_hash
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_VERSION = 1
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used for dedup: lowercase scheme/host, no default port, fragment or trailing slash."""
+    p = urlparse.urlsplit(url.strip())
+    scheme = p.scheme.lower()
+    host = (p.hostname or '').lower()
+    if p.port and p.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{p.port}"
+    path = p.path.rstrip('/') or '/'
+    return urlparse.urlunsplit((scheme, host, path, p.query, ''))
+
+
+def extract_html(html: str, base_url: str) -> Tuple[str, List[str]]:
+    """Visible text (scripts/styles removed) and absolute link targets of a page."""
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup(['script', 'style', 'noscript']):
+        tag.decompose()
+    text = soup.get_text(separator=' ', strip=True)
+    links = [urlparse.urljoin(base_url, a['href']) for a in soup.find_all('a', href=True)]
+    return text, links
+
+
+@dataclass
+class FetchedPage:
+    url: str
+    text: str
+    links: List[str] = field(default_factory=list)
+    source: str = 'network'  # 'network' | 'fresh' (served within TTL) | 'revalidated' (304)
+
+
+class HttpCache:
+    """Persistent response cache keyed by normalized URL.
+
+    Each entry keeps the raw body, the extracted text/links and the validators
+    (ETag / Last-Modified). Within ``ttl`` seconds an entry is served without any
+    request; after that it is revalidated with a conditional GET, and a 304 reuses
+    the stored text without re-parsing. Size is bounded by DiskCache LRU eviction.
+    """
+
+    def __init__(self, root: str | Path, ttl: float = 3600, max_bytes: Optional[int] = None):
+        self.store = DiskCache(root, max_bytes=max_bytes)
+        self.ttl = ttl
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def key(self, url: str) -> str:
+        return stable_hash(['http', HTTP_CACHE_VERSION, normalize_url(url)])
+
+    def load(self, url: str) -> Optional[Dict[str, Any]]:
+        p = self.store.get(self.key(url), '.json')
+        if p is None:
+            return None
+        try:
+            return json.loads(p.read_text(encoding='utf-8'))
+        except (OSError, ValueError):  # evicted or torn by another process
+            return None
+
+    def save(self, url: str, entry: Dict[str, Any], body: Optional[bytes] = None) -> None:
+        key = self.key(url)
+        if body is not None:
+            self.store.put_bytes(key, body, '.body', evict=False)
+        self.store.put_bytes(key, json.dumps(entry).encode('utf-8'), '.json')
+
+    def count(self, what: str) -> None:
+        with self._lock:
+            self.stats[what] += 1
+
+
+def _page(entry: Dict[str, Any], source: str) -> Optional[FetchedPage]:
+    if entry.get('text') is None:  # cached non-HTML response
+        return None
+    return FetchedPage(url=entry['url'], text=entry['text'], links=entry.get('links', []), source=source)
+
+
+def fetch_page(
+    url: str,
+    session: Optional[requests.Session] = None,
+    timeout: float = 15,
+    cache: Optional[HttpCache] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Optional[FetchedPage]:
+    """GET an HTML page and extract its text and links, through ``cache`` when given.
+
+    Returns None for failed requests and non-HTML responses.
+    """
+    get = session.get if session is not None else requests.get
+    entry = cache.load(url) if cache else None
+    req_headers = dict(headers or {})
+    if entry is not None:
+        if time.time() - entry['fetched_at'] < cache.ttl:
+            cache.count('fresh')
+            return _page(entry, 'fresh')
+        if entry.get('etag'):
+            req_headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            req_headers['If-Modified-Since'] = entry['last_modified']
+    try:
+        r = get(url, timeout=timeout, headers=req_headers)
+        if r.status_code == 304 and entry is not None:
+            entry['fetched_at'] = time.time()
+            cache.save(url, entry)
+            cache.count('revalidated')
+            return _page(entry, 'revalidated')
+        r.raise_for_status()
+    except Exception as e:
+        logger.warning("Fetch failed %s: %s", url, e)
+        return None
+    ct = r.headers.get('content-type', '')
+    text, links = extract_html(r.text, r.url) if 'text/html' in ct else (None, [])
+    if cache:
+        cache.count('network')
+        cache.save(url, {
+            'url': url,
+            'final_url': r.url,
+            'fetched_at': time.time(),
+            'etag': r.headers.get('etag'),
+            'last_modified': r.headers.get('last-modified'),
+            'content_type': ct,
+            'text': text,
+            'links': links,
+        }, r.content)
+    if text is None:
+        return None
+    return FetchedPage(url=url, text=text, links=links)
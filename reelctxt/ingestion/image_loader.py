@@ -1,34 +1,152 @@
 from __future__ import annotations
+import io
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Dict
+from typing import Any, List, Dict, Optional, Tuple
 import logging
-from PIL import Image
+from PIL import Image, ImageOps
+from .corpus_index import scan_files
 
 IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.webp'}
+THUMB_VERSION = 1
+_ROTATED_ORIENTATIONS = {5, 6, 7, 8}  # EXIF orientations that swap width/height
 logger = logging.getLogger(__name__)
 
-def load_images(folder: str | Path, max_dim: int = 512) -> List[Dict]:
+
+def make_thumbnail(path: str | Path, max_dim: int = 512) -> Tuple[int, int, int, bytes]:
+    """(width, height, EXIF orientation, JPEG thumbnail bytes); width/height are of the oriented original."""
+    with Image.open(path) as im:
+        orientation = im.getexif().get(0x0112, 1)
+        w, h = im.size
+        if orientation in _ROTATED_ORIENTATIONS:
+            w, h = h, w
+        im.draft('RGB', (max_dim, max_dim))  # JPEG: decode at 1/2..1/8 scale, never below max_dim
+        im = ImageOps.exif_transpose(im).convert('RGB')
+        im.thumbnail((max_dim, max_dim), Image.BILINEAR, reducing_gap=2.0)
+        buf = io.BytesIO()
+        im.save(buf, 'JPEG', quality=85)
+    return w, h, orientation, buf.getvalue()
+
+
+class ThumbnailStore:
+    """sqlite table of image metadata + packed JPEG thumbnails keyed by path, size and mtime."""
+
+    def __init__(self, path: str | Path = ':memory:'):
+        self.path = str(path)
+        if self.path != ':memory:':
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        if self.path != ':memory:':
+            self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS images (
+                path TEXT, max_dim INTEGER, version INTEGER, size INTEGER, mtime_ns INTEGER,
+                width INTEGER, height INTEGER, orientation INTEGER, thumb BLOB,
+                PRIMARY KEY (path, max_dim)
+            )"""
+        )
+
+    def lookup(self, max_dim: int) -> Dict[str, Tuple[int, int, int, int, int]]:
+        """path -> (size, mtime_ns, width, height, orientation) for current-version rows."""
+        with self._lock:
+            rows = self.db.execute(
+                'SELECT path, size, mtime_ns, width, height, orientation FROM images WHERE max_dim = ? AND version = ?',
+                (max_dim, THUMB_VERSION),
+            ).fetchall()
+        return {r[0]: r[1:] for r in rows}
+
+    def put_many(self, rows: List[tuple]) -> None:
+        with self._lock, self.db:
+            self.db.executemany('INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def delete(self, paths: List[str]) -> None:
+        with self._lock, self.db:
+            self.db.executemany('DELETE FROM images WHERE path = ?', [(p,) for p in paths])
+
+    def thumbnail_bytes(self, path: str, max_dim: int) -> Optional[bytes]:
+        with self._lock:
+            row = self.db.execute('SELECT thumb FROM images WHERE path = ? AND max_dim = ?', (path, max_dim)).fetchone()
+        return row[0] if row else None
+
+
+@dataclass
+class ImageRecord:
+    """One library image. The thumbnail is decoded from the store only when accessed."""
+    path: str
+    width: int
+    height: int
+    orientation: int = 1
+    max_dim: int = 512
+    store: Optional[ThumbnailStore] = field(default=None, repr=False, compare=False)
+
+    @property
+    def thumbnail(self) -> Optional[Image.Image]:
+        data = self.store.thumbnail_bytes(self.path, self.max_dim) if self.store else None
+        if data is None:
+            return None
+        im = Image.open(io.BytesIO(data))
+        im.load()
+        return im
+
+    def __getitem__(self, item: str) -> Any:  # backward compatibility with the old dict records
+        return getattr(self, item)
+
+
+def load_images(
+    folder: str | Path,
+    max_dim: int = 512,
+    store: str | Path | ThumbnailStore | None = None,
+    workers: Optional[int] = None,
+) -> List[ImageRecord]:
+    """Scan ``folder`` for images and return lightweight records sorted by path.
+
+    Only new or changed files (by size + mtime) are decoded, in parallel and at
+    reduced JPEG draft scale; their metadata and thumbnail go to ``store`` (an
+    sqlite path or ThumbnailStore; default in-memory) for later runs.
+    """
     folder = Path(folder)
-    out: List[Dict] = []
     if not folder.exists():
         logger.warning("Image folder %s not found", folder)
-        return out
-    for p in folder.rglob('*'):
-        if p.is_file() and p.suffix.lower() in IMAGE_EXTS:
-            try:
-                with Image.open(p) as im:
-                    im = im.convert('RGB')
-                    w, h = im.size
-                    scale = max_dim / max(w, h)
-                    if scale < 1:
-                        new_size = (int(w*scale), int(h*scale))
-                        im = im.resize(new_size)
-                    out.append({
-                        'path': str(p),
-                        'width': im.width,
-                        'height': im.height,
-                        'thumbnail': im  # kept in memory; small
-                    })
-            except Exception as e:
-                logger.error("Failed image %s: %s", p, e)
-    return out
+        return []
+    if not isinstance(store, ThumbnailStore):
+        store = ThumbnailStore(store or ':memory:')
+    known = store.lookup(max_dim)
+    records: Dict[str, ImageRecord] = {}
+    todo: List[Tuple[str, int, int]] = []
+    for path, st in scan_files(folder, IMAGE_EXTS):
+        old = known.get(path)
+        if old is not None and old[:2] == (st.st_size, st.st_mtime_ns):
+            records[path] = ImageRecord(path, old[2], old[3], old[4], max_dim, store)
+        else:
+            todo.append((path, st.st_size, st.st_mtime_ns))
+
+    def _load(item: Tuple[str, int, int]) -> Optional[tuple]:
+        path, size, mtime_ns = item
+        try:
+            w, h, orientation, thumb = make_thumbnail(path, max_dim)
+        except Exception as e:
+            logger.error("Failed image %s: %s", path, e)
+            return None
+        return (path, max_dim, THUMB_VERSION, size, mtime_ns, w, h, orientation, thumb)
+
+    if todo:
+        rows: List[tuple] = []
+        with ThreadPoolExecutor(max_workers=workers) as ex:  # Pillow decodes with the GIL released
+            for r in ex.map(_load, todo):
+                if r is None:
+                    continue
+                records[r[0]] = ImageRecord(r[0], r[5], r[6], r[7], max_dim, store)
+                rows.append(r)
+                if len(rows) >= 256:  # flush so thumbnail bytes never pile up in memory
+                    store.put_many(rows)
+                    rows = []
+        store.put_many(rows)
+    prefix = str(folder).rstrip('/\\') + os.sep
+    store.delete([p for p in known if p.startswith(prefix) and p not in records])
+    logger.info("Images %s: %d found, %d decoded", folder, len(records), len(todo))
+    return [records[p] for p in sorted(records)]
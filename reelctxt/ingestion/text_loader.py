@@ -1,46 +1,53 @@
 from __future__ import annotations
-import os
 from pathlib import Path
-from typing import Iterable, List, Dict
+from typing import Dict, Iterator, List, Optional
 import logging
-from bs4 import BeautifulSoup
-import requests
-
-TEXT_EXTS = {".txt", ".md", ".markdown", ".html", ".htm"}
+from .corpus_index import TEXT_EXTS, CorpusIndex, read_text_file, scan_files
+from .http_cache import HttpCache, fetch_page
 
 logger = logging.getLogger(__name__)
 
-def load_text_from_files(folder: str | Path) -> List[Dict]:
-    """Recursively load text files and return list of {path, content}."""
+def load_text_from_files(folder: str | Path, index: str | Path | None = None, workers: Optional[int] = None) -> List[Dict]:
+    """Recursively load text files and return list of {path, content} (sorted by path).
+
+    With ``index`` (an sqlite file, see CorpusIndex) extracted text persists
+    between runs and only new or changed files are read and parsed again.
+    """
     folder = Path(folder)
-    results: List[Dict] = []
     if not folder.exists():
         logger.warning("Text folder %s does not exist", folder)
-        return results
-    for p in folder.rglob('*'):
-        if p.is_file() and p.suffix.lower() in TEXT_EXTS:
-            try:
-                text = p.read_text(encoding='utf-8', errors='ignore')
-                if p.suffix.lower() in {'.html', '.htm'}:
-                    soup = BeautifulSoup(text, 'html.parser')
-                    text = soup.get_text(separator=' ', strip=True)
-                results.append({"path": str(p), "content": text})
-            except Exception as e:
-                logger.error("Failed reading %s: %s", p, e)
-    return results
+        return []
+    corpus = CorpusIndex(index or ':memory:')
+    try:
+        return corpus.sync(folder, workers=workers)
+    finally:
+        corpus.close()
+
+def iter_text_from_files(folder: str | Path, index: str | Path | None = None, workers: Optional[int] = None) -> Iterator[Dict]:
+    """Like load_text_from_files, but yields one record at a time so large corpora never sit in memory.
 
-def fetch_url(url: str, timeout: int = 15) -> str | None:
+    With ``index`` records are streamed from the synced index; without, each
+    file is read only when the consumer asks for it.
+    """
+    folder = Path(folder)
+    if not folder.exists():
+        logger.warning("Text folder %s does not exist", folder)
+        return
+    if index is None:
+        for path in sorted(p for p, _ in scan_files(folder)):
+            path, _, text, error = read_text_file(path)
+            if error is not None:
+                logger.error("Failed reading %s: %s", path, error)
+                continue
+            yield {'path': path, 'content': text}
+        return
+    corpus = CorpusIndex(index)
     try:
-        resp = requests.get(url, timeout=timeout, headers={'User-Agent': 'ReelCtxtBot/0.1'})
-        resp.raise_for_status()
-        ct = resp.headers.get('content-type', '')
-        if 'text/html' not in ct:
-            return None
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        # remove script/style
-        for tag in soup(['script', 'style', 'noscript']):
-            tag.decompose()
-        return soup.get_text(separator=' ', strip=True)
-    except Exception as e:
-        logger.warning("Fetch failed %s: %s", url, e)
-        return None
+        corpus.update(folder, workers=workers)
+        yield from corpus.records(folder)
+    finally:
+        corpus.close()
+
+def fetch_url(url: str, timeout: int = 15, cache: Optional[HttpCache] = None) -> str | None:
+    page = fetch_page(url, timeout=timeout, cache=cache, headers={'User-Agent': 'ReelCtxtBot/0.1'})
+    return page.text if page else None
@@ -0,0 +1,53 @@
+from __future__ import annotations
+import json
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import logging
+from ..util.cache import DiskCache, stable_hash
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_VERSION = 1
+
+
+class LLMCache:
+    """Persistent chat-completion cache keyed by endpoint, model, messages, temperature and parameters.
+
+    Entries are small JSON files in a DiskCache, so several processes can share
+    the directory (atomic publish, LRU eviction by ``max_bytes``). Entries older
+    than ``ttl`` seconds count as misses and are overwritten by the next answer.
+    """
+
+    def __init__(self, root: str | Path, ttl: Optional[float] = None, max_bytes: Optional[int] = None):
+        self.store = DiskCache(root, max_bytes=max_bytes)
+        self.ttl = ttl
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def key(self, endpoint: Optional[str], model: str, messages: List[dict], temperature: float, **params: Any) -> str:
+        return stable_hash(['llm', LLM_CACHE_VERSION, endpoint, model, messages, temperature, params])
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        p = self.store.get(key, '.json')
+        entry = None
+        if p is not None:
+            try:
+                entry = json.loads(p.read_text(encoding='utf-8'))
+            except (OSError, ValueError):  # evicted or torn by another process
+                entry = None
+        if entry is not None and self.ttl is not None and time.time() - entry['created'] > self.ttl:
+            self.count('expired')
+            return None
+        self.count('hit' if entry is not None else 'miss')
+        return entry
+
+    def put(self, key: str, content: str, usage: Optional[Dict[str, int]] = None) -> None:
+        entry = {'created': time.time(), 'content': content, 'usage': usage}
+        self.store.put_bytes(key, json.dumps(entry).encode('utf-8'), '.json')
+
+    def count(self, what: str) -> None:
+        with self._lock:
+            self.stats[what] += 1
@@ -1,20 +1,104 @@
 from __future__ import annotations
+import copy
+import json
 import os
-from typing import List
+import threading
+import time
+from typing import Iterator, List, Optional
 from openai import OpenAI
+from ..util.trace import span
+from .cache import LLMCache
+from .stream import iter_json_array
 
 DEFAULT_MODEL = os.getenv("REELCTXT_LLM_MODEL", "gpt-4o-mini")
 
 class LLMClient:
-    def __init__(self, api_key: str | None = None, base_url: str | None = None, model: str | None = None):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        base_url: str | None = None,
+        model: str | None = None,
+        max_concurrency: int = 4,
+        max_retries: int = 2,
+        timeout: float = 120.0,
+        cache: Optional[LLMCache] = None,
+    ):
         api_key = api_key or os.getenv("OPENAI_API_KEY")
         base_url = base_url or os.getenv("REELCTXT_LLM_ENDPOINT")
         self.model = model or DEFAULT_MODEL
-        self.client = OpenAI(api_key=api_key, base_url=base_url) if api_key else None
+        self.base_url = base_url
+        self.cache = cache
+        # The SDK retries connection errors, 429 and 5xx with exponential backoff
+        self.client = OpenAI(api_key=api_key, base_url=base_url, max_retries=max_retries, timeout=timeout) if api_key else None
+        # Bounds in-flight requests across all threads/jobs sharing this client
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
 
     def available(self) -> bool:
         return self.client is not None
 
+    def with_cache(self, cache: Optional[LLMCache]) -> 'LLMClient':
+        """This client (same connection pool and concurrency slots) answering through ``cache``."""
+        clone = copy.copy(self)
+        clone.cache = cache
+        return clone
+
+    def _chat(self, messages: List[dict], temperature: float, **params) -> str:
+        """One chat completion; records latency and token usage in the active trace.
+
+        With a cache, identical requests (endpoint, model, messages, temperature,
+        params) are answered from disk without calling the API.
+        """
+        key = self.cache.key(self.base_url, self.model, messages, temperature, **params) if self.cache else None
+        if key is not None:
+            entry = self.cache.get(key)
+            if entry is not None:
+                with span('llm.chat', model=self.model, cached=True):
+                    return entry['content']
+        with self._slots, span('llm.chat', model=self.model) as sp:
+            resp = self.client.chat.completions.create(
+                model=self.model, messages=messages, temperature=temperature, **params
+            )
+            usage = getattr(resp, 'usage', None)
+            if usage is not None:
+                sp.set(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+            content = resp.choices[0].message.content
+        if key is not None and content is not None:
+            tokens = None
+            if usage is not None:
+                tokens = {'prompt_tokens': usage.prompt_tokens, 'completion_tokens': usage.completion_tokens}
+            self.cache.put(key, content, tokens)
+        return content
+
+    def _chat_stream(self, messages: List[dict], temperature: float, **params) -> Iterator[str]:
+        """Streamed chat completion as text deltas, cached like _chat (a hit yields the whole answer at once).
+
+        The trace span covers opening the stream (time to first byte); the
+        total stream time is added to it when the stream ends.
+        """
+        key = self.cache.key(self.base_url, self.model, messages, temperature, **params) if self.cache else None
+        if key is not None:
+            entry = self.cache.get(key)
+            if entry is not None:
+                with span('llm.chat', model=self.model, cached=True):
+                    content = entry['content']
+                yield content
+                return
+        parts: List[str] = []
+        with self._slots:
+            t0 = time.perf_counter()
+            with span('llm.chat', model=self.model, stream=True) as sp:
+                stream = self.client.chat.completions.create(
+                    model=self.model, messages=messages, temperature=temperature, stream=True, **params
+                )
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+            sp.set(stream_seconds=round(time.perf_counter() - t0, 3), chars=sum(map(len, parts)))
+        if key is not None and parts:
+            self.cache.put(key, ''.join(parts))
+
     def summarize(self, prompt: str, texts: List[str], max_words: int = 180) -> str:
         joined = "\n".join(t[:4000] for t in texts)[:12000]
         sys_msg = (
@@ -24,45 +108,92 @@ class LLMClient:
         if not self.client:
             # fallback naive
             return " ".join(joined.split()[:max_words])
-        resp = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
+        return self._chat(
+            [
                 {"role": "system", "content": sys_msg},
                 {"role": "user", "content": f"PROMPT: {prompt}\nCONTEXT:\n{joined}"}
             ],
             temperature=0.4,
+        ).strip()
+
+    def summarize_chunks(self, prompt: str, chunks: List[str], max_words: int = 120) -> str:
+        """Map step: key points of one batch of ranked context chunks."""
+        sys_msg = (
+            "Extract the facts and arguments from the context that matter for the prompt, as terse bullet points. "
+            f"Ignore irrelevant text. Max {max_words} words."
+        )
+        context = "\n---\n".join(chunks)
+        return self._chat(
+            [
+                {"role": "system", "content": sys_msg},
+                {"role": "user", "content": f"PROMPT: {prompt}\nCONTEXT:\n{context}"}
+            ],
+            temperature=0.2,
+        ).strip()
+
+    def merge_summaries(self, prompt: str, partials: List[str], max_words: int = 180) -> str:
+        """Reduce step: one summary from the notes of every map call."""
+        sys_msg = (
+            "Merge these notes into one compact expert summary focused on key actionable points; drop duplicates. "
+            f"Max {max_words} words."
         )
-        return resp.choices[0].message.content.strip()
+        notes = "\n\n".join(f"NOTES {i + 1}:\n{p}" for i, p in enumerate(partials))
+        return self._chat(
+            [
+                {"role": "system", "content": sys_msg},
+                {"role": "user", "content": f"PROMPT: {prompt}\n{notes}"}
+            ],
+            temperature=0.4,
+        ).strip()
 
     def storyboard(self, prompt: str, summary: str, segments: int = 6) -> List[dict]:
         if not self.client:
-            # simple deterministic split
-            words = summary.split()
-            chunk = max(1, len(words)//segments)
-            sb = []
-            for i in range(segments):
-                part = words[i*chunk:(i+1)*chunk]
-                if not part:
-                    break
-                sb.append({
-                    'idx': i,
-                    'narration': ' '.join(part),
-                    'title': f'Segment {i+1}',
-                    'hint': ''
-                })
-            return sb
-        sys_msg = "Create a JSON array; each element: {idx, title, narration, hint}. Narration <= 18 words, energetic, vertical reel tone."
-        user_content = f"PROMPT: {prompt}\nSUMMARY: {summary}\nSEGMENTS: {segments}"
-        resp = self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "system", "content": sys_msg}, {"role": "user", "content": user_content}],
-            temperature=0.6,
-        )
-        import json
-        txt = resp.choices[0].message.content
+            return self._split_storyboard(summary, segments)
+        txt = self._chat(self._storyboard_messages(prompt, summary, segments), temperature=0.6)
         try:
             data = json.loads(txt)
             assert isinstance(data, list)
             return data
         except Exception:
-            return [{'idx': i, 'title': f'Segment {i+1}', 'narration': line, 'hint': ''} for i, line in enumerate(summary.split('.')[:segments])]
+            return self._fallback_storyboard(summary, segments)
+
+    def storyboard_stream(self, prompt: str, summary: str, segments: int = 6) -> Iterator[dict]:
+        """Like storyboard(), but yields each segment as soon as its JSON object has streamed in."""
+        if not self.client:
+            yield from self._split_storyboard(summary, segments)
+            return
+        n = 0
+        for item in iter_json_array(self._chat_stream(self._storyboard_messages(prompt, summary, segments), temperature=0.6)):
+            if isinstance(item, dict):
+                n += 1
+                yield item
+        if not n:
+            yield from self._fallback_storyboard(summary, segments)
+
+    @staticmethod
+    def _storyboard_messages(prompt: str, summary: str, segments: int) -> List[dict]:
+        sys_msg = "Create a JSON array; each element: {idx, title, narration, hint}. Narration <= 18 words, energetic, vertical reel tone."
+        user_content = f"PROMPT: {prompt}\nSUMMARY: {summary}\nSEGMENTS: {segments}"
+        return [{"role": "system", "content": sys_msg}, {"role": "user", "content": user_content}]
+
+    @staticmethod
+    def _split_storyboard(summary: str, segments: int) -> List[dict]:
+        # simple deterministic split
+        words = summary.split()
+        chunk = max(1, len(words)//segments)
+        sb = []
+        for i in range(segments):
+            part = words[i*chunk:(i+1)*chunk]
+            if not part:
+                break
+            sb.append({
+                'idx': i,
+                'narration': ' '.join(part),
+                'title': f'Segment {i+1}',
+                'hint': ''
+            })
+        return sb
+
+    @staticmethod
+    def _fallback_storyboard(summary: str, segments: int) -> List[dict]:
+        return [{'idx': i, 'title': f'Segment {i+1}', 'narration': line, 'hint': ''} for i, line in enumerate(summary.split('.')[:segments])]
@@ -0,0 +1,46 @@
+from __future__ import annotations
+import json
+from typing import Any, Iterable, Iterator
+
+_decoder = json.JSONDecoder()
+_SKIP = ' \t\r\n,'
+
+
+def iter_json_array(deltas: Iterable[str]) -> Iterator[Any]:
+    """Yield the elements of a JSON array as soon as each one is complete in a stream of text deltas.
+
+    Text before the opening ``[`` (e.g. a markdown fence) is ignored. Parsing
+    stops at the closing ``]`` or at the first element that never completes;
+    the rest of ``deltas`` is still consumed so the producer runs to its end.
+    """
+    buf = ''
+    pos = -1  # index of the next element, once '[' has been seen
+    done = False
+    for delta in deltas:
+        if done:
+            continue
+        buf += delta
+        if pos < 0:
+            start = buf.find('[')
+            if start < 0:
+                continue
+            pos = start + 1
+        while True:
+            while pos < len(buf) and buf[pos] in _SKIP:
+                pos += 1
+            if pos >= len(buf) or buf[pos] == ']':
+                break
+            try:
+                value, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # element not complete yet
+            if end == len(buf) and not isinstance(value, (dict, list, str)):
+                break  # a bare number/literal may still be growing
+            yield value
+            pos = end
+        if 0 <= pos < len(buf) and buf[pos] == ']':
+            done = True
+            continue
+        # Keep only the unparsed tail so long streams are not re-scanned
+        if pos > 0:
+            buf, pos = buf[pos:], 0
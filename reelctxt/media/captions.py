@@ -0,0 +1,193 @@
+from __future__ import annotations
+import io
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+from ..planning.segment import Segment
+from ..util.cache import DiskCache, file_hash, stable_hash
+from .filters import CaptionStyle, caption_text
+
+# Pillow caption renderer: wrapped, boxed captions rasterized once per (text, font, style,
+# size) and composited with ffmpeg's overlay filter, plus one small patch per word that is
+# enabled only while that word is spoken (word timings from seg.meta['words']).
+
+logger = logging.getLogger(__name__)
+
+CAPTION_VERSION = 1
+MAX_LINES = 3
+_FALLBACK_FONT = 'DejaVuSans.ttf'
+
+
+@dataclass
+class WordPatch:
+    image: str
+    x: int
+    y: int
+    start: float
+    end: float
+
+
+@dataclass
+class CaptionOverlay:
+    image: str
+    x: int
+    y: int
+    words: List[WordPatch] = field(default_factory=list)
+
+
+def rgba(color: str) -> Tuple[int, int, int, int]:
+    """ffmpeg color syntax ('black@0.5', '0x2d1f44', 'white') as an RGBA tuple."""
+    name, _, alpha = color.partition('@')
+    if name.lower().startswith('0x'):
+        name = '#' + name[2:]
+    r, g, b = ImageColor.getrgb(name)[:3]
+    return r, g, b, round(255 * float(alpha)) if alpha else 255
+
+
+@lru_cache(maxsize=16)
+def load_font(path: Optional[str], size: int) -> ImageFont.FreeTypeFont:
+    for candidate in (path, _FALLBACK_FONT):
+        if not candidate:
+            continue
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            if candidate == path:
+                logger.warning("Cannot load caption font %s; using the default font", path)
+    return ImageFont.load_default(size)
+
+
+def wrap_words(words: List[str], font: ImageFont.FreeTypeFont, max_width: int, max_lines: int = MAX_LINES) -> List[List[int]]:
+    """Greedy wrap: indices of the words on each line; words past ``max_lines`` are dropped."""
+    space = font.getlength(' ')
+    lines: List[List[int]] = []
+    width = 0.0
+    for i, word in enumerate(words):
+        w = font.getlength(word)
+        if lines and width + space + w <= max_width:
+            lines[-1].append(i)
+            width += space + w
+            continue
+        if len(lines) == max_lines:
+            break
+        lines.append([i])
+        width = w
+    return lines
+
+
+def _layout(words: List[str], style: CaptionStyle, width: int, height: int):
+    scale = height / 1920
+    font = load_font(style.font, round(52 * scale))
+    pad = round(20 * scale) if style.box else 0
+    lines = wrap_words(words, font, width - 2 * round(80 * scale))
+    ascent, descent = font.getmetrics()
+    line_h = round((ascent + descent) * 1.15)
+    space = font.getlength(' ')
+    line_widths = [sum(font.getlength(words[i]) for i in line) + space * (len(line) - 1) for line in lines]
+    box_w = round(max(line_widths)) + 2 * pad
+    box_h = line_h * len(lines) + 2 * pad
+    boxes = []  # (word index, x, y) inside the caption image
+    for row, (line, lw) in enumerate(zip(lines, line_widths)):
+        x = pad + (box_w - 2 * pad - lw) / 2
+        for i in line:
+            boxes.append((i, round(x), pad + row * line_h))
+            x += font.getlength(words[i]) + space
+    origin = ((width - box_w) // 2, height - box_h - round(60 * scale))
+    return font, (box_w, box_h), boxes, origin
+
+
+def render_caption(words: List[str], style: CaptionStyle, width: int, height: int):
+    """Rasterize the caption block; returns (image, word boxes [(index, x, y)], top-left position in the frame)."""
+    font, size, boxes, origin = _layout(words, style, width, height)
+    im = Image.new('RGBA', size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(im)
+    if style.box:
+        draw.rectangle([(0, 0), size], fill=rgba(style.box_color))
+    for i, x, y in boxes:
+        draw.text((x, y), words[i], font=font, fill=rgba(style.color))
+    return im, boxes, origin
+
+
+def render_word(word: str, style: CaptionStyle, height: int) -> Image.Image:
+    font = load_font(style.font, round(52 * height / 1920))
+    ascent, descent = font.getmetrics()
+    im = Image.new('RGBA', (max(1, round(font.getlength(word))), ascent + descent), (0, 0, 0, 0))
+    ImageDraw.Draw(im).text((0, 0), word, font=font, fill=rgba(style.highlight_color))
+    return im
+
+
+def caption_key(words: List[str], style: CaptionStyle, width: int, height: int) -> str:
+    font = file_hash(style.font) if style.font and Path(style.font).is_file() else style.font
+    look = {k: v for k, v in asdict(style).items() if k not in ('mode', 'max_chars', 'renderer', 'highlight', 'highlight_color', 'font')}
+    return stable_hash([CAPTION_VERSION, words, font, look, width, height])
+
+
+def _png(im: Image.Image) -> bytes:
+    buf = io.BytesIO()
+    im.save(buf, 'PNG', optimize=False)
+    return buf.getvalue()
+
+
+def word_windows(seg: Segment, count: int) -> List[Tuple[float, float]]:
+    """(start, end) of the first ``count`` spoken words; each word stays lit until the next one starts."""
+    timings = (seg.meta or {}).get('words') or []
+    spans = [(float(t['start']), float(t['end'])) for t in timings[:count]]
+    return [(s, spans[j + 1][0] if j + 1 < len(spans) else max(e, s)) for j, (s, e) in enumerate(spans)]
+
+
+def highlights_words(seg: Segment, style: CaptionStyle) -> bool:
+    """Word highlights follow the narration, so they only apply when the caption shows it."""
+    return style.highlight and (style.mode == 'narration' or not seg.title)
+
+
+def prepare_caption(seg: Segment, style: CaptionStyle, width: int, height: int, cache: DiskCache) -> Optional[CaptionOverlay]:
+    """Cached caption image (and word highlight patches) for ``seg``; None when there is no text."""
+    words = caption_text(seg, style).split()
+    if not words:
+        return None
+    key = caption_key(words, style, width, height)
+    manifest, base = cache.get(key, '.json'), cache.get(key, '.png')
+    meta = None
+    if manifest is not None and base is not None:
+        try:
+            meta = json.loads(manifest.read_text())
+        except (OSError, ValueError):
+            pass
+    if meta is None:
+        im, boxes, origin = render_caption(words, style, width, height)
+        base = cache.put_bytes(key, _png(im), '.png')
+        meta = {'x': origin[0], 'y': origin[1], 'boxes': boxes}
+        cache.put_bytes(key, json.dumps(meta).encode(), '.json')
+    overlay = CaptionOverlay(str(base), meta['x'], meta['y'])
+    if highlights_words(seg, style):
+        windows = word_windows(seg, len(words))
+        for i, x, y in meta['boxes']:
+            if i >= len(windows):
+                continue
+            wkey = stable_hash([key, 'word', i, style.highlight_color])
+            patch = cache.get(wkey, '.png')
+            if patch is None:
+                patch = cache.put_bytes(wkey, _png(render_word(words[i], style, height)), '.png')
+            start, end = windows[i]
+            overlay.words.append(WordPatch(str(patch), overlay.x + x, overlay.y + y, start, end))
+    return overlay
+
+
+def overlay_filters(overlay: CaptionOverlay, first_input: int, src: str, out: str) -> Tuple[List[str], List[str]]:
+    """(input args, filters) compositing ``overlay`` onto ``src``; its images become inputs ``first_input``...
+
+    Still-image inputs repeat their only frame, so each overlay costs one alpha blend of
+    its own (small) area per frame instead of re-rendering glyphs as drawtext does.
+    """
+    inputs = ['-i', overlay.image]
+    fc = [f'{src}[{first_input}:v]overlay=x={overlay.x}:y={overlay.y}' + ('[cap0]' if overlay.words else out)]
+    for j, w in enumerate(overlay.words):
+        inputs += ['-i', w.image]
+        label = out if j == len(overlay.words) - 1 else f'[cap{j + 1}]'
+        fc.append(f"[cap{j}][{first_input + 1 + j}:v]overlay=x={w.x}:y={w.y}"
+                  f":enable='between(t,{w.start:.3f},{w.end:.3f})'{label}")
+    return inputs, fc
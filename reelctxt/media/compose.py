@@ -1,16 +1,37 @@
 from __future__ import annotations
+import dataclasses
 import json
+from concurrent.futures import FIRST_EXCEPTION, Future, wait
 from pathlib import Path
 import shutil
-from typing import List, Optional
+import wave
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
 from ..planning.segment import Segment
-import subprocess
-import shlex
+from ..util.cache import DiskCache, file_hash, stable_hash
+from ..util.pipeline import Stage
+from ..util.trace import span
+from .workers import EncodeAbort, EncodeJob, EncodePool, run_ffmpeg
+from .tts_worker import wav_seconds
+from .master import master_audio, segment_frames
+from .captions import highlights_words, overlay_filters, prepare_caption
+from .renditions import Rendition, plan_renditions, render_renditions, split_filters, write_manifest
+from .plates import prepare_plate, prepare_plates
+from .kenburns import ken_burns_feeder, rawvideo_input_args
+from .profiles import RenderProfile, get_profile
+from .filters import (
+    CaptionStyle, VOICE_LOUDNORM, music_mix_filters, segment_music_filters,
+    segment_video_chain, video_input_args,
+)
 import math
 
 VIDEO_WIDTH = 1080
 VIDEO_HEIGHT = 1920
 SEG_DURATION = 3.5  # seconds baseline; could scale with narration length
+FPS = 30
+PART_CACHE_VERSION = 1
+
+logger = logging.getLogger(__name__)
 
 
 def estimate_segment_duration(narration: str) -> float:
@@ -28,9 +49,22 @@ def build_timeline(segments: List[Segment]):
         t += d
 
 
+def part_cache_key(cmd: List[str], extra_files: Sequence[Optional[str]] = (), extra: Any = None) -> str:
+    """Cache key of a part encode: the ffmpeg command with input files replaced by their
+    content hashes and the output path dropped, plus the hashes of any referenced files
+    (e.g. the caption font) and ``extra`` settings not visible in the command (e.g. piped frames)."""
+    normalized = []
+    for prev, tok in zip([''] + cmd[:-2], cmd[:-1]):
+        if prev == '-i' and Path(tok).is_file():
+            tok = 'sha256:' + file_hash(tok)
+        normalized.append(tok)
+    files = [file_hash(f) for f in extra_files if f and Path(f).is_file()]
+    return stable_hash([PART_CACHE_VERSION, normalized, files, extra])
+
+
 def create_video(
     segments: List[Segment],
-    audio_paths: List[str],
+    audio_paths: Sequence[str | Future],
     output_path: str,
     music_path: Optional[str] = None,
     music_intro_path: Optional[str] = None,
@@ -44,6 +78,10 @@ def create_video(
     caption_box: bool = True,
     caption_box_color: str = "black@0.5",
     caption_font: Optional[str] = None,
+    caption_renderer: str = "drawtext",
+    caption_highlight: bool = False,
+    caption_highlight_color: str = "yellow",
+    caption_cache: Optional[DiskCache | str | Path] = None,
     ken_burns: bool = False,
     ken_burns_zoom: float = 1.08,
     continuous_music: bool = True,
@@ -52,226 +90,354 @@ def create_video(
     normalize_voice: bool = True,
     keep_temp: bool = False,
     pre_cleanup: bool = False,
+    workers: int = 1,
+    threads: Optional[int] = None,
+    pool: Optional[EncodePool] = None,
+    engine: str = "parts",
+    audio_mode: str = "parts",
+    segment_cache: Optional[DiskCache | str | Path] = None,
+    plate_cache: Optional[DiskCache | str | Path] = None,
+    loudnorm_cache: Optional[DiskCache | str | Path] = None,
+    ken_burns_engine: str = "zoompan",
+    ken_burns_path: str = "center",
+    ken_burns_focus: Tuple[float, float] = (0.5, 0.5),
+    tmp_dir: str | Path = ".reel_tmp",
+    profile: str | RenderProfile = "final",
+    renditions: Sequence[str | Rendition] = (),
 ):
     """Create final video.
 
     Parameters:
       segments: list of segment dicts (must have 'image','duration')
-      audio_paths: narration wav paths aligned to segments
+      audio_paths: narration wav paths aligned to segments, or Futures of them (e.g. from a TTS
+        Stage); each part is then encoded as soon as its own narration is ready
       output_path: final mp4 path
       music_path: optional background music file
       music_volume: linear volume factor applied to music before mix/duck
       duck: if True and music present, apply sidechain compression to dynamically duck music under narration
+      caption_renderer: 'drawtext' (ffmpeg renders the text on every frame) or 'overlay' (wrapped
+        captions rasterized once with Pillow, cached and composited with overlay; parts engine only)
+      caption_highlight: overlay renderer only; light up each narration word while it is spoken,
+        using the TTS word timings in seg.meta['words']
+      caption_cache: cache (DiskCache or directory) of rendered caption images (default: under tmp_dir)
+      workers: number of segment parts encoded concurrently
+      threads: global ffmpeg thread budget shared by the workers (default: CPU count when workers > 1)
+      pool: optional shared EncodePool (overrides workers/threads), e.g. for batch rendering
+      engine: 'parts' encodes one file per segment then concatenates; 'graph' renders the whole
+        storyboard in a single ffmpeg filter_complex invocation straight to output_path
+      audio_mode: 'parts' encodes narration into every part and mixes music over the concatenation;
+        'master' encodes video-only parts (frame-exact lengths, no narration wait) and masters
+        narration, music and two-pass loudnorm once over a sample-accurate timeline built from
+        Segment.start before a single mux (parts engine only)
+      segment_cache: persistent cache (DiskCache or directory) of rendered parts keyed by their
+        inputs' content and encode settings; unchanged segments are reused instead of re-encoded
+        (parts engine only)
+      plate_cache: cache (DiskCache or directory) of images pre-scaled/cover-cropped to the output
+        size; when set, ffmpeg reads these plates instead of decoding and rescaling the source
+        image for every frame
+      loudnorm_cache: cache (DiskCache or directory) of first-pass loudnorm measurements for
+        audio_mode='master', keyed by the narration content and its placement
+      ken_burns_engine: 'zoompan' (ffmpeg filter) or 'numpy' (sub-pixel crops computed in-process
+        from a plate and piped to the encoder as raw frames; parts engine only)
+      ken_burns_path: pan path for the numpy engine: center, focus, left, right, up or down
+      ken_burns_focus: (x, y) fractions of the image the 'focus' path drifts toward
+      tmp_dir: directory for intermediate parts (use one per concurrent render)
+      profile: 'final', 'draft' (reduced size/fps, fast preset, cheap audio, no loudnorm) or a
+        RenderProfile; every profile shares the same timeline and filter logic
+      renditions: extra outputs (Rendition objects, preset names such as 'square' or specs like
+        'story=720x1280:crop:1500k') written next to output_path as <stem>.<name>.mp4 and listed in
+        <stem>.renditions.json; each is split off the final frames of every part (or of the graph)
+        and encoded from them directly, never from the encoded reel
     """
-    tmp_dir = Path(".reel_tmp")
+    style = CaptionStyle(
+        caption_mode, caption_max_chars, caption_color, caption_box, caption_box_color, caption_font,
+        caption_renderer, caption_highlight, caption_highlight_color,
+    )
+    if style.renderer not in ('drawtext', 'overlay'):
+        raise ValueError(f"Unknown caption renderer: {style.renderer}")
+    profile = get_profile(profile)
+    width, height, fps = profile.width, profile.height, profile.fps
+    renditions = plan_renditions(renditions, width, height, captions)
+    normalize_voice = normalize_voice and profile.loudnorm
+    render_segments = segments
+    prescaled = plate_cache is not None
+    if prescaled:
+        if isinstance(plate_cache, (str, Path)):
+            plate_cache = DiskCache(plate_cache)
+        with span('plates', images=len({s.image for s in segments if s.image})):
+            plates = prepare_plates((s.image for s in segments if s.image), width, height, plate_cache)
+        # Render from plates; the sidecar keeps the original image paths
+        render_segments = [s.model_copy(update={'image': plates[s.image]}) if s.image else s for s in segments]
+
+    if engine == 'graph':
+        from .graph import render_graph
+        audio_paths = [a.result() if isinstance(a, Future) else a for a in audio_paths]  # one encode needs every line
+        if ken_burns and ken_burns_engine != 'zoompan':
+            logger.warning("Ken Burns engine %r is not supported by the graph engine; using zoompan", ken_burns_engine)
+        if captions and style.renderer != 'drawtext':
+            logger.warning("Caption renderer %r is not supported by the graph engine; using drawtext", style.renderer)
+            style = dataclasses.replace(style, renderer='drawtext')
+        render_graph(
+            render_segments, audio_paths, output_path,
+            music_path=music_path,
+            music_intro_path=music_intro_path,
+            music_outro_path=music_outro_path,
+            music_volume=music_volume,
+            duck=duck,
+            captions=captions,
+            style=style,
+            ken_burns=ken_burns,
+            ken_burns_zoom=ken_burns_zoom,
+            continuous_music=continuous_music,
+            fade_in=fade_in,
+            fade_out=fade_out,
+            normalize_voice=normalize_voice,
+            prescaled=prescaled,
+            profile=profile,
+            renditions=renditions,
+            pool=pool or EncodePool(1, threads),
+        )
+        _write_sidecar(segments, output_path, profile, renditions)
+        return output_path
+    if engine != 'parts':
+        raise ValueError(f"Unknown render engine: {engine}")
+    if audio_mode not in ('parts', 'master'):
+        raise ValueError(f"Unknown audio mode: {audio_mode}")
+    master = audio_mode == 'master'
+    if master and music_path and not continuous_music:
+        logger.warning("Per-segment music is not supported with audio_mode='master'; using a continuous bed")
+    if isinstance(loudnorm_cache, (str, Path)):
+        loudnorm_cache = DiskCache(loudnorm_cache)
+    frames = segment_frames(render_segments, fps)
+    per_segment_music = bool(music_path) and not continuous_music and not master
+
+    tmp_dir = Path(tmp_dir)
     if pre_cleanup and tmp_dir.exists():
         shutil.rmtree(tmp_dir, ignore_errors=True)
-    tmp_dir.mkdir(exist_ok=True)
-    part_files: List[str] = []
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    pool = pool or EncodePool(workers, threads)
+    if isinstance(segment_cache, (str, Path)):
+        segment_cache = DiskCache(segment_cache)
+    overlay_captions = captions and style.renderer == 'overlay'
+    if overlay_captions and not isinstance(caption_cache, DiskCache):
+        caption_cache = DiskCache(caption_cache or tmp_dir / 'captions')
+
+    if ken_burns and ken_burns_engine not in ('zoompan', 'numpy'):
+        raise ValueError(f"Unknown Ken Burns engine: {ken_burns_engine}")
+    # The numpy engine crops from a plate larger than the output so zoomed frames are not upsampled
+    kb_plate_size = (math.ceil(width * ken_burns_zoom), math.ceil(height * ken_burns_zoom))
 
-    def escape_drawtext(text: str) -> str:
-        # Escape characters for ffmpeg drawtext
-        return text.replace('\\', '\\\\').replace(':', '\\:').replace("'", "\\'")
+    def _audio(i: int) -> str:
+        a = audio_paths[i]
+        return a.result() if isinstance(a, Future) else a
 
-    for i, seg in enumerate(segments):
-        img = seg.image
+    def _part_job(i: int) -> Tuple[Optional[EncodeJob], Optional[str]]:
+        """(encode job, cache key) of part ``i``; no job when the part was restored from the cache."""
+        seg = render_segments[i]
         dur = seg.duration
-        base_chain = []
-        if img:
-            base_chain.append(f"scale={VIDEO_WIDTH}:{VIDEO_HEIGHT}:force_original_aspect_ratio=cover")
-            if ken_burns:
-                frames = int(dur * 30)
-                # gradual zoom up to specified zoom factor; ensure <= zoom
-                kb = f"zoompan=z='min(1+0.0005*in,{ken_burns_zoom})':d={frames}:fps=30"
-                base_chain.append(kb)
+        if master:
+            # Sources run half a frame long so -frames:v always has frames[i] to cut
+            dur = frames[i] / fps
+            seg = seg.model_copy(update={'duration': (frames[i] + 0.5) / fps})
+        part = Path(part_files[i])
+        feed = None
+        cache_files = [caption_font if captions else None]
+        cache_extra = None
+        if ken_burns and ken_burns_engine == 'numpy' and seg.image:
+            # Frames arrive already panned/zoomed at output size; ffmpeg only adds captions
+            vf_chain = segment_video_chain(seg, width, height, captions, style, fps=fps, prescaled=True)
+            video_in = rawvideo_input_args(width, height, fps)
+            kb_src = segments[i].image
+            if plate_cache is not None:
+                kb_src = prepare_plate(kb_src, *kb_plate_size, plate_cache)
+            kb_opts = dict(fps=fps, zoom=ken_burns_zoom, path=ken_burns_path, focus=tuple(ken_burns_focus))
+            feed = ken_burns_feeder(kb_src, dur, width, height, plate_size=kb_plate_size, **kb_opts)
+            cache_files.append(kb_src)
+            cache_extra = ['kenburns-numpy', dur, list(kb_plate_size), kb_opts]
         else:
-            # Generate color background; use alternating palette for variety
-            colors = ["0x222222", "0x2d1f44", "0x123a2a", "0x443311"]
-            color = colors[i % len(colors)]
-            # Use color source as input 0 instead of image file
-            # We'll build a separate ffmpeg invocation (no -loop -i) using -f lavfi
-        caption_filter = ""
-        if captions:
-            text_src = seg.title if caption_mode == 'title' else seg.narration
-            if not text_src:
-                text_src = seg.narration
-            txt = text_src.strip().replace('\n', ' ')
-            if len(txt) > caption_max_chars:
-                txt = txt[:caption_max_chars-1] + '…'
-            txt = escape_drawtext(txt)
-            draw = [
-                "drawtext=text='%s'" % txt,
-                f":x=(w-text_w)/2:y=h-(text_h*2)-60",
-                f":fontsize=52:fontcolor={caption_color}",
-            ]
-            if caption_font:
-                draw.append(f":fontfile={escape_drawtext(caption_font)}")
-            if caption_box:
-                draw.append(f":box=1:boxcolor={caption_box_color}:boxborderw=20")
-            caption_filter = ''.join(draw)
-        if img:
-            vf_chain = base_chain
-            if caption_filter:
-                vf_chain.append(caption_filter)
-            vf = ','.join(vf_chain + ['format=yuv420p'])
+            vf_chain = segment_video_chain(seg, width, height, captions, style, ken_burns, ken_burns_zoom, fps, prescaled)
+            video_in = video_input_args(seg, i, width, height, fps)
+        caption = None
+        if overlay_captions:
+            if highlights_words(seg, style):
+                # Word timings land in meta when the narration is synthesized (pipelined TTS), in master mode too
+                _audio(i)
+                seg = seg.model_copy(update={'meta': segments[i].meta})
+            caption = prepare_caption(seg, style, width, height, caption_cache)
+        cap_inputs: List[str] = []
+        if caption is None:
+            fc = ['[0:v]' + ','.join(vf_chain + ['format=yuv420p']) + '[vout]']
         else:
-            # Build filtergraph for color + captions
-            color_filter = f"color=c={color}:size={VIDEO_WIDTH}x{VIDEO_HEIGHT}:d={dur:.2f}"
-            if caption_filter:
-                vf = f"{color_filter},{caption_filter},format=yuv420p"
-            else:
-                vf = f"{color_filter},format=yuv420p"
-        part = tmp_dir / f"part_{i}.mp4"
-
-        if music_path and not continuous_music:
-            # Inputs: 0:v image, 1:a narration, 2:a music
-            if duck:
-                # Sidechain compress music using narration, then mix with narration
-                fc = (
-                    f"[2:a]aloop=loop=-1:size=2e9,volume={music_volume},atrim=0:{dur:.3f},asetpts=PTS-STARTPTS[music];"
-                    f"[1:a]asetpts=PTS-STARTPTS[voice];"
-                    f"[music][voice]sidechaincompress=threshold=0.1:ratio=8:attack=5:release=250:makeup=4[ducked];"
-                    f"[ducked][voice]amix=inputs=2:dropout_transition=0:weights='1 1'[mixed]"
-                )
-                audio_map = '[mixed]'
-            else:
-                # Static attenuation + mix
-                fc = (
-                    f"[2:a]aloop=loop=-1:size=2e9,volume={music_volume},atrim=0:{dur:.3f},asetpts=PTS-STARTPTS[music];"
-                    f"[1:a]asetpts=PTS-STARTPTS[voice];"
-                    f"[music][voice]amix=inputs=2:dropout_transition=0:weights='1 1'[mixed]"
-                )
-                audio_map = '[mixed]'
-
-            if img:
-                cmd = [
-                    'ffmpeg', '-y', '-loop', '1', '-i', img, '-i', audio_paths[i], '-i', music_path,
-                    '-t', f"{dur:.2f}", '-filter_complex', fc,
-                    '-map', '0:v', '-map', audio_map,
-                    '-vf', vf,
-                    '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-c:a', 'aac', str(part)
-                ]
-            else:
-                # Color source replaces image input; supply narration + music only
-                cmd = [
-                    'ffmpeg', '-y', '-f', 'lavfi', '-i', f"color=c=black:size={VIDEO_WIDTH}x{VIDEO_HEIGHT}:d={dur:.2f}",
-                    '-i', audio_paths[i], '-i', music_path,
-                    '-t', f"{dur:.2f}", '-filter_complex', fc,
-                    '-map', '0:v', '-map', audio_map,
-                    '-vf', vf,
-                    '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-c:a', 'aac', str(part)
-                ]
+            # Caption images are the last inputs, after narration and music
+            cap_inputs, cap_fc = overlay_filters(caption, 1 if master else 2 + per_segment_music, '[vbg]', '[vcap]')
+            fc = ['[0:v]' + ','.join(vf_chain or ['null']) + '[vbg]', *cap_fc, '[vcap]format=yuv420p[vout]']
+
+        if master:
+            # Video only, cut to a whole number of frames so parts add up to the audio timeline
+            def output(v: str, codec: List[str]) -> List[str]:
+                return ['-map', v, '-frames:v', str(frames[i]), '-an', *codec]
+
+            head = ['ffmpeg', '-y', *video_in, *cap_inputs]
+            return _cached_job(i, head, fc, output, lambda v, r: output(v, r.video_args()), cache_files, cache_extra, feed)
+
+        # Inputs: 0:v image (or color source / raw frame pipe), 1:a narration, 2:a music (per-segment mode only)
+        cmd = ['ffmpeg', '-y', *video_in, '-i', _audio(i)]
+        if per_segment_music:
+            cmd += ['-i', music_path]
+            fc.append('[1:a]asetpts=PTS-STARTPTS[voice]')
+            fc += segment_music_filters('[2:a]', '[voice]', dur, music_volume, duck, 'aout')
         else:
-            if img:
-                cmd = [
-                    'ffmpeg', '-y', '-loop', '1', '-i', img,
-                    '-i', audio_paths[i],
-                    '-filter_complex', ('[1:a]loudnorm=I=-16:LRA=11:TP=-1.5[voice]' if normalize_voice else ''),
-                    '-c:v', 'libx264', '-t', f"{dur:.2f}", '-pix_fmt', 'yuv420p',
-                    '-vf', vf,
-                    '-map', '0:v',
-                    '-map', ('[voice]' if normalize_voice else '1:a'),
-                    '-c:a', 'aac', '-shortest', str(part)
-                ]
-            else:
-                cmd = [
-                    'ffmpeg', '-y', '-f', 'lavfi', '-i', f"color=c=black:size={VIDEO_WIDTH}x{VIDEO_HEIGHT}:d={dur:.2f}",
-                    '-i', audio_paths[i],
-                    '-filter_complex', ('[1:a]loudnorm=I=-16:LRA=11:TP=-1.5[voice]' if normalize_voice else ''),
-                    '-c:v', 'libx264', '-t', f"{dur:.2f}", '-pix_fmt', 'yuv420p',
-                    '-vf', vf,
-                    '-map', '0:v', '-map', ('[voice]' if normalize_voice else '1:a'),
-                    '-c:a', 'aac', '-shortest', str(part)
-                ]
-        subprocess.run(cmd, check=True)
-        part_files.append(str(part))
+            fc.append(f'[1:a]{VOICE_LOUDNORM}[aout]' if normalize_voice else '[1:a]anull[aout]')
+        cmd += [*cap_inputs, '-t', f"{dur:.2f}"]
+
+        def output(v: str, codec: List[str]) -> List[str]:
+            out = ['-map', v, '-map', '[aout]', *codec, *profile.audio_codec_args()]
+            return out if per_segment_music else out + ['-shortest']
+
+        def rendition_output(v: str, r: Rendition) -> List[str]:
+            # Video only (the renditions get the finished reel's audio), cut where -shortest cuts the part
+            seconds = dur if per_segment_music else _spoken_seconds(_audio(i), dur)
+            return ['-map', v, '-t', f"{seconds:.3f}", '-an', *r.video_args()]
+
+        return _cached_job(i, cmd, fc, output, rendition_output, cache_files, cache_extra, feed)
+
+    def _rendition_key(key: str, r: Rendition) -> str:
+        return stable_hash([key, r.video_filter(), r.video_args()])
+
+    def _cached_job(i: int, head: List[str], fc: List[str], output, rendition_output,
+                    cache_files, cache_extra, feed) -> Tuple[Optional[EncodeJob], Optional[str]]:
+        """Encode job of part ``i``: ``head`` inputs, ``fc`` ending in [vout], then the output args of
+        the part (``output``) and of each rendition part (``rendition_output``)."""
+        cmd = [*head, '-filter_complex', ';'.join(fc), *output('[vout]', profile.video_codec_args()), part_files[i]]
+        parts = [rendition_parts[r.name][i] for r in renditions]
+        key = None
+        if segment_cache is not None:
+            # Keyed on the reel's own part command, so asking for renditions does not invalidate it
+            key = part_cache_key(cmd, cache_files, cache_extra)
+            if segment_cache.fetch(key, part_files[i], '.mp4') and all(
+                    segment_cache.fetch(_rendition_key(key, r), p, '.mp4') for r, p in zip(renditions, parts)):
+                logger.info("Segment %d: reusing cached render", i)
+                return None, None
+        # A stale part may be a hard link to a cache entry (fetched by an earlier run that kept
+        # its temp dir); ffmpeg -y truncates in place, so unlink rather than write through it
+        for p in [part_files[i], *parts]:
+            Path(p).unlink(missing_ok=True)
+        if renditions:
+            # Split the finished frames to every rendition inside the same graph
+            fc = fc + split_filters('[vout]', '[vmain]', renditions)
+            cmd = [*head, '-filter_complex', ';'.join(fc), *output('[vmain]', profile.video_codec_args()), part_files[i]]
+            for j, (r, p) in enumerate(zip(renditions, parts)):
+                cmd += [*rendition_output(f'[rv{j}]', r), p]
+        return EncodeJob(cmd, feed, name=f'part {i}', outputs=[part_files[i], *parts]), key
+
+    def _store(i: int, key: str) -> None:
+        segment_cache.put_file(key, part_files[i], '.mp4')
+        for r in renditions:
+            segment_cache.put_file(_rendition_key(key, r), rendition_parts[r.name][i], '.mp4')
+
+    def _encode_when_ready(i: int) -> bool:
+        job, key = _part_job(i)  # blocks until the narration of segment i exists
+        if job is None or abort.is_set():
+            return False
+        pool.run([job], abort=abort)
+        if key is not None and not abort.is_set():
+            _store(i, key)
+        return True
+
+    part_files = [str(tmp_dir / f"part_{i}.mp4") for i in range(len(render_segments))]
+    rendition_parts = {r.name: [str(tmp_dir / f"part_{i}.{r.name}.mp4") for i in range(len(render_segments))]
+                       for r in renditions}
+    if not master and any(isinstance(a, Future) for a in audio_paths):
+        # Pipelined: each part is encoded as soon as its narration is synthesized, while later lines still are
+        with span('encode_parts', parts=len(part_files), pipelined=True) as sp:
+            abort = EncodeAbort()
+            with Stage('encode', _encode_when_ready, workers=pool.workers, maxsize=len(part_files)) as stage:
+                futures = [stage.submit(i) for i in range(len(part_files))]
+                done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+                failed = next((f for f in done if f.exception() is not None), None)
+                if failed is not None:
+                    # Stop the other parts now instead of letting them finish encoding
+                    abort.set()
+                    logger.error("Encode failed, stopped remaining parts: %s", failed.exception())
+                    raise failed.exception()
+                encoded = sum(f.result() for f in futures)
+            sp.set(cached=len(part_files) - encoded)
+    else:
+        part_cmds: List[EncodeJob] = []
+        part_keys: Dict[int, str] = {}
+        for i in range(len(render_segments)):
+            job, key = _part_job(i)
+            if job is not None:
+                part_cmds.append(job)
+                if key is not None:
+                    part_keys[i] = key
+        # Encode parts (possibly in parallel); part_files keeps segment order for concat
+        with span('encode_parts', parts=len(part_files), cached=len(part_files) - len(part_cmds)):
+            pool.run(part_cmds)
+        for i, key in part_keys.items():
+            _store(i, key)
 
     # Concat parts
     concat_file = tmp_dir / 'list.txt'
-    concat_file.write_text("\n".join(f"file '{p}'" for p in part_files))
-    base_video = output_path if not (music_path and continuous_music) else str(Path(output_path).with_name(Path(output_path).stem + '_base.mp4'))
+    concat_file.write_text("\n".join(f"file '{Path(p).resolve()}'" for p in part_files))
+    mix_music = bool(music_path or music_intro_path or music_outro_path) and continuous_music
+    if master:
+        base_video = str(tmp_dir / 'video.mp4')
+    elif not mix_music:
+        base_video = output_path
+    else:
+        base_video = str(Path(output_path).with_name(Path(output_path).stem + '_base.mp4'))
     cmd_concat = ['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', str(concat_file), '-c', 'copy', base_video]
-    subprocess.run(cmd_concat, check=True)
+    run_ffmpeg(cmd_concat, 'concat')
 
-    if (music_path or music_intro_path or music_outro_path) and continuous_music:
+    if master:
+        # Narration may still be synthesizing (pipelined TTS) while the parts encode
+        with span('master_audio', lines=len(audio_paths)):
+            master_audio(
+                segments, [_audio(i) for i in range(len(audio_paths))], base_video, output_path, profile,
+                music_path=music_path,
+                music_intro_path=music_intro_path,
+                music_outro_path=music_outro_path,
+                music_volume=music_volume,
+                duck=duck,
+                fade_in=fade_in,
+                fade_out=fade_out,
+                normalize_voice=normalize_voice,
+                loudnorm_cache=loudnorm_cache,
+            )
+    elif mix_music:
         total_duration = sum(s.duration for s in segments)
-        # Clamp fades
-        fade_in_eff = max(0.0, min(fade_in, total_duration/2))
-        fade_out_eff = max(0.0, min(fade_out, total_duration/2))
-
         # Build command inputs: base video audio (voice), main bed (optional), intro, outro
-        inputs = ['ffmpeg', '-y', '-i', base_video]
-        music_input_indices = {}
-        if music_path:
-            music_input_indices['bed'] = len(inputs)//2  # after adding
-            inputs += ['-i', music_path]
-        if music_intro_path:
-            music_input_indices['intro'] = (len(inputs)-1)
-            inputs += ['-i', music_intro_path]
-        if music_outro_path:
-            music_input_indices['outro'] = (len(inputs)-1)
-            inputs += ['-i', music_outro_path]
-
-        filter_parts = []
-        # Voice normalization
-        if normalize_voice:
-            filter_parts.append('[0:a]loudnorm=I=-16:LRA=11:TP=-1.5[voice]')
-        else:
-            filter_parts.append('[0:a]anull[voice]')
-
-        music_tracks = []
-        label_counter = 1
-        stream_offset = 1
-        def idx_to_label(i: int) -> str:
-            return f'm{i}'
-
-        next_input_idx = 1
-        # Order: bed (loop trimmed), intro (fade out), outro (fade in with delay)
-        if music_path:
-            # bed is first additional input (index next_input_idx)
-            bed_idx = next_input_idx
-            next_input_idx += 1
-            filter_parts.append(f'[{bed_idx}:a]aloop=loop=-1:size=2e9,atrim=0:{total_duration:.3f},asetpts=PTS-STARTPTS,volume={music_volume}' + (f',afade=t=in:st=0:d={fade_in_eff}' if fade_in_eff>0 else '') + (f',afade=t=out:st={max(0,total_duration-fade_out_eff):.3f}:d={fade_out_eff}' if fade_out_eff>0 else '') + '[bed]')
-            music_tracks.append('[bed]')
-        if music_intro_path:
-            intro_idx = next_input_idx
-            next_input_idx += 1
-            # Determine intro duration? We'll just fade it out over its own natural end via afade out using 90% of fade_out_eff for short smoothing
-            filter_parts.append(f'[{intro_idx}:a]asetpts=PTS-STARTPTS,volume={music_volume},afade=t=out:st={max(0,fade_in_eff-0.5):.3f}:d={min(2.0, fade_out_eff or 2.0)}[intro]')
-            music_tracks.append('[intro]')
-        if music_outro_path:
-            outro_idx = next_input_idx
-            next_input_idx += 1
-            start_outro = max(0.0, total_duration - 5.0)  # assume 5s outro window
-            filter_parts.append(f'[{outro_idx}:a]adelay={int(start_outro*1000)}|{int(start_outro*1000)},volume={music_volume},afade=t=in:st=0:d={min(2.0,fade_in_eff or 2.0)}[outro]')
-            music_tracks.append('[outro]')
-
-        if music_tracks:
-            if len(music_tracks) == 1:
-                filter_parts.append(f'{music_tracks[0]}anull[mus_mix]')
-            else:
-                filter_parts.append(''.join(music_tracks) + f'amix=inputs={len(music_tracks)}:normalize=0:dropout_transition=0[mus_mix]')
-        else:
-            # No music inputs, keep voice only
-            filter_parts.append('[voice]anull[mixed_only_voice]')
-
-        if music_tracks:
-            if duck:
-                filter_parts.append('[mus_mix][voice]sidechaincompress=threshold=0.1:ratio=8:attack=5:release=250:makeup=4[ducked]')
-                filter_parts.append('[ducked][voice]amix=inputs=2:weights="1 1"[mixed]')
-            else:
-                filter_parts.append('[mus_mix][voice]amix=inputs=2:weights="1 1"[mixed]')
-        else:
-            filter_parts.append('[mixed_only_voice]anull[mixed]')
+        inputs = ['-i', base_video]
+        music_inputs = {}
+        for name, path in (('bed', music_path), ('intro', music_intro_path), ('outro', music_outro_path)):
+            if path:
+                music_inputs[name] = len(inputs) // 2
+                inputs += ['-i', path]
 
+        # Voice normalization
+        filter_parts = ['[0:a]%s[voice]' % (VOICE_LOUDNORM if normalize_voice else 'anull')]
+        filter_parts += music_mix_filters(
+            '[voice]', total_duration,
+            music_volume=music_volume, fade_in=fade_in, fade_out=fade_out, duck=duck,
+            **music_inputs,
+        )
         filter_complex = ';'.join(filter_parts)
         final_cmd = [
-            'ffmpeg', '-y',
-            *inputs[1:],  # exclude initial 'ffmpeg' and '-y' duplicates
+            'ffmpeg', '-y', *inputs,
             '-filter_complex', filter_complex,
-            '-map', '0:v', '-map', '[mixed]', '-c:v', 'copy', '-c:a', 'aac', output_path
+            '-map', '0:v', '-map', '[mixed]', '-c:v', 'copy', *profile.audio_codec_args(), output_path
         ]
-        subprocess.run(final_cmd, check=True)
+        run_ffmpeg(final_cmd, 'music_mix')
+
+    if renditions:
+        # Each rendition's parts, muxed with the finished reel's (mixed/mastered) audio
+        lists = []
+        for r in renditions:
+            lst = tmp_dir / f'list.{r.name}.txt'
+            lst.write_text("\n".join(f"file '{Path(p).resolve()}'" for p in rendition_parts[r.name]))
+            lists.append(lst)
+        render_renditions(output_path, lists, renditions, output_path)
 
     # Cleanup
     if not keep_temp:
@@ -283,9 +449,28 @@ def create_video(
         except Exception:
             pass
 
+    _write_sidecar(segments, output_path, profile, renditions)
+    return output_path
+
+
+def _spoken_seconds(audio: str, dur: float) -> float:
+    """Length of a part cut with -shortest: the narration's, when shorter than the segment."""
+    try:
+        return min(dur, wav_seconds(audio))
+    except (OSError, EOFError, wave.Error):
+        return dur
+
+
+def _write_sidecar(
+    segments: List[Segment],
+    output_path: str,
+    profile: RenderProfile,
+    renditions: Sequence[Rendition] = (),
+) -> Path:
     # Save storyboard json
     meta_path = Path(output_path).with_suffix('.json')
     # Convert to JSON serializable structure
     serializable = [s.to_dict() for s in segments]
     meta_path.write_text(json.dumps(serializable, indent=2))
-    return output_path
+    write_manifest(output_path, {'name': profile.name, 'width': profile.width, 'height': profile.height}, renditions)
+    return meta_path
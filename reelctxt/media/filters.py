@@ -0,0 +1,164 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import List, Optional
+from ..planning.segment import Segment
+from .kenburns import ken_burns_filter
+
+# Shared ffmpeg filter snippets used by both render engines (per-part and single graph)
+
+VOICE_LOUDNORM = 'loudnorm=I=-16:LRA=11:TP=-1.5'
+BACKGROUND_COLORS = ["0x222222", "0x2d1f44", "0x123a2a", "0x443311"]
+
+
+@dataclass
+class CaptionStyle:
+    mode: str = "title"  # or 'narration'
+    max_chars: int = 80
+    color: str = "white"
+    box: bool = True
+    box_color: str = "black@0.5"
+    font: Optional[str] = None
+    renderer: str = "drawtext"  # or 'overlay' (Pillow-rendered, cached images; see media.captions)
+    highlight: bool = False  # overlay renderer: light up each narration word while it is spoken
+    highlight_color: str = "yellow"
+
+
+def escape_drawtext(text: str) -> str:
+    # Escape characters for ffmpeg drawtext
+    return text.replace('\\', '\\\\').replace(':', '\\:').replace("'", "\\'")
+
+
+def caption_text(seg: Segment, style: CaptionStyle) -> str:
+    text_src = seg.title if style.mode == 'title' else seg.narration
+    if not text_src:
+        text_src = seg.narration
+    txt = text_src.strip().replace('\n', ' ')
+    if len(txt) > style.max_chars:
+        txt = txt[:style.max_chars-1] + '…'
+    return txt
+
+
+def caption_filter(seg: Segment, style: CaptionStyle, scale: float = 1.0) -> str:
+    # scale: output height / 1920, keeps caption proportions in reduced-size profiles
+    draw = [
+        "drawtext=text='%s'" % escape_drawtext(caption_text(seg, style)),
+        f":x=(w-text_w)/2:y=h-(text_h*2)-{round(60*scale)}",
+        f":fontsize={round(52*scale)}:fontcolor={style.color}",
+    ]
+    if style.font:
+        draw.append(f":fontfile={escape_drawtext(style.font)}")
+    if style.box:
+        draw.append(f":box=1:boxcolor={style.box_color}:boxborderw={round(20*scale)}")
+    return ''.join(draw)
+
+
+def cover_scale(width: int, height: int) -> str:
+    # Fill the frame, cropping the overflow (ffmpeg has no 'cover' mode; increase+crop is the equivalent)
+    return f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height}"
+
+
+def background_color(i: int) -> str:
+    # Alternating palette for variety on segments without an image
+    return BACKGROUND_COLORS[i % len(BACKGROUND_COLORS)]
+
+
+def music_mix_filters(
+    voice: str,
+    total_duration: float,
+    bed: Optional[int] = None,
+    intro: Optional[int] = None,
+    outro: Optional[int] = None,
+    music_volume: float = 0.20,
+    fade_in: float = 1.5,
+    fade_out: float = 1.5,
+    duck: bool = True,
+) -> List[str]:
+    """Continuous music bed chain: mix bed/intro/outro inputs under ``voice`` into ``[mixed]``.
+
+    ``bed``/``intro``/``outro`` are ffmpeg input indices (None when absent).
+    """
+    # Clamp fades
+    fade_in_eff = max(0.0, min(fade_in, total_duration/2))
+    fade_out_eff = max(0.0, min(fade_out, total_duration/2))
+    filter_parts: List[str] = []
+    music_tracks: List[str] = []
+    # Order: bed (loop trimmed), intro (fade out), outro (fade in with delay)
+    if bed is not None:
+        filter_parts.append(f'[{bed}:a]aloop=loop=-1:size=2e9,atrim=0:{total_duration:.3f},asetpts=PTS-STARTPTS,volume={music_volume}' + (f',afade=t=in:st=0:d={fade_in_eff}' if fade_in_eff>0 else '') + (f',afade=t=out:st={max(0,total_duration-fade_out_eff):.3f}:d={fade_out_eff}' if fade_out_eff>0 else '') + '[bed]')
+        music_tracks.append('[bed]')
+    if intro is not None:
+        # Fade the intro out shortly after the music fade-in completes
+        filter_parts.append(f'[{intro}:a]asetpts=PTS-STARTPTS,volume={music_volume},afade=t=out:st={max(0,fade_in_eff-0.5):.3f}:d={min(2.0, fade_out_eff or 2.0)}[intro]')
+        music_tracks.append('[intro]')
+    if outro is not None:
+        start_outro = max(0.0, total_duration - 5.0)  # assume 5s outro window
+        filter_parts.append(f'[{outro}:a]adelay={int(start_outro*1000)}|{int(start_outro*1000)},volume={music_volume},afade=t=in:st=0:d={min(2.0,fade_in_eff or 2.0)}[outro]')
+        music_tracks.append('[outro]')
+
+    if not music_tracks:
+        # No music inputs, keep voice only
+        filter_parts.append(f'{voice}anull[mixed]')
+        return filter_parts
+    if len(music_tracks) == 1:
+        filter_parts.append(f'{music_tracks[0]}anull[mus_mix]')
+    else:
+        filter_parts.append(''.join(music_tracks) + f'amix=inputs={len(music_tracks)}:normalize=0:dropout_transition=0[mus_mix]')
+    if duck:
+        # A filter output can only be consumed once: split the voice for sidechain + mix
+        filter_parts.append(f'{voice}asplit=2[voice_sc][voice_mix]')
+        filter_parts.append('[mus_mix][voice_sc]sidechaincompress=threshold=0.1:ratio=8:attack=5:release=250:makeup=4[ducked]')
+        filter_parts.append('[ducked][voice_mix]amix=inputs=2:weights="1 1"[mixed]')
+    else:
+        filter_parts.append(f'[mus_mix]{voice}amix=inputs=2:weights="1 1"[mixed]')
+    return filter_parts
+
+
+def segment_music_filters(music: str, voice: str, dur: float, music_volume: float, duck: bool, out: str) -> List[str]:
+    """Per-segment (non-continuous) music: loop/trim ``music`` to ``dur`` and mix under ``voice``."""
+    parts = [f"{music}aloop=loop=-1:size=2e9,volume={music_volume},atrim=0:{dur:.3f},asetpts=PTS-STARTPTS[music{out}]"]
+    if duck:
+        # Sidechain compress music using narration, then mix with narration
+        parts.append(f"{voice}asplit=2[sc{out}][vm{out}]")
+        parts.append(f"[music{out}][sc{out}]sidechaincompress=threshold=0.1:ratio=8:attack=5:release=250:makeup=4[ducked{out}]")
+        parts.append(f"[ducked{out}][vm{out}]amix=inputs=2:dropout_transition=0:weights='1 1'[{out}]")
+    else:
+        # Static attenuation + mix
+        parts.append(f"[music{out}]{voice}amix=inputs=2:dropout_transition=0:weights='1 1'[{out}]")
+    return parts
+
+
+def color_source(i: int, dur: float, width: int, height: int, fps: int = 30) -> str:
+    return f"color=c={background_color(i)}:size={width}x{height}:d={dur:.2f}:r={fps}"
+
+
+def video_input_args(seg: Segment, i: int, width: int, height: int, fps: int = 30) -> List[str]:
+    """ffmpeg input args for a segment's background: looped still image or a colored lavfi source."""
+    if seg.image:
+        return ['-framerate', str(fps), '-loop', '1', '-t', f"{seg.duration:.2f}", '-i', seg.image]
+    return ['-f', 'lavfi', '-i', color_source(i, seg.duration, width, height, fps)]
+
+
+def segment_video_chain(
+    seg: Segment,
+    width: int,
+    height: int,
+    captions: bool,
+    style: CaptionStyle,
+    ken_burns: bool = False,
+    ken_burns_zoom: float = 1.08,
+    fps: int = 30,
+    prescaled: bool = False,
+) -> List[str]:
+    """Video filters for one segment (scale/Ken Burns for images, then caption).
+
+    ``prescaled`` means seg.image is already a width x height plate (see media.plates).
+    """
+    chain: List[str] = []
+    if seg.image:
+        if not prescaled:
+            chain.append(cover_scale(width, height))
+        if ken_burns:
+            chain.append(ken_burns_filter(seg.duration, ken_burns_zoom, width, height, fps))
+    if captions and style.renderer == 'drawtext':
+        chain.append(caption_filter(seg, style, height / 1920))
+    return chain
@@ -0,0 +1,129 @@
+from __future__ import annotations
+from typing import List, Optional, Sequence, Tuple
+from ..planning.segment import Segment
+from .workers import EncodeJob, EncodePool
+from .compose import VIDEO_WIDTH, VIDEO_HEIGHT, FPS
+from .profiles import RenderProfile, get_profile
+from .renditions import Rendition, rendition_path, split_filters
+from .filters import (
+    CaptionStyle, VOICE_LOUDNORM, music_mix_filters, segment_music_filters,
+    segment_video_chain, video_input_args,
+)
+
+# Single-invocation renderer: one filter_complex for the whole storyboard, one encode.
+
+AUDIO_RATE = 44100
+
+
+def build_graph(
+    segments: List[Segment],
+    audio_paths: List[str],
+    music_path: Optional[str] = None,
+    music_intro_path: Optional[str] = None,
+    music_outro_path: Optional[str] = None,
+    music_volume: float = 0.20,
+    duck: bool = True,
+    captions: bool = True,
+    style: Optional[CaptionStyle] = None,
+    ken_burns: bool = False,
+    ken_burns_zoom: float = 1.08,
+    continuous_music: bool = True,
+    fade_in: float = 1.5,
+    fade_out: float = 1.5,
+    normalize_voice: bool = True,
+    width: int = VIDEO_WIDTH,
+    height: int = VIDEO_HEIGHT,
+    fps: int = FPS,
+    prescaled: bool = False,
+) -> Tuple[List[str], str, str, str]:
+    """Build (input args, filter_complex, video label, audio label) for the whole reel.
+
+    Mirrors the per-part path: each segment gets the same video chain and narration
+    handling, segments are joined with the ``concat`` filter and the continuous music
+    chain runs on the joined narration.
+    """
+    style = style or CaptionStyle()
+    inputs: List[str] = []
+    fc: List[str] = []
+    n = len(segments)
+    per_segment_music = bool(music_path) and not continuous_music
+
+    # Inputs 2i / 2i+1: background + narration of segment i
+    for i, seg in enumerate(segments):
+        inputs += video_input_args(seg, i, width, height, fps)
+        inputs += ['-i', audio_paths[i]]
+    next_idx = 2 * n
+    music_idx = {}
+    for name, path in (('bed', music_path), ('intro', music_intro_path), ('outro', music_outro_path)):
+        if path and (name == 'bed' or continuous_music):
+            music_idx[name] = next_idx
+            inputs += ['-i', path]
+            next_idx += 1
+
+    if per_segment_music:
+        fc.append(f"[{music_idx['bed']}:a]asplit={n}" + ''.join(f'[ms{i}]' for i in range(n)))
+
+    for i, seg in enumerate(segments):
+        dur = seg.duration
+        chain = segment_video_chain(seg, width, height, captions, style, ken_burns, ken_burns_zoom, fps, prescaled)
+        # concat needs identical frame rate / SAR / pixel format on every input
+        chain += [f'fps={fps}', 'setsar=1', 'format=yuv420p', f'trim=duration={dur:.3f}', 'setpts=PTS-STARTPTS']
+        fc.append(f'[{2*i}:v]' + ','.join(chain) + f'[v{i}]')
+        # Pad/trim narration to the segment duration so audio and video stay aligned across the concat
+        fit = f'aresample={AUDIO_RATE},apad,atrim=0:{dur:.3f},asetpts=PTS-STARTPTS'
+        if per_segment_music:
+            fc.append(f'[{2*i+1}:a]{fit}[sv{i}]')
+            fc += segment_music_filters(f'[ms{i}]', f'[sv{i}]', dur, music_volume, duck, f'a{i}')
+        elif normalize_voice:
+            fc.append(f'[{2*i+1}:a]{VOICE_LOUDNORM},{fit}[a{i}]')
+        else:
+            fc.append(f'[{2*i+1}:a]{fit}[a{i}]')
+
+    fc.append(''.join(f'[v{i}][a{i}]' for i in range(n)) + f'concat=n={n}:v=1:a=1[vcat][acat]')
+
+    if music_idx and continuous_music:
+        total_duration = sum(s.duration for s in segments)
+        fc.append('[acat]%s[voice]' % (VOICE_LOUDNORM if normalize_voice else 'anull'))
+        fc += music_mix_filters(
+            '[voice]', total_duration,
+            music_volume=music_volume, fade_in=fade_in, fade_out=fade_out, duck=duck,
+            **music_idx,
+        )
+        return inputs, ';'.join(fc), '[vcat]', '[mixed]'
+    return inputs, ';'.join(fc), '[vcat]', '[acat]'
+
+
+def render_graph(
+    segments: List[Segment],
+    audio_paths: List[str],
+    output_path: str,
+    pool: Optional[EncodePool] = None,
+    profile: str | RenderProfile = 'final',
+    renditions: Sequence[Rendition] = (),
+    **kwargs,
+) -> str:
+    """Render the storyboard with a single ffmpeg process (no intermediate part files).
+
+    ``renditions`` are split off the final frames and written by the same process.
+    """
+    profile = get_profile(profile)
+    inputs, filter_complex, vlabel, alabel = build_graph(
+        segments, audio_paths, width=profile.width, height=profile.height, fps=profile.fps, **kwargs
+    )
+    extra: List[str] = []
+    if renditions:
+        fc = [filter_complex, *split_filters(vlabel, '[vmain]', renditions),
+              *split_filters(alabel, '[amain]', renditions, audio=True)]
+        filter_complex, vlabel, alabel = ';'.join(fc), '[vmain]', '[amain]'
+        for i, r in enumerate(renditions):
+            extra += ['-map', f'[rv{i}]', '-map', f'[ra{i}]', *r.video_args(), *r.audio_args(profile.audio_codec_args()),
+                      rendition_path(output_path, r)]
+    cmd = [
+        'ffmpeg', '-y', *inputs,
+        '-filter_complex', filter_complex,
+        '-map', vlabel, '-map', alabel,
+        *profile.video_codec_args(), *profile.audio_codec_args(), str(output_path), *extra,
+    ]
+    outputs = [str(output_path), *(rendition_path(output_path, r) for r in renditions)]
+    (pool or EncodePool()).run([EncodeJob(cmd, name='graph_render', outputs=outputs)])
+    return str(output_path)
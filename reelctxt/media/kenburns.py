@@ -1,7 +1,99 @@
 from __future__ import annotations
-from typing import Tuple
+from typing import IO, Callable, Iterator, Optional, Tuple
+import numpy as np
+from PIL import Image
+from .plates import render_plate
 
-def ken_burns_filter(duration: float, zoom: float = 1.1) -> str:
-    # Simple scale + slight pan using ffmpeg zoompan filter placeholder
-    fps = 30
-    return f"zoompan=z='min(zoom+0.0005*in, {zoom})':d={int(duration*fps)}:fps={fps}"
+PAN_PATHS = ('center', 'focus', 'left', 'right', 'up', 'down')
+
+
+def ken_burns_filter(duration: float, zoom: float = 1.08, width: int = 1080, height: int = 1920, fps: int = 30) -> str:
+    # Centered slow zoom reaching `zoom` at the end of the segment. d=1 emits one frame per
+    # (looped) input frame, so output length follows the input's -t / trim.
+    frames = max(1, int(duration * fps))
+    step = (zoom - 1.0) / frames
+    return (
+        f"zoompan=z='min(1+{step:.6f}*on,{zoom})'"
+        f":x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':d=1:s={width}x{height}:fps={fps}"
+    )
+
+
+def ken_burns_boxes(
+    src_size: Tuple[int, int],
+    frames: int,
+    zoom: float = 1.08,
+    path: str = 'center',
+    focus: Tuple[float, float] = (0.5, 0.5),
+) -> np.ndarray:
+    """Sub-pixel crop boxes (frames x 4: left, top, right, bottom) for a pan/zoom over src_size.
+
+    - center: zoom 1 -> zoom around the middle
+    - focus: zoom 1 -> zoom while drifting from the middle toward ``focus`` (x, y fractions)
+    - left/right/up/down: hold ``zoom`` and pan across the available margin in that direction
+    """
+    if path not in PAN_PATHS:
+        raise ValueError(f"Unknown Ken Burns path: {path}")
+    w, h = src_size
+    t = np.linspace(0.0, 1.0, max(1, frames))
+    t = t * t * (3.0 - 2.0 * t)  # smoothstep: ease in/out, no velocity jump at the ends
+    if path in ('center', 'focus'):
+        z = 1.0 + (zoom - 1.0) * t
+    else:
+        z = np.full_like(t, zoom)
+    cw, ch = w / z, h / z
+    fx, fy = (focus if path == 'focus' else (0.5, 0.5))
+    cx = 0.5 + (fx - 0.5) * t
+    cy = 0.5 + (fy - 0.5) * t
+    if path in ('left', 'right'):
+        cx = 1.0 - t if path == 'left' else t
+        cx = cw / 2 / w + cx * (1.0 - cw / w)
+    if path in ('up', 'down'):
+        cy = 1.0 - t if path == 'up' else t
+        cy = ch / 2 / h + cy * (1.0 - ch / h)
+    # Clamp centers so the crop stays inside the source
+    cx = np.clip(cx * w, cw / 2, w - cw / 2)
+    cy = np.clip(cy * h, ch / 2, h - ch / 2)
+    return np.stack([cx - cw / 2, cy - ch / 2, cx + cw / 2, cy + ch / 2], axis=1)
+
+
+def ken_burns_frames(
+    image: Image.Image,
+    duration: float,
+    width: int,
+    height: int,
+    fps: int = 30,
+    zoom: float = 1.08,
+    path: str = 'center',
+    focus: Tuple[float, float] = (0.5, 0.5),
+) -> Iterator[bytes]:
+    """Yield raw rgb24 frames of a pan/zoom over ``image`` (ideally a plate >= the output size)."""
+    image = image.convert('RGB')
+    boxes = ken_burns_boxes(image.size, int(round(duration * fps)), zoom, path, focus)
+    for box in boxes:
+        # Pillow resamples from a float box, so motion is sub-pixel smooth (zoompan rounds to ints)
+        yield image.resize((width, height), Image.BILINEAR, box=tuple(box)).tobytes()
+
+
+def ken_burns_feeder(
+    image_path: str,
+    duration: float,
+    width: int,
+    height: int,
+    plate_size: Optional[Tuple[int, int]] = None,
+    **kwargs,
+) -> Callable[[IO[bytes]], None]:
+    """Return a callable that streams the frames of one segment into an encoder's stdin.
+
+    ``plate_size``: cover-crop the source to this size first unless it already is a plate of that size.
+    """
+    def feed(stdin: IO[bytes]) -> None:
+        with Image.open(image_path) as im:
+            if plate_size and im.size != tuple(plate_size):
+                im = render_plate(image_path, *plate_size)
+            for frame in ken_burns_frames(im, duration, width, height, **kwargs):
+                stdin.write(frame)
+    return feed
+
+
+def rawvideo_input_args(width: int, height: int, fps: int = 30) -> list:
+    return ['-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}', '-framerate', str(fps), '-i', '-']
@@ -0,0 +1,146 @@
+from __future__ import annotations
+import json
+import re
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import logging
+from ..planning.segment import Segment
+from ..util.cache import DiskCache, file_hash, stable_hash
+from ..util.trace import span
+from .filters import VOICE_LOUDNORM, music_mix_filters
+from .profiles import RenderProfile
+from .workers import run_ffmpeg
+
+# Single-pass audio mastering: parts carry video only; narration WAVs are placed on one
+# sample-accurate timeline, normalized with two-pass loudnorm and mixed with the music
+# once, then muxed with the concatenated video in a single AAC encode.
+
+logger = logging.getLogger(__name__)
+
+MASTER_RATE = 48000
+LOUDNORM_VERSION = 1
+_MEASURED = ('input_i', 'input_tp', 'input_lra', 'input_thresh', 'target_offset')
+
+
+def segment_frames(segments: Sequence[Segment], fps: int) -> List[int]:
+    """Video frames per segment, cut at frame boundaries nearest to each segment's start.
+
+    Rounding each boundary (not each duration) keeps every part within half a
+    frame of the audio timeline, so drift cannot accumulate across the reel.
+    """
+    return [max(1, round((s.start + s.duration) * fps) - round(s.start * fps)) for s in segments]
+
+
+def narration_timeline(segments: Sequence[Segment], first_input: int, out: str = '[narr]', rate: int = MASTER_RATE) -> List[str]:
+    """Filters placing narration input ``first_input + i`` at ``segments[i].start`` (to the sample)."""
+    fc: List[str] = []
+    labels = []
+    for i, seg in enumerate(segments):
+        delay = round(seg.start * rate)
+        # Cut each line at its segment end, like the per-part path's -t/-shortest
+        fc.append(f'[{first_input + i}:a]aresample={rate},atrim=end_sample={round(seg.duration * rate)},'
+                  f'adelay=delays={delay}S:all=1[n{i}]')
+        labels.append(f'[n{i}]')
+    total = round((segments[-1].start + segments[-1].duration) * rate)
+    fc.append(''.join(labels) + f'amix=inputs={len(labels)}:normalize=0:dropout_transition=0,'
+              f'apad=whole_len={total},atrim=end_sample={total}{out}')
+    return fc
+
+
+def loudnorm_filter(measured: Optional[Dict[str, str]] = None, rate: int = MASTER_RATE) -> str:
+    """Second-pass (linear) loudnorm from first-pass measurements; resampled back since loudnorm outputs 192 kHz."""
+    if not measured:
+        return f'{VOICE_LOUDNORM},aresample={rate}'
+    return (f"{VOICE_LOUDNORM}:measured_I={measured['input_i']}:measured_TP={measured['input_tp']}"
+            f":measured_LRA={measured['input_lra']}:measured_thresh={measured['input_thresh']}"
+            f":offset={measured['target_offset']}:linear=true,aresample={rate}")
+
+
+def parse_loudnorm(stderr: str) -> Dict[str, str]:
+    """The JSON block loudnorm prints (print_format=json) at the end of ffmpeg's stderr."""
+    blocks = re.findall(r'\{[^{}]*"input_i"[^{}]*\}', stderr)
+    if not blocks:
+        raise ValueError('loudnorm printed no measurements')
+    data = json.loads(blocks[-1])
+    return {k: data[k] for k in _MEASURED}
+
+
+def loudnorm_key(segments: Sequence[Segment], audio_paths: Sequence[str]) -> str:
+    return stable_hash([
+        LOUDNORM_VERSION, VOICE_LOUDNORM, MASTER_RATE,
+        [file_hash(p) for p in audio_paths], [[round(s.start, 6), round(s.duration, 6)] for s in segments],
+    ])
+
+
+def measure_loudness(
+    segments: Sequence[Segment],
+    audio_paths: Sequence[str],
+    cache: Optional[DiskCache] = None,
+) -> Dict[str, str]:
+    """First loudnorm pass over the narration timeline; cached by narration content and placement."""
+    key = loudnorm_key(segments, audio_paths)
+    hit = cache.get(key, '.json') if cache is not None else None
+    if hit is not None:
+        try:
+            return json.loads(hit.read_text())
+        except (OSError, ValueError):
+            pass
+    cmd = ['ffmpeg', '-hide_banner', '-nostats']
+    for p in audio_paths:
+        cmd += ['-i', str(p)]
+    fc = narration_timeline(segments, 0) + [f'[narr]{VOICE_LOUDNORM}:print_format=json[out]']
+    cmd += ['-filter_complex', ';'.join(fc), '-map', '[out]', '-f', 'null', '-']
+    with span('loudnorm_measure', lines=len(audio_paths)):
+        proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=proc.stderr)
+    measured = parse_loudnorm(proc.stderr)
+    if cache is not None:
+        cache.put_bytes(key, json.dumps(measured).encode(), '.json')
+    return measured
+
+
+def master_audio(
+    segments: Sequence[Segment],
+    audio_paths: Sequence[str],
+    video_path: str | Path,
+    output_path: str | Path,
+    profile: RenderProfile,
+    music_path: Optional[str] = None,
+    music_intro_path: Optional[str] = None,
+    music_outro_path: Optional[str] = None,
+    music_volume: float = 0.20,
+    duck: bool = True,
+    fade_in: float = 1.5,
+    fade_out: float = 1.5,
+    normalize_voice: bool = True,
+    loudnorm_cache: Optional[DiskCache] = None,
+) -> str:
+    """Mux the video-only reel with narration timeline + music, encoding the audio exactly once."""
+    inputs = ['-i', str(video_path)]
+    for p in audio_paths:
+        inputs += ['-i', str(p)]
+    music_inputs = {}
+    for name, path in (('bed', music_path), ('intro', music_intro_path), ('outro', music_outro_path)):
+        if path:
+            music_inputs[name] = len(inputs) // 2
+            inputs += ['-i', path]
+    fc = narration_timeline(segments, 1)
+    if normalize_voice:
+        fc.append(f'[narr]{loudnorm_filter(measure_loudness(segments, audio_paths, loudnorm_cache))}[voice]')
+    else:
+        fc.append('[narr]anull[voice]')
+    total = segments[-1].start + segments[-1].duration
+    fc += music_mix_filters(
+        '[voice]', total,
+        music_volume=music_volume, fade_in=fade_in, fade_out=fade_out, duck=duck,
+        **music_inputs,
+    )
+    cmd = [
+        'ffmpeg', '-y', *inputs,
+        '-filter_complex', ';'.join(fc),
+        '-map', '0:v', '-map', '[mixed]', '-c:v', 'copy', *profile.audio_codec_args(), str(output_path),
+    ]
+    run_ffmpeg(cmd, 'master_mux')
+    return str(output_path)
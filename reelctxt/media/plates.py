@@ -0,0 +1,59 @@
+from __future__ import annotations
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+from PIL import Image, ImageOps
+from ..util.cache import DiskCache, file_hash, stable_hash
+
+logger = logging.getLogger(__name__)
+
+PLATE_VERSION = 1
+_ROTATED_ORIENTATIONS = {5, 6, 7, 8}  # EXIF orientations that swap width/height
+
+
+def plate_key(image_path: str | Path, width: int, height: int, centering: Tuple[float, float] = (0.5, 0.5)) -> str:
+    return stable_hash([PLATE_VERSION, file_hash(image_path), width, height, list(centering)])
+
+
+def render_plate(image_path: str | Path, width: int, height: int, centering: Tuple[float, float] = (0.5, 0.5)) -> Image.Image:
+    """Decode, orient and cover-crop an image to exactly width x height."""
+    with Image.open(image_path) as im:
+        # JPEG: let the decoder downscale by 1/2..1/8 while staying >= the target size
+        rotated = im.getexif().get(0x0112) in _ROTATED_ORIENTATIONS
+        im.draft('RGB', (height, width) if rotated else (width, height))
+        im = ImageOps.exif_transpose(im).convert('RGB')
+        return ImageOps.fit(im, (width, height), Image.LANCZOS, centering=centering)
+
+
+def prepare_plate(
+    image_path: str | Path,
+    width: int,
+    height: int,
+    cache: DiskCache,
+    centering: Tuple[float, float] = (0.5, 0.5),
+) -> str:
+    """Return the path of the cached plate for image_path, rendering it on first use."""
+    key = plate_key(image_path, width, height, centering)
+    hit = cache.get(key, '.jpg')
+    if hit is not None:
+        return str(hit)
+    buf = io.BytesIO()
+    render_plate(image_path, width, height, centering).save(buf, 'JPEG', quality=95, subsampling=0)
+    return str(cache.put_bytes(key, buf.getvalue(), '.jpg'))
+
+
+def prepare_plates(
+    images: Iterable[str],
+    width: int,
+    height: int,
+    cache: DiskCache,
+    workers: Optional[int] = None,
+) -> Dict[str, str]:
+    """Map each distinct source image to its plate, rendering missing plates in parallel."""
+    unique = sorted(set(images))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        plates = list(ex.map(lambda p: prepare_plate(p, width, height, cache), unique))
+    logger.debug("Prepared %d plates at %dx%d", len(plates), width, height)
+    return dict(zip(unique, plates))
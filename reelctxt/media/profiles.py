@@ -0,0 +1,52 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    """Output format + encoder settings. Timeline logic is identical across profiles."""
+    name: str
+    width: int = 1080
+    height: int = 1920
+    fps: int = 30
+    preset: Optional[str] = None  # libx264 preset (None: encoder default)
+    crf: Optional[int] = None
+    audio_bitrate: Optional[str] = None
+    audio_rate: Optional[int] = None
+    loudnorm: bool = True  # allow narration loudness normalization
+
+    def video_codec_args(self) -> List[str]:
+        args = ['-c:v', 'libx264']
+        if self.preset:
+            args += ['-preset', self.preset]
+        if self.crf is not None:
+            args += ['-crf', str(self.crf)]
+        return args + ['-pix_fmt', 'yuv420p']
+
+    def audio_codec_args(self) -> List[str]:
+        args = ['-c:a', 'aac']
+        if self.audio_bitrate:
+            args += ['-b:a', self.audio_bitrate]
+        if self.audio_rate:
+            args += ['-ar', str(self.audio_rate)]
+        return args
+
+
+PROFILES: Dict[str, RenderProfile] = {
+    'final': RenderProfile('final'),
+    # Quick storyboard check: quarter the pixels, half the frames, fastest x264 preset, no loudnorm
+    'draft': RenderProfile(
+        'draft', width=540, height=960, fps=15, preset='ultrafast', crf=30,
+        audio_bitrate='64k', audio_rate=22050, loudnorm=False,
+    ),
+}
+
+
+def get_profile(profile: str | RenderProfile) -> RenderProfile:
+    if isinstance(profile, RenderProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown render profile: {profile} (choose from {', '.join(PROFILES)})") from None
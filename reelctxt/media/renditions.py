@@ -0,0 +1,177 @@
+from __future__ import annotations
+import dataclasses
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import json
+import logging
+from ..util.trace import span
+from .filters import cover_scale
+from .workers import run_ffmpeg
+
+# Multi-rendition output: the final frames are fanned out with `split` inside the render's
+# own filter graph, so each rendition is scaled/cropped/padded and encoded from the same
+# uncompressed frames as the main reel instead of re-encoding the finished MP4. With the
+# parts engine each part writes its rendition parts too; they are concatenated and muxed
+# with the reel's mixed audio in one stream-copy ffmpeg call at the end.
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Rendition:
+    name: str
+    width: int
+    height: int
+    fit: Optional[str] = None  # 'crop' (fill the frame, cut the overflow) or 'pad' (letterbox); None: crop unless that cuts captions
+    video_bitrate: Optional[str] = None  # capped bitrate, e.g. '400k' (None: constant quality)
+    preset: Optional[str] = None
+    crf: Optional[int] = None
+    audio_bitrate: Optional[str] = None  # re-encode audio at this bitrate (None: copy the reel's audio)
+
+    def video_filter(self) -> str:
+        if self.fit in (None, 'crop'):
+            return cover_scale(self.width, self.height) + ',setsar=1'
+        if self.fit == 'pad':
+            return (f'scale={self.width}:{self.height}:force_original_aspect_ratio=decrease,'
+                    f'pad={self.width}:{self.height}:(ow-iw)/2:(oh-ih)/2:color=black,setsar=1')
+        raise ValueError(f"Unknown rendition fit: {self.fit} (choose crop or pad)")
+
+    def video_args(self) -> List[str]:
+        args = ['-c:v', 'libx264']
+        if self.preset:
+            args += ['-preset', self.preset]
+        if self.crf is not None:
+            args += ['-crf', str(self.crf)]
+        if self.video_bitrate:
+            args += ['-b:v', self.video_bitrate, '-maxrate', self.video_bitrate, '-bufsize', _double(self.video_bitrate)]
+        return args + ['-pix_fmt', 'yuv420p']
+
+    def audio_args(self, default: Sequence[str]) -> List[str]:
+        """Re-encode at ``audio_bitrate`` if set, else ``default`` (the reel's own audio settings)."""
+        if self.audio_bitrate:
+            return ['-c:a', 'aac', '-b:a', self.audio_bitrate]
+        return list(default)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {k: v for k, v in vars(self).items() if v is not None}
+
+
+def _double(bitrate: str) -> str:
+    # VBV buffer of two seconds at the capped rate
+    num, unit = (bitrate[:-1], bitrate[-1]) if bitrate[-1:].isalpha() else (bitrate, '')
+    doubled = 2 * float(num)
+    return f'{int(doubled) if doubled.is_integer() else doubled}{unit}'
+
+
+RENDITIONS: Dict[str, Rendition] = {
+    'vertical': Rendition('vertical', 1080, 1920),
+    'square': Rendition('square', 1080, 1080),
+    # A 9:16 reel cropped to 16:9 would keep a thin band; letterbox it instead
+    'landscape': Rendition('landscape', 1920, 1080, fit='pad'),
+    'preview': Rendition('preview', 360, 640, video_bitrate='400k', preset='veryfast', audio_bitrate='64k'),
+}
+
+
+def parse_rendition(spec: str) -> Rendition:
+    """A preset name, or ``name=WIDTHxHEIGHT[:crop|pad][:bitrate]`` (e.g. ``story=720x1280:crop:1500k``)."""
+    spec = spec.strip()
+    if '=' not in spec:
+        try:
+            return RENDITIONS[spec]
+        except KeyError:
+            raise ValueError(f"Unknown rendition: {spec} (choose from {', '.join(RENDITIONS)} or name=WxH)") from None
+    name, _, rest = spec.partition('=')
+    size, *opts = rest.split(':')
+    try:
+        width, height = (int(v) for v in size.lower().split('x'))
+    except ValueError:
+        raise ValueError(f"Bad rendition size in {spec!r} (expected WIDTHxHEIGHT)") from None
+    fit = opts[0] if opts and opts[0] else None
+    bitrate = opts[1] if len(opts) > 1 else None
+    rendition = Rendition(name, width, height, fit=fit, video_bitrate=bitrate)
+    rendition.video_filter()  # validate the fit now rather than at render time
+    return rendition
+
+
+def parse_renditions(specs: Sequence[str | Rendition]) -> List[Rendition]:
+    out = [s if isinstance(s, Rendition) else parse_rendition(s) for s in specs]
+    names = [r.name for r in out]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate rendition names: {', '.join(names)}")
+    return out
+
+
+def rendition_path(output_path: str | Path, rendition: Rendition) -> str:
+    out = Path(output_path)
+    return str(out.with_name(f'{out.stem}.{rendition.name}{out.suffix or ".mp4"}'))
+
+
+def plan_renditions(specs: Sequence[str | Rendition], width: int, height: int, captions: bool = False) -> List[Rendition]:
+    """The renditions worth encoding next to a ``width``x``height`` reel.
+
+    Ones with the reel's own size are dropped (the reel already is that output). A
+    rendition without an explicit fit is cropped, unless burned-in captions would be
+    cut off by a crop to another aspect ratio; then it is letterboxed.
+    """
+    out = []
+    for r in parse_renditions(specs):
+        if (r.width, r.height) == (width, height):
+            logger.info("Rendition %s has the reel's own size (%dx%d); skipped", r.name, width, height)
+            continue
+        if r.fit is None:
+            keep_captions = captions and r.width * height != r.height * width
+            if keep_captions:
+                logger.info("Padding rendition %s so the captions are not cropped (add :crop to crop it)", r.name)
+            r = dataclasses.replace(r, fit='pad' if keep_captions else 'crop')
+        out.append(r)
+    return out
+
+
+def split_filters(src: str, main: str, renditions: Sequence[Rendition], audio: bool = False) -> List[str]:
+    """Filters fanning ``src`` out to ``main`` plus one label per rendition.
+
+    Video labels are ``[rv0]``, ``[rv1]``... scaled to each rendition; audio labels
+    ``[ra0]``... are plain copies.
+    """
+    n = len(renditions)
+    if audio:
+        return [f'{src}asplit={n + 1}{main}' + ''.join(f'[ra{i}]' for i in range(n))]
+    fc = [f'{src}split={n + 1}{main}' + ''.join(f'[rs{i}]' for i in range(n))]
+    return fc + [f'[rs{i}]{r.video_filter()}[rv{i}]' for i, r in enumerate(renditions)]
+
+
+def mux_command(audio_source: str | Path, part_lists: Sequence[str | Path], renditions: Sequence[Rendition],
+                output_path: str | Path) -> List[str]:
+    """One ffmpeg call joining each rendition's parts (concat lists) and muxing them with the reel's audio.
+
+    Video is stream-copied; audio too unless a rendition asks for its own bitrate.
+    """
+    cmd = ['ffmpeg', '-y', '-i', str(audio_source)]
+    for lst in part_lists:
+        cmd += ['-f', 'concat', '-safe', '0', '-i', str(lst)]
+    for i, r in enumerate(renditions):
+        cmd += ['-map', f'{i + 1}:v', '-map', '0:a?', '-c:v', 'copy', *r.audio_args(['-c:a', 'copy']),
+                rendition_path(output_path, r)]
+    return cmd
+
+
+def render_renditions(audio_source: str | Path, part_lists: Sequence[str | Path], renditions: Sequence[Rendition],
+                      output_path: str | Path) -> Dict[str, str]:
+    """Assemble every rendition from its encoded parts; returns {name: path}."""
+    if not renditions:
+        return {}
+    with span('renditions', count=len(renditions)):
+        run_ffmpeg(mux_command(audio_source, part_lists, renditions, output_path), 'renditions')
+    return {r.name: rendition_path(output_path, r) for r in renditions}
+
+
+def write_manifest(output_path: str | Path, main: Dict[str, object], renditions: Sequence[Rendition]) -> Optional[Path]:
+    """List every output file in ``<stem>.renditions.json``; the segment sidecar keeps its format."""
+    path = Path(output_path).with_suffix('.renditions.json')
+    if not renditions:
+        path.unlink(missing_ok=True)  # left over from an earlier run of the same output
+        return None
+    entries = [dict(main, path=str(output_path))] + [dict(r.to_dict(), path=rendition_path(output_path, r)) for r in renditions]
+    path.write_text(json.dumps(entries, indent=2))
+    return path
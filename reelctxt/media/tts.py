@@ -1,24 +1,131 @@
 from __future__ import annotations
+import contextvars
+import json
 import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Callable, Dict, List, Optional
 import subprocess
+import logging
+from ..util.cache import DiskCache, stable_hash
+from ..util.trace import span
+from .tts_worker import TTSBackend
+
+logger = logging.getLogger(__name__)
 
 # Placeholder TTS using system 'espeak' if available. Users can plug real TTS.
 
-def synthesize_segments(segments: List[dict], out_dir: str | Path) -> List[str]:
-    out_dir = Path(out_dir)
-    out_dir.mkdir(parents=True, exist_ok=True)
-    audio_paths = []
-    for seg in segments:
+# engine(text, wav_path, voice=None, rate=None) writes the wav and may return per-word
+# timings; engines marked ``batched`` (a TTSWorker) get all misses at once via synthesize_batch(requests).
+TTSEngine = Callable[..., Optional[list]]
+TTS_CACHE_VERSION = 1
+
+
+def espeak_engine(text: str, path: Path, voice: Optional[str] = None, rate: Optional[int] = None) -> None:
+    cmd = ["espeak", "-w", str(path)]
+    if voice:
+        cmd += ["-v", voice]
+    if rate:
+        cmd += ["-s", str(rate)]
+    # naive espeak usage
+    try:
+        subprocess.run(cmd + [text], check=True)
+    except FileNotFoundError:
+        # fallback: create empty silent file via sox or ffmpeg
+        subprocess.run(["ffmpeg", "-f", "lavfi", "-i", "anullsrc=r=44100:cl=mono", "-t", "1", str(path), "-y"], check=True)
+
+
+def engine_name(engine: TTSEngine) -> str:
+    if isinstance(engine, TTSBackend):
+        return engine.cache_name  # includes the model, e.g. 'coqui:<model>'
+    return getattr(engine, 'name', None) or getattr(engine, '__name__', None) or type(engine).__name__
+
+
+def tts_cache_key(text: str, engine: TTSEngine, voice: Optional[str] = None, rate: Optional[int] = None) -> str:
+    return stable_hash([TTS_CACHE_VERSION, text, engine_name(engine), voice, rate])
+
+
+def _set_words(seg, words: Optional[list]) -> None:
+    if words is None:
+        return
+    if isinstance(seg, dict):
+        seg.setdefault('meta', {})['words'] = words
+    else:
+        seg.meta['words'] = words
+
+
+def synthesize_segments(
+    segments: List[dict],
+    out_dir: str | Path,
+    engine: TTSEngine = espeak_engine,
+    voice: Optional[str] = None,
+    rate: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> List[str]:
+    """Synthesize narration per segment into a content-addressed cache; returns wav paths in segment order.
+
+    ``out_dir`` is a DiskCache keyed by text + engine + voice + rate, so unchanged
+    narration is never re-synthesized and concurrent jobs/processes can share it.
+    Missing lines are synthesized in parallel (``workers`` threads), or handed to
+    ``engine.synthesize_batch`` in one go for ``batched`` engines. Word timings returned by the engine are
+    cached next to the wav and stored in ``seg.meta['words']``.
+    """
+    cache = DiskCache(out_dir, max_bytes=max_bytes)
+    keys = [tts_cache_key(seg['narration'], engine, voice, rate) for seg in segments]
+    paths: Dict[str, Path] = {}
+    words: Dict[str, Optional[list]] = {}
+    missing: Dict[str, dict] = {}
+    for key, seg in zip(keys, segments):
+        hit = cache.get(key, '.wav')
+        if hit is not None:
+            paths[key] = hit
+            timings = cache.get(key, '.words.json')
+            words[key] = json.loads(timings.read_text()) if timings else None
+        else:
+            missing.setdefault(key, seg)
+
+    def _publish(key: str, tmp: str, timings: Optional[list]) -> None:
+        paths[key] = cache.put_file(key, tmp, '.wav', evict=False, move=True)
+        if timings is not None:
+            cache.put_bytes(key, json.dumps(timings).encode(), '.words.json', evict=False)
+        words[key] = timings
+
+    def _tmp() -> str:
+        fd, tmp = tempfile.mkstemp(dir=cache.root, prefix='.tmp-', suffix='.wav')
+        os.close(fd)
+        return tmp
+
+    def _synth(key: str, seg: dict) -> None:
         text = seg['narration']
-        fname = f"seg_{seg['idx']}.wav"
-        path = out_dir / fname
-        # naive espeak usage
+        with span('tts', idx=seg['idx'], chars=len(text)):
+            tmp = _tmp()
+            try:
+                _publish(key, tmp, engine(text, Path(tmp), voice=voice, rate=rate))
+            finally:
+                Path(tmp).unlink(missing_ok=True)
+
+    if missing and getattr(engine, 'batched', False):
+        tmps = {key: _tmp() for key in missing}
         try:
-            subprocess.run(["espeak", "-w", str(path), text], check=True)
-        except FileNotFoundError:
-            # fallback: create empty silent file via sox or ffmpeg
-            subprocess.run(["ffmpeg", "-f", "lavfi", "-i", "anullsrc=r=44100:cl=mono", "-t", "1", str(path), "-y"], check=True)
-        audio_paths.append(str(path))
-    return audio_paths
+            with span('tts_batch', lines=len(missing)):
+                results = engine.synthesize_batch(
+                    [(seg['narration'], tmps[key], voice, rate) for key, seg in missing.items()]
+                )
+            for key, timings in zip(missing, results):
+                _publish(key, tmps[key], timings)
+        finally:
+            for tmp in tmps.values():
+                Path(tmp).unlink(missing_ok=True)
+        cache.evict()
+    elif missing:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            futures = [ex.submit(contextvars.copy_context().run, _synth, k, s) for k, s in missing.items()]
+            for f in futures:
+                f.result()
+        cache.evict()
+    for key, seg in zip(keys, segments):
+        _set_words(seg, words.get(key))
+    logger.info("TTS: %d segments, %d cached, %d synthesized", len(segments), len(segments) - len(missing), len(missing))
+    return [str(paths[k]) for k in keys]
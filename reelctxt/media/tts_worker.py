@@ -0,0 +1,291 @@
+from __future__ import annotations
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+import wave
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+# Pluggable TTS backends plus a long-lived worker process that loads the backend
+# once and serves batched requests from every segment/job of this process.
+
+WordTimings = List[Dict[str, Any]]  # [{'word': 'hello', 'start': 0.0, 'end': 0.41}, ...]
+Request = Tuple[str, str, Optional[str], Optional[int]]  # (text, wav path, voice, rate)
+DEFAULT_WPM = 155
+
+
+def wav_seconds(path: str | Path) -> float:
+    with wave.open(str(path), 'rb') as w:
+        return w.getnframes() / float(w.getframerate())
+
+
+def estimate_word_timings(text: str, seconds: float) -> WordTimings:
+    """Spread words over ``seconds`` proportionally to their length (for engines without alignments)."""
+    words = text.split()
+    if not words:
+        return []
+    weights = [len(w) + 1 for w in words]  # +1: the pause after each word
+    scale = seconds / sum(weights)
+    out, t = [], 0.0
+    for word, weight in zip(words, weights):
+        end = t + weight * scale
+        out.append({'word': word, 'start': round(t, 3), 'end': round(end - scale, 3)})
+        t = end
+    return out
+
+
+class TTSBackend:
+    """One TTS engine. The constructor must be cheap; heavy model loading belongs in load().
+
+    Backends are engines for synthesize_segments themselves (called per line, in
+    parallel threads). ``resident`` ones hold a model worth keeping warm in a
+    TTSWorker process; subprocess engines such as espeak are not.
+    """
+    name = 'base'
+    resident = False
+
+    @property
+    def cache_name(self) -> str:
+        """Identifies the voice output in cache keys (include the model when it matters)."""
+        return self.name
+
+    def load(self) -> None:
+        pass
+
+    def synthesize(self, text: str, path: str | Path, voice: Optional[str] = None, rate: Optional[int] = None) -> WordTimings:
+        raise NotImplementedError
+
+    def synthesize_batch(self, requests: List[Request]) -> List[WordTimings]:
+        return [self.synthesize(*r) for r in requests]
+
+    def __call__(self, text: str, path: str | Path, voice: Optional[str] = None, rate: Optional[int] = None) -> WordTimings:
+        return self.synthesize(text, path, voice, rate)
+
+
+class StubBackend(TTSBackend):
+    """Offline stand-in: a quiet tone as long as the narration would take, with exact word timings."""
+    name = 'stub'
+
+    def __init__(self, sample_rate: int = 22050):
+        self.sample_rate = sample_rate
+
+    def synthesize(self, text, path, voice=None, rate=None):
+        seconds = max(0.5, len(text.split()) / float(rate or DEFAULT_WPM) * 60.0)
+        n = int(seconds * self.sample_rate)
+        # 1 kHz square-ish tick pattern at low amplitude; cheap and deterministic
+        frame = (b'\x40\x00' * 11 + b'\xc0\xff' * 11)
+        data = (frame * (n // 22 + 1))[:n * 2]
+        with wave.open(str(path), 'wb') as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(self.sample_rate)
+            w.writeframes(data)
+        return estimate_word_timings(text, seconds)
+
+
+class EspeakBackend(TTSBackend):
+    name = 'espeak'
+
+    def synthesize(self, text, path, voice=None, rate=None):
+        from .tts import espeak_engine
+        espeak_engine(text, Path(path), voice=voice, rate=rate)
+        return estimate_word_timings(text, wav_seconds(path))
+
+
+class CoquiBackend(TTSBackend):
+    """Coqui ``TTS`` (pip install reelctxt[voice]); the model is loaded once per worker."""
+    name = 'coqui'
+    resident = True
+
+    def __init__(self, model: str = 'tts_models/en/ljspeech/vits', gpu: bool = False):
+        self.model = model
+        self.gpu = gpu
+        self.tts = None
+
+    @property
+    def cache_name(self) -> str:
+        return f'coqui:{self.model}'
+
+    def load(self) -> None:
+        try:
+            from TTS.api import TTS
+        except ImportError as e:
+            raise RuntimeError("Coqui TTS backend requires the 'voice' extra: pip install reelctxt[voice]") from e
+        self.tts = TTS(self.model, gpu=self.gpu)
+
+    def synthesize(self, text, path, voice=None, rate=None):
+        kwargs: Dict[str, Any] = {}
+        if voice:
+            kwargs['speaker'] = voice
+        if rate:
+            kwargs['speed'] = rate / float(DEFAULT_WPM)
+        self.tts.tts_to_file(text=text, file_path=str(path), **kwargs)
+        return estimate_word_timings(text, wav_seconds(path))
+
+
+BACKENDS: Dict[str, Type[TTSBackend]] = {
+    'stub': StubBackend,
+    'espeak': EspeakBackend,
+    'coqui': CoquiBackend,
+}
+
+
+def get_backend(name: str, **options: Any) -> TTSBackend:
+    try:
+        cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown TTS backend: {name} (choose from {', '.join(BACKENDS)})") from None
+    return cls(**options)
+
+
+_LOAD_FAILED = -1
+
+
+def _worker_main(backend_name: str, options: Dict[str, Any], requests, results, batch_size: int) -> None:
+    try:
+        backend = get_backend(backend_name, **options)
+        backend.load()
+    except Exception as e:
+        results.put((_LOAD_FAILED, None, f'{type(e).__name__}: {e}'))
+        return
+    while True:
+        item = requests.get()
+        if item is None:
+            return
+        batch = [item]
+        # Drain whatever else is queued so backends that batch natively can use it
+        while len(batch) < batch_size:
+            try:
+                item = requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                requests.put(None)
+                break
+            batch.append(item)
+        try:
+            words = backend.synthesize_batch([req for _, req in batch])
+            for (req_id, _), w in zip(batch, words):
+                results.put((req_id, w, None))
+        except Exception:
+            # Retry one by one so a single bad line only fails its own request
+            for req_id, req in batch:
+                try:
+                    results.put((req_id, backend.synthesize(*req), None))
+                except Exception as e:
+                    results.put((req_id, None, f'{type(e).__name__}: {e}'))
+
+
+class TTSWorker:
+    """A TTS backend running in one long-lived child process.
+
+    The model is loaded once when the worker starts; requests from any thread
+    (segments of one reel, or many batch jobs) are queued, drained in batches
+    and answered through futures. Usable as an engine for synthesize_segments.
+    """
+    batched = True  # synthesize_segments hands it all missing lines at once
+
+    def __init__(self, backend: str = 'espeak', batch_size: int = 16, **options: Any):
+        self.backend = backend
+        self.name = get_backend(backend, **options).cache_name  # cheap: no model load in the parent
+        self._options = options
+        self._batch_size = batch_size
+        self._ids = itertools.count()
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._error: Optional[str] = None
+        self._proc = None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._proc.pid if self._proc else None
+
+    def start(self) -> 'TTSWorker':
+        with self._lock:
+            if self._proc is not None:
+                return self
+            mp = multiprocessing.get_context('spawn')
+            self._requests = mp.Queue()
+            self._results = mp.Queue()
+            self._proc = mp.Process(
+                target=_worker_main,
+                args=(self.backend, self._options, self._requests, self._results, self._batch_size),
+                name=f'tts-{self.backend}',
+                daemon=True,
+            )
+            self._proc.start()
+            self._reader = threading.Thread(target=self._read_results, args=(self._proc, self._results), name=f'tts-{self.backend}-results', daemon=True)
+            self._reader.start()
+        logger.info("Started %s TTS worker (pid %s)", self.name, self._proc.pid)
+        return self
+
+    def _read_results(self, proc, results) -> None:
+        while True:
+            try:
+                req_id, words, error = results.get(timeout=0.5)
+            except queue.Empty:
+                if proc.is_alive():
+                    continue
+                self._fail_all(f'TTS worker exited (code {proc.exitcode})')
+                return
+            if req_id == _LOAD_FAILED:
+                self._fail_all(error)
+                return
+            with self._lock:
+                fut = self._pending.pop(req_id, None)
+            if fut is None:
+                continue
+            if error:
+                fut.set_exception(RuntimeError(error))
+            else:
+                fut.set_result(words)
+
+    def _fail_all(self, error: str) -> None:
+        with self._lock:
+            self._error = error
+            pending, self._pending = self._pending, {}
+        for fut in pending.values():
+            fut.set_exception(RuntimeError(error))
+
+    def submit(self, text: str, path: str | Path, voice: Optional[str] = None, rate: Optional[int] = None) -> Future:
+        self.start()
+        fut: Future = Future()
+        with self._lock:
+            if self._error:
+                raise RuntimeError(self._error)
+            req_id = next(self._ids)
+            self._pending[req_id] = fut
+        self._requests.put((req_id, (text, str(path), voice, rate)))
+        return fut
+
+    def synthesize_batch(self, requests: List[Request]) -> List[WordTimings]:
+        futures = [self.submit(*r) for r in requests]
+        return [f.result() for f in futures]
+
+    def __call__(self, text: str, path: str | Path, voice: Optional[str] = None, rate: Optional[int] = None) -> WordTimings:
+        return self.submit(text, path, voice, rate).result()
+
+    def close(self) -> None:
+        with self._lock:
+            proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        self._requests.put(None)
+        proc.join(timeout=10)
+        if proc.is_alive():
+            proc.terminate()
+            proc.join()
+        self._reader.join(timeout=2)
+        self._fail_all('TTS worker closed')
+        self._error = None
+
+    def __enter__(self) -> 'TTSWorker':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,189 @@
+from __future__ import annotations
+import contextvars
+import os
+import subprocess
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from dataclasses import dataclass
+from typing import IO, Any, Callable, Dict, List, Optional, Sequence, Set, Union
+from ..util.trace import Span, span
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EncodeJob:
+    """An ffmpeg command plus an optional writer that streams its stdin (e.g. raw frames)."""
+    cmd: List[str]
+    feed: Optional[Callable[[IO[bytes]], None]] = None
+    name: str = 'ffmpeg'  # trace span name
+    outputs: Sequence[str] = ()  # output paths of a multi-output command (default: the last argument)
+
+
+def _read_progress(stream: IO[bytes], sp: Span) -> None:
+    """Parse ffmpeg ``-progress`` key=value blocks into the span (last frame/fps/speed, mean fps)."""
+    fps_samples: List[float] = []
+    last: Dict[str, str] = {}
+    for raw in stream:
+        key, _, value = raw.decode('utf-8', 'ignore').strip().partition('=')
+        last[key] = value
+        if key == 'fps':
+            try:
+                if float(value) > 0:
+                    fps_samples.append(float(value))
+            except ValueError:
+                pass
+    attrs: Dict[str, Any] = {}
+    if last.get('frame', '').isdigit():
+        attrs['frames'] = int(last['frame'])
+    try:
+        attrs['speed'] = float(last.get('speed', '').rstrip('x'))
+    except ValueError:
+        pass
+    if fps_samples:
+        attrs['fps'] = fps_samples[-1]
+        attrs['mean_fps'] = round(sum(fps_samples) / len(fps_samples), 2)
+    if last.get('out_time_us', '').isdigit():
+        attrs['out_seconds'] = int(last['out_time_us']) / 1e6
+    sp.set(**attrs)
+
+
+class EncodeAbort:
+    """Stop signal shared by one or more ``EncodePool.run`` calls.
+
+    ``set`` terminates every ffmpeg started under it and keeps queued jobs from
+    starting; those jobs return without raising, the caller raises the real error.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._live: Set[subprocess.Popen] = set()
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def set(self) -> None:
+        with self._lock:
+            self._event.set()
+            for proc in self._live:
+                proc.terminate()
+
+    def _track(self, proc: subprocess.Popen) -> None:
+        with self._lock:
+            self._live.add(proc)
+            if self._event.is_set():  # abort raced with our start
+                proc.terminate()
+
+    def _untrack(self, proc: subprocess.Popen) -> None:
+        with self._lock:
+            self._live.discard(proc)
+
+
+class EncodePool:
+    """Run ffmpeg encodes concurrently under a global CPU/thread budget.
+
+    Each running ffmpeg gets an equal ``-threads`` share of ``threads``. The
+    worker slots are a semaphore, so one pool can be shared by several
+    ``create_video`` calls (e.g. batch jobs) without oversubscribing the box.
+    """
+
+    def __init__(self, workers: int = 1, threads: Optional[int] = None):
+        self.workers = max(1, int(workers))
+        self.threads = threads
+        self._slots = threading.BoundedSemaphore(self.workers)
+
+    @property
+    def threads_per_job(self) -> Optional[int]:
+        if self.threads is None and self.workers == 1:
+            return None  # let ffmpeg decide, as before
+        budget = self.threads or os.cpu_count() or 1
+        return max(1, budget // self.workers)
+
+    def _with_threads(self, cmd: List[str], outputs: Sequence[str] = ()) -> List[str]:
+        n = self.threads_per_job
+        if n is None:
+            return list(cmd)
+        # -threads is an output option: it must precede every output path
+        marks = {i for i, tok in enumerate(cmd) if tok in outputs and cmd[i - 1] != '-i'} if outputs else {len(cmd) - 1}
+        out: List[str] = []
+        for i, tok in enumerate(cmd):
+            if i in marks:
+                out += ['-threads', str(n)]
+            out.append(tok)
+        return out
+
+    @staticmethod
+    def _feed(proc: subprocess.Popen, job: EncodeJob) -> None:
+        try:
+            job.feed(proc.stdin)
+        except BrokenPipeError:
+            pass  # encoder exited early (e.g. -shortest / -t reached); its return code decides
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    def run(self, jobs: Sequence[Union[List[str], EncodeJob]], abort: Optional[EncodeAbort] = None) -> None:
+        """Run all jobs; on the first failure stop every other worker and raise.
+
+        Passing a shared ``abort`` lets a caller running several batches (e.g. one per
+        pipelined part) stop all of them at once.
+        """
+        jobs = [j if isinstance(j, EncodeJob) else EncodeJob(j) for j in jobs]
+        stop = abort or EncodeAbort()
+
+        def _one(job: EncodeJob) -> None:
+            with self._slots, span(job.name, output=job.outputs[0] if job.outputs else job.cmd[-1]) as sp:
+                if stop.is_set():
+                    return
+                full = self._with_threads(job.cmd, job.outputs)
+                if sp.recording:
+                    # Machine-readable progress on stdout; parsed into the trace span
+                    full = [full[0], '-progress', 'pipe:1', '-nostats', *full[1:]]
+                stdin = subprocess.PIPE if job.feed else subprocess.DEVNULL
+                proc = subprocess.Popen(full, stdin=stdin, stdout=subprocess.PIPE if sp.recording else None)
+                reader = None
+                if sp.recording:
+                    reader = threading.Thread(target=_read_progress, args=(proc.stdout, sp), daemon=True)
+                    reader.start()
+                stop._track(proc)
+                if job.feed:
+                    try:
+                        self._feed(proc, job)
+                    except Exception:
+                        proc.kill()
+                        proc.wait()
+                        stop._untrack(proc)
+                        raise
+                rc = proc.wait()
+                if reader:
+                    reader.join()
+                stop._untrack(proc)
+                sp.set(returncode=rc)
+            if rc != 0 and not stop.is_set():
+                raise subprocess.CalledProcessError(rc, full)
+
+        if self.workers == 1 or len(jobs) <= 1:
+            for job in jobs:
+                _one(job)
+            return
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(jobs))) as ex:
+            # Each worker runs in a copy of the caller's context so trace spans nest under it
+            futures = [ex.submit(contextvars.copy_context().run, _one, j) for j in jobs]
+            done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+            failed = next((f for f in done if f.exception() is not None), None)
+            if failed is not None:
+                for f in futures:
+                    f.cancel()
+                stop.set()
+                logger.error("Encode failed, stopped remaining workers: %s", failed.exception())
+                raise failed.exception()
+
+
+def run_ffmpeg(cmd: List[str], name: str = 'ffmpeg') -> None:
+    """Run a single ffmpeg command (traced like pool jobs)."""
+    EncodePool().run([EncodeJob(cmd, name=name)])
@@ -0,0 +1,86 @@
+from __future__ import annotations
+import heapq
+import itertools
+import math
+import re
+from collections import Counter
+from typing import Iterable, List, Sequence, Tuple
+import numpy as np
+from ..ingestion.chunks import Chunk
+from .tfidf_index import hasher
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOP = {'the', 'a', 'an', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'is', 'are', 'with', 'how', 'what', 'why'}
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English prose)."""
+    return len(text) // 4 + 1
+
+
+def bm25_scores(query: str, docs: Sequence[str], k1: float = 1.5, b: float = 0.75) -> np.ndarray:
+    """Okapi BM25 relevance of every document to ``query``, computed with sparse ops over hashed terms."""
+    n = len(docs)
+    if n == 0:
+        return np.zeros(0)
+    X = hasher.transform(list(docs)).tocsr()
+    dl = np.asarray(X.sum(axis=1)).ravel()
+    avgdl = dl.mean() or 1.0
+    terms = np.unique(hasher.transform([query]).indices)
+    Xq = X[:, terms].tocoo()
+    df = np.bincount(Xq.col, minlength=len(terms))
+    idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5))
+    f = Xq.data
+    contrib = idf[Xq.col] * f * (k1 + 1) / (f + k1 * (1 - b + b * dl[Xq.row] / avgdl))
+    return np.bincount(Xq.row, weights=contrib, minlength=n)
+
+
+class ContextWindow:
+    """Keeps the chunks most relevant to ``query`` out of a stream, within ``max_chars`` of text.
+
+    Chunks are scored as they arrive (query-term hits, length normalized) and held
+    in a min-heap; once the budget is exceeded the weakest chunks are dropped, so
+    memory stays bounded however large the corpus is.
+    """
+
+    def __init__(self, query: str, max_chars: int = 16 * 1024 * 1024):
+        self.terms = {t for t in tokenize(query) if t not in _STOP}
+        self.max_chars = max_chars
+        self.chars = 0
+        self.seen = 0
+        self._heap: List[Tuple[float, int, Chunk]] = []  # (score, -arrival, chunk): earliest wins ties
+        self._order = itertools.count()
+
+    def score(self, chunk: Chunk) -> float:
+        tokens = tokenize(chunk.text)
+        if not tokens or not self.terms:
+            return 0.0
+        tf = Counter(t for t in tokens if t in self.terms)
+        return sum(1.0 + math.log(c) for c in tf.values()) / math.sqrt(len(tokens))
+
+    def add(self, chunk: Chunk) -> None:
+        self.seen += 1
+        heapq.heappush(self._heap, (self.score(chunk), -next(self._order), chunk))
+        self.chars += len(chunk.text)
+        while self.chars > self.max_chars and self._heap:
+            _, _, dropped = heapq.heappop(self._heap)
+            self.chars -= len(dropped.text)
+
+    def extend(self, chunks: Iterable[Chunk]) -> 'ContextWindow':
+        for chunk in chunks:
+            self.add(chunk)
+        return self
+
+    def chunks(self) -> List[Chunk]:
+        """Retained chunks, most relevant first."""
+        return [c for _, _, c in sorted(self._heap, key=lambda item: (-item[0], -item[1]))]
+
+    def texts(self) -> List[str]:
+        return [c.text for c in self.chunks()]
+
+    def __len__(self) -> int:
+        return len(self._heap)
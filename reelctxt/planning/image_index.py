@@ -0,0 +1,250 @@
+from __future__ import annotations
+import json
+import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+import logging
+import numpy as np
+import scipy.sparse as sp
+from PIL import Image
+from scipy.optimize import linear_sum_assignment
+from ..util.cache import stable_hash
+from .tfidf_index import l2_normalize, hasher
+
+logger = logging.getLogger(__name__)
+
+IMAGE_INDEX_VERSION = 2
+HUE_BINS = 12  # + 1 bin for low-saturation (gray/black/white) pixels
+DUPLICATE_DISTANCE = 6  # dHash bits; at or below this two images count as near-duplicates
+CONTEXT_WEIGHT = 0.5  # weight of the segment's best corpus chunk relative to its own text
+COLOR_WEIGHT = 0.3
+
+# EXIF tags holding human descriptions: ImageDescription, XPTitle, XPComment, XPKeywords, XPSubject
+_TEXT_TAGS = (0x010E, 0x9C9B, 0x9C9C, 0x9C9E, 0x9C9F)
+_COLOR_BINS = {
+    'red': [0, 11], 'orange': [1], 'yellow': [2], 'gold': [2], 'green': [3, 4], 'teal': [5], 'cyan': [5, 6],
+    'blue': [7, 8], 'navy': [8], 'purple': [9], 'violet': [9], 'pink': [10], 'magenta': [10],
+    'white': [HUE_BINS], 'black': [HUE_BINS], 'gray': [HUE_BINS], 'grey': [HUE_BINS],
+}
+
+
+def popcount64(x: np.ndarray) -> np.ndarray:
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(x)
+    return np.unpackbits(x.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1).reshape(x.shape)
+
+
+def dhash(im: Image.Image) -> int:
+    """64-bit difference hash: brightness gradient signs of a 9x8 grayscale thumbnail."""
+    px = np.asarray(im.convert('L').resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    bits = (px[:, 1:] > px[:, :-1]).ravel()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def color_histogram(im: Image.Image) -> np.ndarray:
+    """Share of pixels per hue bin, plus one bin for unsaturated pixels."""
+    hsv = np.asarray(im.convert('RGB').resize((64, 64)).convert('HSV')).reshape(-1, 3)
+    gray = (hsv[:, 1] < 40) | (hsv[:, 2] < 40)
+    bins = np.where(gray, HUE_BINS, (hsv[:, 0].astype(np.int32) * HUE_BINS) // 256)
+    return (np.bincount(bins, minlength=HUE_BINS + 1) / len(bins)).astype(np.float32)
+
+
+def image_text(path: str) -> str:
+    """Searchable words of an image: file/folder name tokens plus EXIF/PNG descriptions."""
+    p = Path(path)
+    words = [re.sub(r'([a-z])([A-Z])', r'\1 \2', part) for part in (p.parent.name, p.stem)]
+    try:
+        with Image.open(path) as src:  # header only: no pixel decode
+            exif = src.getexif()
+            for tag in _TEXT_TAGS:
+                v = exif.get(tag)
+                if isinstance(v, bytes):
+                    v = v.decode('utf-16-le', errors='ignore')
+                if v:
+                    words.append(str(v).strip('\x00'))
+            for key in ('Description', 'Title', 'Comment', 'alt'):
+                if isinstance(src.info.get(key), str):
+                    words.append(src.info[key])
+    except Exception:
+        pass
+    return re.sub(r'[_\-.]+', ' ', ' '.join(words))
+
+
+def _thumbnail(image) -> Image.Image:
+    thumb = getattr(image, 'thumbnail', None) if not isinstance(image, dict) else image.get('thumbnail')
+    if isinstance(thumb, Image.Image):
+        return thumb
+    with Image.open(image['path']) as im:
+        im.draft('RGB', (128, 128))
+        return im.convert('RGB').copy()
+
+
+def library_key(images: Sequence) -> str:
+    ident = []
+    for im in images:
+        st = os.stat(im['path'])
+        ident.append([im['path'], st.st_size, st.st_mtime_ns])
+    return stable_hash([IMAGE_INDEX_VERSION, ident])
+
+
+def evict_libraries(root: str | Path, max_bytes: Optional[int], keep: Optional[Path] = None) -> None:
+    """Delete least recently used library directories under ``root`` until they fit in ``max_bytes``."""
+    if not max_bytes:
+        return
+    libs = []
+    total = 0
+    for lib in Path(root).iterdir():
+        marker = lib / 'paths.json'
+        if not marker.exists():
+            continue
+        size = sum(f.stat().st_size for f in lib.iterdir() if f.is_file())
+        libs.append((marker.stat().st_mtime, size, lib))
+        total += size
+    for _, size, lib in sorted(libs):
+        if total <= max_bytes:
+            break
+        if keep is not None and lib == keep:
+            continue
+        shutil.rmtree(lib, ignore_errors=True)
+        total -= size
+    logger.debug("Image feature indexes under %s: %d bytes", root, total)
+
+
+class ImageFeatureIndex:
+    """Per-library image features as flat NumPy arrays (memory-mapped when loaded from disk).
+
+    ``tokens`` holds hashed path/EXIF words (CSR parts), ``dhash`` 64-bit
+    perceptual hashes (``hashed`` is False where the image could not be decoded)
+    and ``hist`` hue histograms; one row per image.
+    """
+
+    def __init__(self, paths: List[str], tokens: sp.csr_matrix, dhash: np.ndarray, hist: np.ndarray,
+                 hashed: Optional[np.ndarray] = None):
+        self.paths = paths
+        self.tokens = tokens
+        self.dhash = dhash
+        self.hist = hist
+        self.hashed = hashed if hashed is not None else np.ones(len(paths), dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    @classmethod
+    def from_images(cls, images: Sequence, workers: Optional[int] = None) -> 'ImageFeatureIndex':
+        paths = [im['path'] for im in images]
+
+        def features(im) -> Tuple[Optional[int], np.ndarray, str]:
+            try:
+                thumb = _thumbnail(im)
+                return dhash(thumb), color_histogram(thumb), image_text(im['path'])
+            except Exception as e:
+                logger.warning("No visual features for %s: %s", im['path'], e)
+                return None, np.zeros(HUE_BINS + 1, dtype=np.float32), image_text(im['path'])
+
+        with ThreadPoolExecutor(max_workers=workers) as ex:  # decoding releases the GIL
+            rows = list(ex.map(features, images))
+        hashed = np.array([r[0] is not None for r in rows], dtype=bool)
+        hashes = np.array([r[0] or 0 for r in rows], dtype=np.uint64)
+        hist = np.array([r[1] for r in rows], dtype=np.float32).reshape(len(rows), HUE_BINS + 1)
+        tokens = hasher.transform([r[2] for r in rows]).tocsr()
+        return cls(paths, tokens, hashes, hist, hashed)
+
+    def save(self, root: str | Path) -> None:
+        root = Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            'dhash': self.dhash, 'hashed': self.hashed, 'hist': self.hist,
+            'tok_data': self.tokens.data, 'tok_indices': self.tokens.indices, 'tok_indptr': self.tokens.indptr,
+        }
+        for name, arr in arrays.items():
+            tmp = root / f'.tmp-{name}.npy'
+            np.save(tmp, arr)
+            os.replace(tmp, root / f'{name}.npy')
+        (root / '.tmp-paths.json').write_text(json.dumps(self.paths))
+        os.replace(root / '.tmp-paths.json', root / 'paths.json')  # written last: marks the index complete
+
+    @classmethod
+    def load(cls, root: str | Path) -> 'ImageFeatureIndex':
+        root = Path(root)
+        paths = json.loads((root / 'paths.json').read_text())
+        a = {n: np.load(root / f'{n}.npy', mmap_mode='r') for n in ('dhash', 'hashed', 'hist', 'tok_data', 'tok_indices', 'tok_indptr')}
+        tokens = sp.csr_matrix((a['tok_data'], a['tok_indices'], a['tok_indptr']), shape=(len(paths), hasher.n_features))
+        return cls(paths, tokens, a['dhash'], a['hist'], a['hashed'])
+
+    @classmethod
+    def build(cls, images: Sequence, root: Optional[str | Path] = None, max_bytes: Optional[int] = None) -> 'ImageFeatureIndex':
+        """Load the index of this exact library from ``root`` or compute (and save) it.
+
+        Each library version gets its own directory under ``root``; once they add up to
+        more than ``max_bytes`` the least recently used ones are deleted.
+        """
+        if root is None:
+            return cls.from_images(images)
+        lib_root = Path(root) / library_key(images)
+        if (lib_root / 'paths.json').exists():
+            try:
+                index = cls.load(lib_root)
+                os.utime(lib_root / 'paths.json')  # LRU clock
+                return index
+            except (OSError, ValueError) as e:
+                logger.warning("Rebuilding unreadable image index %s: %s", lib_root, e)
+        index = cls.from_images(images)
+        index.save(lib_root)
+        logger.info("Built image feature index for %d images at %s", len(index), lib_root)
+        evict_libraries(root, max_bytes, keep=lib_root)
+        return index
+
+    def score(self, queries: Sequence[str], context: Optional[Sequence[str]] = None) -> np.ndarray:
+        """(segments x images) relevance from text tokens (+ matched corpus context) and color words."""
+        n = len(self.paths)
+        df = np.bincount(np.asarray(self.tokens.indices), minlength=self.tokens.shape[1])
+        idf = (np.log((1.0 + n) / (1.0 + df)) + 1.0).astype(np.float32)
+        docs = l2_normalize(sp.csr_matrix(self.tokens, copy=True).multiply(idf).tocsr())
+
+        def sims(texts: Sequence[str]) -> np.ndarray:
+            Q = hasher.transform(list(texts)).multiply(idf).tocsr()
+            return (l2_normalize(Q) @ docs.T).toarray()
+
+        scores = sims(queries)
+        if context is not None:
+            scores += CONTEXT_WEIGHT * sims(context)
+        for i, q in enumerate(queries):
+            bins = sorted({b for w in re.findall(r'[a-z]+', q.lower()) for b in _COLOR_BINS.get(w, [])})
+            if bins:
+                scores[i] += COLOR_WEIGHT * np.asarray(self.hist)[:, bins].sum(axis=1)
+        return scores
+
+    def assign(self, scores: np.ndarray, candidates: int = 8, dup_distance: int = DUPLICATE_DISTANCE) -> List[int]:
+        """One image per segment maximizing total score, never using two near-duplicates.
+
+        The best ``candidates`` images per segment are pooled, near-duplicates in
+        the pool are collapsed (best-scoring one kept), and the pool is assigned
+        one-to-one with the Hungarian algorithm. Images repeat only when the pool
+        is smaller than the number of segments.
+        """
+        n_seg, n_img = scores.shape
+        k = min(n_img, max(candidates, n_seg))
+        pool = np.unique(np.argpartition(-scores, k - 1, axis=1)[:, :k])
+        pool = pool[np.argsort(-scores[:, pool].max(axis=0), kind='stable')]
+        hashes = np.asarray(self.dhash)[pool]
+        hashed = np.asarray(self.hashed)[pool]
+        keep: List[int] = []
+        kept_hashes: List[int] = []  # images without a perceptual hash are never duplicates
+        for j in range(len(pool)):
+            if hashed[j]:
+                if kept_hashes and popcount64(hashes[kept_hashes] ^ hashes[j]).min() <= dup_distance:
+                    continue
+                kept_hashes.append(j)
+            keep.append(j)
+        pool = pool[keep]
+        reps = -(-n_seg // len(pool))  # tile the pool when there are more segments than images
+        cost = -np.tile(scores[:, pool], (1, reps))
+        cost[:, len(pool):] += 1e3  # reuse only when unavoidable
+        rows, cols = linear_sum_assignment(cost)
+        out = [0] * n_seg
+        for r, c in zip(rows, cols):
+            out[r] = int(pool[c % len(pool)])
+        return out
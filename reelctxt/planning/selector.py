@@ -1,27 +1,34 @@
 from __future__ import annotations
-from typing import List, Dict
+from typing import List, Dict, Optional
 from .segment import Segment
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from .image_index import ImageFeatureIndex
+from .tfidf_index import TfidfIndex
 
 
-def select_images_for_segments(segments: List[Segment], images: List[Dict], corpus_texts: List[str]):
-    # Build a tf-idf matrix over corpus + segment narrations using their text
-    if not images:
+def select_images_for_segments(
+    segments: List[Segment],
+    images: List[Dict],
+    corpus_texts: List[str],
+    index: Optional[TfidfIndex] = None,
+    image_index: Optional[ImageFeatureIndex] = None,
+):
+    """Assign each segment a distinct, relevant image.
+
+    Each segment is matched to its best corpus chunk (batched tf-idf over
+    ``index``); its title/narration/hint plus that chunk are scored against
+    every image's path/EXIF words and colors (``image_index``), and images are
+    assigned one-to-one while skipping near-duplicates.
+    """
+    if not images or not segments:
         return
-    texts = corpus_texts + [s['narration'] for s in segments]
-    vectorizer = TfidfVectorizer(max_features=5000, stop_words='english')
-    X = vectorizer.fit_transform(texts)
-    corpus_X = X[:len(corpus_texts)]
-    seg_X = X[len(corpus_texts):]
+    index = index or TfidfIndex()
+    image_index = image_index or ImageFeatureIndex.from_images(images)
 
-    # For now treat each image equally (no vision embedding). Future: CLIP embeddings.
-    # We just assign images round-robin weighted by segment length.
-    img_paths = [im['path'] for im in images]
-    for i, seg in enumerate(segments):
-        seg_vec = seg_X[i]
-        # similarity to corpus texts to find most representative text, then choose image by index
-        sims = cosine_similarity(seg_vec, corpus_X).ravel()
-        top_idx = int(np.argmax(sims)) if sims.size else 0
-        seg.image = img_paths[top_idx % len(img_paths)]
+    queries = [' '.join(str(s[k]) for k in ('title', 'narration', 'hint')) for s in segments]
+    context = None
+    if corpus_texts:
+        top, _ = index.top_k([s['narration'] for s in segments], corpus_texts, k=1)
+        context = [corpus_texts[int(i)] for i in top[:, 0]]
+    choice = image_index.assign(image_index.score(queries, context))
+    for seg, j in zip(segments, choice):
+        seg.image = image_index.paths[j]
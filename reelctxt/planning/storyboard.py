@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import List
+from typing import Iterator, List
 from ..llm.client import LLMClient
 from .segment import Segment, normalize_segments
 
@@ -7,3 +7,9 @@ from .segment import Segment, normalize_segments
 def build_storyboard(prompt: str, summary: str, segments: int, llm: LLMClient) -> List[Segment]:
     raw = llm.storyboard(prompt, summary, segments=segments)
     return normalize_segments(raw)
+
+
+def iter_storyboard(prompt: str, summary: str, segments: int, llm: LLMClient) -> Iterator[Segment]:
+    """Segments in storyboard order, each yielded as soon as the streamed LLM response contains it."""
+    for raw in llm.storyboard_stream(prompt, summary, segments=segments):
+        yield normalize_segments([raw])[0]
@@ -1,7 +1,64 @@
 from __future__ import annotations
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
+import numpy as np
 from ..llm.client import LLMClient
+from ..util.trace import span
+from .context import bm25_scores, estimate_tokens
 
+SUMMARY_MODES = ('map_reduce', 'simple')
 
-def build_summary(prompt: str, corpus_texts: List[str], llm: LLMClient) -> str:
-    return llm.summarize(prompt, corpus_texts)
+
+def rank_chunks(prompt: str, texts: List[str], top_k: int) -> List[str]:
+    """The ``top_k`` texts by BM25 relevance to the prompt, best first (ties keep corpus order)."""
+    scores = bm25_scores(prompt, texts)
+    order = np.argsort(-scores, kind='stable')[:top_k]
+    return [texts[i] for i in order]
+
+
+def pack_batches(chunks: List[str], batch_tokens: int, token_budget: int) -> List[List[str]]:
+    """Group ranked chunks into map batches of ~``batch_tokens``, stopping at ``token_budget`` in total."""
+    batches: List[List[str]] = []
+    used = current = 0
+    for text in chunks:
+        t = estimate_tokens(text)
+        if used + t > token_budget and batches:
+            break
+        if not batches or current + t > batch_tokens:
+            batches.append([])
+            current = 0
+        batches[-1].append(text)
+        current += t
+        used += t
+    return batches
+
+
+def build_summary(
+    prompt: str,
+    corpus_texts: List[str],
+    llm: LLMClient,
+    mode: str = 'map_reduce',
+    top_k: int = 24,
+    batch_tokens: int = 1500,
+    token_budget: int = 8000,
+    concurrency: int = 4,
+) -> str:
+    """Summarize the corpus for the prompt.
+
+    'map_reduce' ranks chunks with BM25, summarizes the best ones in parallel
+    batches (under ``token_budget`` context tokens) and merges the partial
+    summaries in one reduce call. 'simple' is the single truncated call.
+    """
+    if mode == 'simple' or not llm.available():
+        texts = corpus_texts if mode == 'simple' else rank_chunks(prompt, corpus_texts, top_k)
+        return llm.summarize(prompt, texts)
+    batches = pack_batches(rank_chunks(prompt, corpus_texts, top_k), batch_tokens, token_budget)
+    if len(batches) <= 1:
+        return llm.summarize(prompt, batches[0] if batches else [])
+    with span('summary.map', batches=len(batches)):
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as ex:
+            futures = [ex.submit(contextvars.copy_context().run, llm.summarize_chunks, prompt, b) for b in batches]
+            partials = [f.result() for f in futures]
+    with span('summary.reduce'):
+        return llm.merge_summaries(prompt, partials)
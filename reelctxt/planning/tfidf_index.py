@@ -0,0 +1,148 @@
+from __future__ import annotations
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+import logging
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+
+logger = logging.getLogger(__name__)
+
+TFIDF_VERSION = 2
+_SQL_VARS = 500  # keys per IN (...) lookup, under sqlite's variable limit
+N_FEATURES = 2 ** 20
+
+# Hashed features: the "vocabulary" is the fixed hash space, so new documents are
+# vectorized independently and simply appended -- there is nothing to refit.
+hasher = HashingVectorizer(
+    n_features=N_FEATURES, stop_words='english', alternate_sign=False, norm=None, dtype=np.float32,
+)
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def l2_normalize(X: sp.csr_matrix) -> sp.csr_matrix:
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sp.csr_matrix(sp.diags(1.0 / norms) @ X)
+
+
+class TfidfIndex:
+    """Sparse term-count rows of documents, persisted in sqlite under ``root``.
+
+    Rows are keyed by the document text hash, so repeated jobs over the same
+    corpus only vectorize chunks they have not seen. A job reads and writes only
+    the rows of its own documents (new rows are inserted, nothing is rewritten),
+    and least recently used rows are evicted once the store exceeds ``max_bytes``.
+    IDF is computed over the documents of each query, and all queries are scored
+    in one sparse product.
+    """
+
+    def __init__(self, root: Optional[str | Path] = None, max_bytes: Optional[int] = None):
+        self.root = Path(root) if root else None
+        self.max_bytes = max_bytes
+        path = ':memory:'
+        if self.root:
+            self.root.mkdir(parents=True, exist_ok=True)
+            for legacy in ('counts.npz', 'keys.json'):  # single-matrix layout of version 1
+                (self.root / legacy).unlink(missing_ok=True)
+            path = str(self.root / 'rows.sqlite')
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS rows (
+                key TEXT PRIMARY KEY, indices BLOB, counts BLOB, nbytes INTEGER, used REAL
+            );
+            CREATE INDEX IF NOT EXISTS rows_used ON rows(used);
+            """
+        )
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != str(TFIDF_VERSION):
+            with self.db:
+                self.db.execute('DELETE FROM rows')
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(TFIDF_VERSION),))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.db.execute('SELECT COUNT(*) FROM rows').fetchone()[0]
+
+    def close(self) -> None:
+        self.db.close()
+
+    def vectors(self, texts: Sequence[str]) -> sp.csr_matrix:
+        """Term counts of ``texts`` (one row each), vectorizing and storing the ones not indexed yet."""
+        keys = [text_key(t) for t in texts]
+        unique = list(dict.fromkeys(keys))
+        now = time.time()
+        with self._lock:
+            found: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+            for i in range(0, len(unique), _SQL_VARS):
+                batch = unique[i:i + _SQL_VARS]
+                marks = ','.join('?' * len(batch))
+                for key, indices, counts in self.db.execute(
+                    f'SELECT key, indices, counts FROM rows WHERE key IN ({marks})', batch
+                ):
+                    found[key] = (np.frombuffer(indices, dtype=np.int32), np.frombuffer(counts, dtype=np.float32))
+            new = {k: t for k, t in zip(keys, texts) if k not in found}
+            inserts = []
+            if new:
+                X = hasher.transform(list(new.values())).tocsr()
+                for j, k in enumerate(new):
+                    row = X[j]
+                    indices, counts = row.indices.astype(np.int32), row.data.astype(np.float32)
+                    found[k] = (indices, counts)
+                    inserts.append((k, indices.tobytes(), counts.tobytes(), indices.nbytes + counts.nbytes, now))
+            with self.db:
+                self.db.executemany('INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?, ?)', inserts)
+                self.db.executemany('UPDATE rows SET used = ? WHERE key = ?', [(now, k) for k in unique if k not in new])
+            if inserts:
+                logger.debug("TF-IDF index: +%d documents", len(inserts))
+                self._evict()
+        parts = [found[k] for k in keys]
+        indptr = np.cumsum([0] + [len(i) for i, _ in parts])
+        indices = np.concatenate([i for i, _ in parts]) if parts else np.empty(0, np.int32)
+        data = np.concatenate([c for _, c in parts]) if parts else np.empty(0, np.float32)
+        return sp.csr_matrix((data, indices, indptr), shape=(len(keys), N_FEATURES))
+
+    def _evict(self) -> None:
+        """Drop least recently used rows until the store fits in max_bytes (caller holds the lock)."""
+        if not self.max_bytes:
+            return
+        total = self.db.execute('SELECT COALESCE(SUM(nbytes), 0) FROM rows').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        drop = []
+        for key, nbytes in self.db.execute('SELECT key, nbytes FROM rows ORDER BY used'):
+            if total <= self.max_bytes:
+                break
+            drop.append((key,))
+            total -= nbytes
+        with self.db:
+            self.db.executemany('DELETE FROM rows WHERE key = ?', drop)
+        logger.debug("Evicted %d TF-IDF rows from %s", len(drop), self.root)
+
+    def top_k(self, queries: Sequence[str], documents: Sequence[str], k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """(indices, scores) of the ``k`` best ``documents`` per query, best first; shape (len(queries), k)."""
+        D = self.vectors(documents)
+        n = D.shape[0]
+        df = np.bincount(D.indices, minlength=N_FEATURES)
+        idf = (np.log((1.0 + n) / (1.0 + df)) + 1.0).astype(np.float32)
+        D.data = (1.0 + np.log(D.data)) * idf[D.indices]  # sublinear tf
+        Q = hasher.transform(list(queries))
+        Q.data = (1.0 + np.log(Q.data)) * idf[Q.indices]
+        scores = (l2_normalize(Q) @ l2_normalize(D).T).toarray()
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        return top, np.take_along_axis(scores, top, axis=1)
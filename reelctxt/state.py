@@ -0,0 +1,126 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import logging
+from .util.cache import stable_hash
+
+logger = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+
+# Options each stage's output depends on, and the stages whose outputs feed it. A stage is
+# reused on resume only while both are unchanged; 'compose' depends on every option.
+STAGE_OPTIONS: Dict[str, Sequence[str]] = {
+    'ingest': ('prompt', 'text_folder', 'url', 'crawl_depth', 'crawl_max_pages', 'chunk_chars', 'context_mb', 'image_folder'),
+    'summary': ('prompt', 'summary_mode', 'summary_top_k', 'summary_token_budget'),
+    'storyboard': ('prompt', 'segments'),
+    'images': (),
+    'tts': ('tts_backend', 'tts_model', 'voice', 'tts_rate'),
+}
+STAGE_INPUTS: Dict[str, Sequence[str]] = {
+    'ingest': (),
+    'summary': ('ingest',),
+    'storyboard': ('summary',),
+    'images': ('ingest', 'storyboard'),
+    'tts': ('storyboard',),
+    'compose': ('images', 'tts'),
+}
+# Options that never change what a run produces
+_RUN_ONLY = {'dry_run', 'log_level', 'trace', 'trace_summary', 'no_checkpoint', 'keep_temp', 'pre_cleanup'}
+
+
+def state_path(output: str | Path) -> Path:
+    return Path(output).with_suffix('.state.json')
+
+
+class JobState:
+    """Versioned checkpoint of one reel's stage outputs, rewritten after every stage.
+
+    Each stage entry holds its output, a digest of that output and a key over
+    the stage's options and the digests of its input stages. On resume a stage
+    is restored only when its key still matches, so changing e.g. caption
+    styling re-runs compose alone while a new prompt re-runs everything.
+    Inputs outside the options (edited corpus files, a new LLM model) are not
+    tracked: a resumed stage is taken as is.
+    """
+
+    def __init__(self, path: Optional[str | Path], options: Dict[str, Any], stages: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.path = Path(path) if path else None
+        self.options = options
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._previous = dict(stages or {})  # entries of the run being resumed
+
+    @classmethod
+    def load(cls, path: str | Path) -> 'JobState':
+        data = json.loads(Path(path).read_text(encoding='utf-8'))
+        if data.get('version') != STATE_VERSION:
+            raise ValueError(f"Unsupported job state version {data.get('version')} in {path} (expected {STATE_VERSION})")
+        state = cls(path, data['options'])
+        state.stages = dict(data['stages'])
+        return state
+
+    def key(self, name: str, args: argparse.Namespace) -> str:
+        opts = vars(args)
+        if name == 'compose':
+            options = {k: v for k, v in opts.items() if k not in _RUN_ONLY}
+        else:
+            options = {k: opts.get(k) for k in STAGE_OPTIONS[name]}
+        inputs = [self.stages.get(dep, {}).get('digest') for dep in STAGE_INPUTS[name]]
+        return stable_hash([STATE_VERSION, name, options, inputs])
+
+    def restore(self, name: str, args: argparse.Namespace, valid: Optional[Callable[[Any], bool]] = None) -> Any:
+        """The saved output of ``name`` if its options and inputs are unchanged (and ``valid`` accepts it), else None."""
+        entry = self._previous.get(name)
+        if entry is None or entry.get('key') != self.key(name, args):
+            return None
+        if valid is not None and not valid(entry['output']):
+            return None
+        self.stages[name] = entry
+        logger.info("Resuming: %s unchanged, reusing its checkpoint", name)
+        return entry['output']
+
+    def checkpoint(self, name: str, args: argparse.Namespace, output: Any) -> None:
+        self.stages[name] = {
+            'key': self.key(name, args),
+            'digest': stable_hash(output),
+            'finished_at': time.time(),
+            'output': output,
+        }
+        self.save()
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {'version': STATE_VERSION, 'options': self.options, 'stages': self.stages}
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix='.tmp-', suffix='.json')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1, default=str)
+        os.replace(tmp, self.path)
+
+    def corpus_path(self) -> Optional[Path]:
+        return self.path.with_name(self.path.name.replace('.state.json', '') + '.corpus.json') if self.path else None
+
+    def write_corpus(self, texts: List[str]) -> Optional[Dict[str, str]]:
+        """Store the retained chunk texts next to the state file (they are too large to inline)."""
+        path = self.corpus_path()
+        if path is None:
+            return None
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(texts), encoding='utf-8')
+        return {'file': str(path.resolve()), 'sha256': stable_hash(texts)}
+
+    @staticmethod
+    def read_corpus(ref: Optional[Dict[str, str]]) -> Optional[List[str]]:
+        if not ref:
+            return None
+        try:
+            texts = json.loads(Path(ref['file']).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        return texts if stable_hash(texts) == ref['sha256'] else None
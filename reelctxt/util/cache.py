@@ -0,0 +1,165 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = ".reel_cache"
+
+_hash_memo: Dict[Tuple[str, int, int], str] = {}
+
+
+def file_hash(path: str | Path) -> str:
+    """sha256 of a file's bytes, memoized on (path, size, mtime) so unchanged files are hashed once."""
+    st = os.stat(path)
+    memo_key = (str(path), st.st_size, st.st_mtime_ns)
+    digest = _hash_memo.get(memo_key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        digest = h.hexdigest()
+        _hash_memo[memo_key] = digest
+    return digest
+
+
+def stable_hash(obj: Any) -> str:
+    """sha256 of a JSON-serializable object (sorted keys)."""
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _link_or_copy(src: Path, dest: Path) -> None:
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
+
+class DiskCache:
+    """Content-addressed file store with size-bounded LRU eviction.
+
+    Entries are plain files under ``root/<key[:2]>/<key><suffix>``. Writes land in a
+    temp file and are published with ``os.replace``, and a hit refreshes the file's
+    mtime, which serves as the LRU clock -- so several processes can share one cache
+    directory without locking.
+
+    The directory is scanned once; afterwards this instance keeps a running byte total
+    of its own writes and only rescans (and evicts) once that total is over the limit.
+    """
+
+    def __init__(self, root: str | Path, max_bytes: Optional[int] = None):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._size: Optional[int] = None  # bytes on disk as of the last scan, plus our writes since
+        self._size_lock = threading.Lock()
+
+    def path(self, key: str, suffix: str = '') -> Path:
+        return self.root / key[:2] / f"{key}{suffix}"
+
+    def get(self, key: str, suffix: str = '') -> Optional[Path]:
+        p = self.path(key, suffix)
+        try:
+            os.utime(p)
+        except FileNotFoundError:
+            return None
+        return p
+
+    def fetch(self, key: str, dest: str | Path, suffix: str = '') -> bool:
+        """Materialize a cached entry at ``dest`` (hard link when possible). Returns False on miss."""
+        p = self.get(key, suffix)
+        if p is None:
+            return False
+        dest = Path(dest)
+        dest.unlink(missing_ok=True)
+        try:
+            _link_or_copy(p, dest)
+        except FileNotFoundError:  # evicted by another process in between
+            return False
+        return True
+
+    def _publish(self, key: str, suffix: str, write, evict: bool = True) -> Path:
+        p = self.path(key, suffix)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=p.parent, prefix='.tmp-', suffix=suffix)
+        os.close(fd)
+        try:
+            write(Path(tmp))
+            added = os.path.getsize(tmp)
+            try:
+                added -= p.stat().st_size
+            except FileNotFoundError:
+                pass
+            os.replace(tmp, p)
+            with self._size_lock:
+                if self._size is not None:
+                    self._size += added
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        if evict:
+            self.evict()
+        return p
+
+    def put_file(self, key: str, src: str | Path, suffix: str = '', evict: bool = True, move: bool = False) -> Path:
+        """Store a copy of ``src``, or move it in with ``move=True`` (same filesystem only).
+
+        Never a hard link: a later write to ``src`` (e.g. ffmpeg -y re-encoding a part
+        in place) would otherwise go through the link and change the cached entry.
+        Pass ``evict=False`` when storing many entries and call evict() once afterwards.
+        """
+        def write(tmp: Path):
+            if move:
+                os.replace(src, tmp)
+            else:
+                shutil.copyfile(src, tmp)
+        return self._publish(key, suffix, write, evict)
+
+    def put_bytes(self, key: str, data: bytes, suffix: str = '', evict: bool = True) -> Path:
+        return self._publish(key, suffix, lambda tmp: tmp.write_bytes(data), evict)
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        if not self.max_bytes:
+            return
+        with self._size_lock:
+            if self._size is not None and self._size <= self.max_bytes:
+                return
+        entries, total = self._scan()
+        if total > self.max_bytes:
+            entries.sort()
+            for _, size, p in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    p.unlink()
+                    total -= size
+                except FileNotFoundError:
+                    pass
+            logger.debug("Evicted cache %s down to %d bytes", self.root, total)
+        with self._size_lock:
+            self._size = total
+
+    def _scan(self):
+        entries = []
+        total = 0
+        for p in self.root.rglob('*'):
+            if p.name.startswith('.tmp-'):
+                continue
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            if not p.is_file():
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+        return entries, total
@@ -0,0 +1,78 @@
+from __future__ import annotations
+import contextvars
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+# Stages connected by bounded queues: each stage's worker threads take items as soon
+# as they are submitted, and a full queue blocks the producer (backpressure), so a
+# fast upstream stage cannot pile up unbounded work ahead of a slow one.
+
+_STOP = object()
+
+
+class Stage:
+    """Worker threads running ``fn`` on submitted items, fed through a bounded queue.
+
+    ``submit`` returns a Future and blocks while ``maxsize`` items are waiting
+    (default: twice the worker count). Items run in copies of the contextvars
+    context the stage was created in, so their trace spans nest there. A later
+    stage depends on an earlier one simply by waiting on its Futures.
+    """
+
+    def __init__(self, name: str, fn: Callable[..., Any], workers: int = 1, maxsize: Optional[int] = None):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, int(workers))
+        self._queue: queue.Queue = queue.Queue(maxsize=2 * self.workers if maxsize is None else maxsize)
+        self._closed = False
+        self._context = contextvars.copy_context()
+        self._threads: List[threading.Thread] = [
+            threading.Thread(target=self._work, name=f'{name}-{i}', daemon=True) for i in range(self.workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, *args: Any) -> Future:
+        if self._closed:
+            raise RuntimeError(f"Stage {self.name} is closed")
+        fut: Future = Future()
+        self._queue.put((fut, args))
+        return fut
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            fut, args = item
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(self._context.copy().run(self.fn, *args))
+            except BaseException as e:
+                fut.set_exception(e)
+
+    def close(self, cancel: bool = False) -> None:
+        """Finish queued items (or cancel them) and stop the workers once running items are done."""
+        if self._closed:
+            return
+        self._closed = True
+        if cancel:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                item[0].cancel()
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for t in self._threads:
+            t.join()
+
+    def __enter__(self) -> 'Stage':
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        self.close(cancel=exc_type is not None)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Lightweight nested span tracing. Spans are no-ops unless a Tracer is active in the
+# current context, so instrumented code pays nothing when tracing is off.
+
+TRACE_VERSION = 1
+
+
+@dataclass
+class Span:
+    name: str
+    start: float = 0.0
+    end: Optional[float] = None
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    children: List['Span'] = field(default_factory=list)
+    recording: bool = True
+
+    @property
+    def seconds(self) -> float:
+        return ((self.end if self.end is not None else time.perf_counter()) - self.start)
+
+    def set(self, **attrs: Any) -> None:
+        if self.recording:
+            self.attrs.update(attrs)
+
+    def to_dict(self, t0: float) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'start': round(self.start - t0, 6),
+            'seconds': round(self.seconds, 6),
+            'attrs': self.attrs,
+            'children': [c.to_dict(t0) for c in self.children],
+        }
+
+
+_NULL_SPAN = Span('null', recording=False)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('reelctxt_span', default=None)
+_current_tracer: contextvars.ContextVar[Optional['Tracer']] = contextvars.ContextVar('reelctxt_tracer', default=None)
+
+
+class Tracer:
+    def __init__(self, name: str = 'run'):
+        self.root = Span(name, start=time.perf_counter())
+        self._lock = threading.Lock()
+
+    def _attach(self, parent: Span, child: Span) -> None:
+        with self._lock:
+            parent.children.append(child)
+
+    @contextmanager
+    def activate(self) -> Iterator['Tracer']:
+        """Make this tracer current for the block (and for contexts copied from it)."""
+        t_token = _current_tracer.set(self)
+        s_token = _current_span.set(self.root)
+        try:
+            yield self
+        finally:
+            self.root.end = time.perf_counter()
+            _current_span.reset(s_token)
+            _current_tracer.reset(t_token)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'version': TRACE_VERSION, 'trace': self.root.to_dict(self.root.start)}
+
+    def write(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.write_text(json.dumps(self.to_dict(), indent=2, default=str))
+        return path
+
+    def summary(self) -> str:
+        """Indented per-span wall-clock report."""
+        lines: List[str] = []
+
+        def walk(s: Span, depth: int) -> None:
+            extras = ' '.join(f'{k}={v}' for k, v in s.attrs.items() if isinstance(v, (int, float, str)) and len(str(v)) < 40)
+            lines.append(f"{'  ' * depth}{s.name:<{max(1, 36 - 2 * depth)}} {s.seconds:8.3f}s  {extras}".rstrip())
+            for c in s.children:
+                walk(c, depth + 1)
+
+        walk(self.root, 0)
+        return '\n'.join(lines)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    """Open a child span of the current one; yields a non-recording span when tracing is off."""
+    tracer = _current_tracer.get()
+    parent = _current_span.get()
+    if tracer is None or parent is None:
+        yield _NULL_SPAN
+        return
+    s = Span(name, start=time.perf_counter(), attrs=dict(attrs))
+    tracer._attach(parent, s)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.attrs['error'] = f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        s.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def tracing() -> bool:
+    return _current_tracer.get() is not None
@@ -0,0 +1,36 @@
+import json
+from reelctxt import batch
+from reelctxt.batch import job_argv, run_batch
+
+
+def test_job_argv_maps_manifest_keys_to_cli_options():
+    argv = job_argv({'id': 'x', 'prompt': 'Hi', 'image_folder': 'imgs', 'ken-burns': True,
+                     'no_duck': False, 'url': ['a', 'b'], 'segments': 4})
+    assert argv == ['--prompt', 'Hi', '--image-folder', 'imgs', '--ken-burns',
+                    '--url', 'a', '--url', 'b', '--segments', '4']
+
+
+def test_batch_records_status_and_resumes(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_run(args, ctx):
+        calls.append((args.prompt, ctx.tmp_dir))
+        if args.prompt == 'bad':
+            raise RuntimeError('boom')
+        return args.output
+
+    monkeypatch.setattr(batch, 'run', fake_run)
+    jobs = tmp_path / 'jobs.jsonl'
+    jobs.write_text('\n'.join(json.dumps(j) for j in [
+        {'id': 'a', 'prompt': 'one', 'output': 'a.mp4'},
+        {'id': 'b', 'prompt': 'bad'},
+        {'id': 'c', 'output': 'c.mp4'},  # missing --prompt
+    ]))
+    results = {r['id']: r['status'] for r in run_batch(jobs)}
+    assert results == {'a': 'ok', 'b': 'failed', 'c': 'failed'}
+    assert calls[0][1].name == 'a'
+
+    calls.clear()
+    rerun = run_batch(jobs)
+    assert sorted(r['id'] for r in rerun) == ['b', 'c']
+    assert [c[0] for c in calls] == ['bad']
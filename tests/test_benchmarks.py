@@ -0,0 +1,10 @@
+from benchmarks.pipeline_bench import compare, run_benchmarks
+
+
+def test_benchmark_smoke_offline(tmp_path):
+    report = run_benchmarks([3], repeat=1, segments=3, video=False, workdir=tmp_path)
+    names = {r['bench'] for r in report['results']}
+    assert names == {'load_text_from_files', 'load_text_from_files[indexed]', 'load_images', 'load_images[cached]', 'select_images_for_segments', 'select_images_for_segments[indexed]', 'synthesize_segments', 'synthesize_segments[cached]'}
+    slower = {'results': [dict(r, best=r['best'] * 2) for r in report['results']]}
+    rows = compare(slower, report, threshold=1.5)
+    assert rows and all(r['regression'] for r in rows)
@@ -0,0 +1,79 @@
+import os
+import time
+from reelctxt.util.cache import DiskCache
+from reelctxt.media.compose import part_cache_key
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = DiskCache(tmp_path / 'c', max_bytes=250)
+    for i, key in enumerate(['aa1', 'bb2', 'cc3']):
+        cache.put_bytes(key, b'x' * 100, '.bin')
+        os.utime(cache.path(key, '.bin'), (time.time() + i, time.time() + i))
+    # 'aa1' was evicted when 'cc3' pushed the total over 250 bytes
+    assert cache.get('aa1', '.bin') is None
+    assert cache.get('cc3', '.bin') is not None
+
+
+
+def test_puts_under_the_limit_do_not_rescan(tmp_path, monkeypatch):
+    cache = DiskCache(tmp_path / 'c', max_bytes=1000)
+    scans = []
+    scan = cache._scan
+    monkeypatch.setattr(cache, '_scan', lambda: scans.append(1) or scan())
+    for i in range(9):
+        cache.put_bytes(f'k{i}', b'x' * 100, '.bin')
+    assert len(scans) == 1  # the first put learns the size, the rest only add to it
+    cache.put_bytes('k9', b'x' * 100, '.bin')
+    cache.put_bytes('k9', b'y' * 100, '.bin')  # replacing an entry does not grow the total
+    assert len(scans) == 1
+    cache.put_bytes('k10', b'x' * 100, '.bin')
+    assert len(scans) == 2 and sum(1 for _ in cache.root.rglob('*.bin')) == 10
+
+
+def test_fetch_materializes_copy(tmp_path):
+    cache = DiskCache(tmp_path / 'c')
+    src = tmp_path / 'part.mp4'
+    src.write_bytes(b'video')
+    cache.put_file('abcd', src, '.mp4')
+    dest = tmp_path / 'out.mp4'
+    assert cache.fetch('abcd', dest, '.mp4') and dest.read_bytes() == b'video'
+    assert not cache.fetch('ffff', dest, '.mp4')
+
+
+def test_part_key_tracks_input_content_not_output_path(tmp_path):
+    img = tmp_path / 'a.jpg'
+    img.write_bytes(b'one')
+    cmd = ['ffmpeg', '-y', '-loop', '1', '-i', str(img), '-c:v', 'libx264']
+    k1 = part_cache_key(cmd + ['.reel_tmp/part_0.mp4'])
+    assert k1 == part_cache_key(cmd + ['elsewhere/part_7.mp4'])
+    assert k1 != part_cache_key(cmd[:-1] + ['libx265', 'part_0.mp4'])
+    time.sleep(0.01)
+    img.write_bytes(b'two')
+    assert k1 != part_cache_key(cmd + ['.reel_tmp/part_0.mp4'])
+
+
+def test_reencoded_part_does_not_overwrite_cached_entry(tmp_path, monkeypatch):
+    from reelctxt.media import compose
+    from reelctxt.planning.segment import Segment
+
+    def fake_run(self, jobs):
+        for job in jobs:  # like ffmpeg -y: truncate and rewrite the output in place
+            with open(job.cmd[-1], 'wb') as f:
+                f.write(job.cmd[job.cmd.index('-filter_complex') + 1].encode())
+
+    monkeypatch.setattr(compose.EncodePool, 'run', fake_run)
+    monkeypatch.setattr(compose, 'run_ffmpeg', lambda cmd, name: None)
+    cache = DiskCache(tmp_path / 'segments')
+    opts = dict(segment_cache=cache, tmp_dir=tmp_path / 'tmp', keep_temp=True)
+
+    def render(title):
+        seg = Segment(idx=0, title=title, narration='line', start=0.0, duration=2.0)
+        compose.create_video([seg], ['a.wav'], str(tmp_path / 'out.mp4'), **opts)
+
+    render('First')
+    entries = [p for p in cache.root.rglob('*.mp4')]
+    before = entries[0].read_bytes()
+    render('First')   # cache hit: the part is materialized from the cache entry
+    render('Second')  # miss: re-encoded over the same part path
+    assert entries[0].read_bytes() == before
+    assert b'Second' in (tmp_path / 'tmp' / 'part_0.mp4').read_bytes()
@@ -0,0 +1,87 @@
+from PIL import Image
+
+from reelctxt.media import captions, compose
+from reelctxt.media.captions import load_font, overlay_filters, prepare_caption, rgba, wrap_words
+from reelctxt.media.filters import CaptionStyle, segment_video_chain
+from reelctxt.planning.segment import Segment
+from reelctxt.util.cache import DiskCache
+
+NARRATION = 'Autoscaling adds pods when load rises and removes them again once traffic calms down overnight'
+
+
+def _segment():
+    words = [{'word': w, 'start': 0.4 * i, 'end': 0.4 * i + 0.3} for i, w in enumerate(NARRATION.split())]
+    return Segment(idx=0, title='Scaling', narration=NARRATION, start=0.0, duration=6.0, meta={'words': words})
+
+
+def test_wrap_fits_width_and_caps_lines():
+    font = load_font(None, 52)
+    words = NARRATION.split()
+    lines = wrap_words(words, font, 500)
+    assert 1 < len(lines) <= 3
+    for line in lines:
+        assert font.getlength(' '.join(words[i] for i in line)) <= 500 or len(line) == 1
+    assert [i for line in lines for i in line] == list(range(len(sum(lines, []))))
+    assert rgba('black@0.5') == (0, 0, 0, 128) and rgba('0x2d1f44') == (45, 31, 68, 255)
+
+
+def test_caption_rendered_once_and_reused(tmp_path, monkeypatch):
+    cache = DiskCache(tmp_path / 'captions')
+    style = CaptionStyle(mode='narration', renderer='overlay')
+    first = prepare_caption(_segment(), style, 1080, 1920, cache)
+    with Image.open(first.image) as im:
+        assert im.mode == 'RGBA' and im.width <= 1080 and first.y + im.height < 1920
+    monkeypatch.setattr(captions, 'render_caption', lambda *a: (_ for _ in ()).throw(AssertionError('re-rendered')))
+    assert prepare_caption(_segment(), style, 1080, 1920, cache) == first
+    assert not first.words  # no highlight requested
+    assert 'drawtext' not in ','.join(segment_video_chain(_segment(), 1080, 1920, True, style))
+
+
+def test_word_highlight_windows(tmp_path):
+    style = CaptionStyle(mode='narration', renderer='overlay', highlight=True)
+    overlay = prepare_caption(_segment(), style, 1080, 1920, DiskCache(tmp_path / 'captions'))
+    assert overlay.words and overlay.words[0].start == 0.0
+    # Each word stays lit until the next one starts, so there is no flicker between words
+    assert overlay.words[0].end == overlay.words[1].start == 0.4
+    inputs, fc = overlay_filters(overlay, 2, '[vbg]', '[vcap]')
+    assert inputs.count('-i') == len(overlay.words) + 1
+    assert fc[0].startswith('[vbg][2:v]overlay=') and fc[-1].endswith('[vcap]')
+    assert "enable='between(t,0.400,0.800)'" in fc[2]
+    # Title captions do not follow the narration, so they get no highlights
+    title = prepare_caption(_segment(), CaptionStyle(renderer='overlay', highlight=True), 1080, 1920, DiskCache(tmp_path / 'c2'))
+    assert not title.words
+
+
+def test_parts_composite_caption_inputs_after_narration(tmp_path, monkeypatch):
+    jobs = []
+    monkeypatch.setattr(compose.EncodePool, 'run', lambda self, batch: jobs.extend(batch))
+    monkeypatch.setattr(compose, 'run_ffmpeg', lambda cmd, name: None)
+    compose.create_video([_segment()], ['a.wav'], str(tmp_path / 'out.mp4'), caption_mode='narration',
+                         caption_renderer='overlay', caption_highlight=True, tmp_dir=tmp_path / 'tmp', keep_temp=True)
+    cmd = jobs[0].cmd
+    fc = cmd[cmd.index('-filter_complex') + 1]
+    assert cmd[cmd.index('a.wav') + 2].endswith('.png')
+    assert '[vbg][2:v]overlay' in fc and '[vcap]format=yuv420p[vout]' in fc and 'drawtext' not in fc
+
+
+def test_highlights_wait_for_pipelined_word_timings(tmp_path, monkeypatch):
+    import threading
+    from concurrent.futures import Future
+    monkeypatch.setattr(compose, 'run_ffmpeg', lambda cmd, name: None)
+    monkeypatch.setattr(compose, 'master_audio', lambda *a, **kw: None)
+    timed = _segment().meta['words']
+    style = CaptionStyle(mode='narration', renderer='overlay', highlight=True)
+    expected = 1 + len(prepare_caption(_segment(), style, 1080, 1920, DiskCache(tmp_path / 'ref')).words)
+    for mode in ('parts', 'master'):
+        jobs = []
+        monkeypatch.setattr(compose.EncodePool, 'run', lambda self, batch, abort=None: jobs.extend(batch))
+        seg = _segment().model_copy(update={'meta': {}})
+        pending = Future()
+
+        def synthesize():  # like the TTS stage: words are set just before the narration resolves
+            seg.meta['words'] = timed
+            pending.set_result('a.wav')
+        threading.Timer(0.2, synthesize).start()
+        compose.create_video([seg], [pending], str(tmp_path / 'out.mp4'), caption_mode='narration', audio_mode=mode,
+                             caption_renderer='overlay', caption_highlight=True, tmp_dir=tmp_path / 'tmp', keep_temp=True)
+        assert sum(a.endswith('.png') for a in jobs[0].cmd) == expected > 1, mode
@@ -0,0 +1,31 @@
+import types
+from reelctxt.ingestion.chunks import Chunk, chunk_text, iter_chunks
+from reelctxt.ingestion.text_loader import iter_text_from_files
+from reelctxt.planning.context import ContextWindow
+
+
+def test_chunks_keep_provenance():
+    text = '  ' + ' '.join(f'word{i}' for i in range(300))
+    chunks = list(chunk_text('doc.md', text, size=100))
+    assert all(len(c.text) <= 100 for c in chunks)
+    assert all(text[c.offset:c.offset + len(c.text)] == c.text for c in chunks)
+    assert ' '.join(c.text for c in chunks) == text.strip()
+
+
+def test_window_keeps_relevant_chunks_within_budget():
+    noise = [Chunk('noise', i * 50, 'lorem ipsum dolor sit amet ' * 2) for i in range(1000)]
+    hits = [Chunk('a', 0, 'serverless cost savings explained'), Chunk('b', 0, 'serverless serverless cost')]
+    window = ContextWindow('Serverless cost benefits', max_chars=200).extend(noise[:500] + hits + noise[500:])
+    assert window.seen == 1002 and window.chars <= 200
+    assert [c.source for c in window.chunks()[:2]] == ['b', 'a']
+
+
+def test_streaming_reads_lazily(tmp_path):
+    for i in range(3):
+        (tmp_path / f'{i}.txt').write_text(f'doc {i} ' * 400)
+    docs = iter_text_from_files(tmp_path)
+    assert isinstance(docs, types.GeneratorType)
+    first = next(iter_chunks(docs, size=200))
+    assert first.source.endswith('0.txt') and first.offset == 0
+    indexed = list(iter_chunks(iter_text_from_files(tmp_path, index=tmp_path / 'c.sqlite'), size=200))
+    assert indexed[0] == first and len({c.source for c in indexed}) == 3
@@ -0,0 +1,60 @@
+import os
+from reelctxt.ingestion import corpus_index
+from reelctxt.ingestion.corpus_index import CorpusIndex
+from reelctxt.ingestion.text_loader import load_text_from_files
+
+
+def _write(path, text, mtime=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_incremental_sync(tmp_path, monkeypatch):
+    docs = tmp_path / 'docs'
+    _write(docs / 'a.md', 'alpha', 1_000_000)
+    _write(docs / 'sub' / 'b.html', '<html><body><p>beta</p></body></html>', 1_000_000)
+    _write(docs / 'c.md', 'gamma', 1_000_000)
+    _write(docs / 'skip.bin', 'nope')
+    db = tmp_path / 'corpus.sqlite'
+
+    first = load_text_from_files(docs, index=db)
+    assert [(os.path.relpath(r['path'], docs), r['content']) for r in first] == [
+        ('a.md', 'alpha'), ('c.md', 'gamma'), ('sub/b.html', 'beta'),
+    ]
+
+    reads = []
+    real = corpus_index.read_text_file
+    monkeypatch.setattr(corpus_index, 'read_text_file', lambda p: reads.append(os.path.basename(p)) or real(p))
+    _write(docs / 'a.md', 'alpha', 2_000_000)    # touched, same bytes: hash says unchanged
+    _write(docs / 'c.md', 'GAMMA!', 1_000_000)   # edited
+    (docs / 'sub' / 'b.html').unlink()           # deleted
+    _write(docs / 'd.txt', 'delta')              # new
+    second = load_text_from_files(docs, index=db)
+    assert sorted(reads) == ['c.md', 'd.txt']
+    assert [r['content'] for r in second] == ['alpha', 'GAMMA!', 'delta']
+
+    reads.clear()
+    assert load_text_from_files(docs, index=db) == second and reads == []
+
+
+def test_parallel_parse_matches_serial(tmp_path):
+    docs = tmp_path / 'docs'
+    for i in range(corpus_index.PARALLEL_MIN + 6):
+        _write(docs / f'd{i % 3}' / f'{i}.html', f'<p>doc {i}</p><p>body</p>')
+    serial = CorpusIndex().sync(docs, workers=1)
+    parallel = CorpusIndex(tmp_path / 'c.sqlite').sync(docs, workers=2)
+    assert parallel == serial and serial[0]['content'] == 'doc 0 body'
+
+
+def test_cold_sync_writes_in_bounded_batches(tmp_path, monkeypatch):
+    docs = tmp_path / 'docs'
+    for i in range(7):
+        _write(docs / f'{i}.md', f'doc {i}')
+    monkeypatch.setattr(corpus_index, 'WRITE_BATCH', 3)
+    sizes = []
+    real = CorpusIndex._write
+    monkeypatch.setattr(CorpusIndex, '_write', lambda self, rows: sizes.append(len(rows)) or real(self, rows))
+    records = CorpusIndex(tmp_path / 'c.sqlite').sync(docs, workers=1)
+    assert sizes == [3, 3, 1] and len(records) == 7
@@ -0,0 +1,67 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from reelctxt.ingestion.crawler import crawl, normalize_url
+
+
+class Site(BaseHTTPRequestHandler):
+    # /p<n> links to p<2n> and p<2n+1> (with fragment / trailing-slash variants) and back home
+    active = 0
+    peak = 0
+    hits = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with Site.lock:
+            Site.active += 1
+            Site.peak = max(Site.peak, Site.active)
+            Site.hits.append(self.path)
+        time.sleep(0.05)
+        n = int(self.path.strip('/').lstrip('p') or 1)
+        body = (
+            f"<html><body><p>page {n}</p><script>x=1</script>"
+            f"<a href='/p{2 * n}#top'>a</a><a href='/p{2 * n + 1}/'>b</a><a href='/'>home</a>"
+            f"<a href='https://elsewhere.invalid/'>out</a></body></html>"
+        ).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with Site.lock:
+            Site.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    Site.active = Site.peak = 0
+    Site.hits = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Site)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+
+
+def test_normalize_url():
+    assert normalize_url('HTTP://Example.com:80/a/#frag') == 'http://example.com/a'
+    assert normalize_url('https://example.com') == 'https://example.com/'
+    assert normalize_url('http://example.com:8080/a?q=1') == 'http://example.com:8080/a?q=1'
+
+
+def test_crawl_dedups_and_respects_per_host_limit(site):
+    pages = crawl(site + '/p1', max_pages=100, max_depth=2, concurrency=8, per_host=2)
+    assert [p.url.rsplit('/', 1)[1] for p in pages] == ['p1', 'p2', 'p3', '', 'p4', 'p5', 'p6', 'p7']
+    assert 'page 2' in pages[1].text and 'x=1' not in pages[1].text
+    assert len(Site.hits) == len(set(Site.hits)) == 8
+    assert Site.peak <= 2
+
+
+def test_max_pages_spans_all_seeds(site):
+    other = site.replace('127.0.0.1', 'localhost')
+    pages = crawl([site + '/p1', other + '/p1', site + '/p1/'], max_pages=5, max_depth=3, per_host=4)
+    assert len(pages) == 5 and len(Site.hits) == 5
+    assert pages[0].url == site + '/p1' and pages[1].url == other + '/p1'
@@ -0,0 +1,38 @@
+from reelctxt.planning.segment import Segment
+from reelctxt.media.graph import build_graph
+
+
+def _segments():
+    return [
+        Segment(idx=0, title='One', narration='first line', image='a.jpg', start=0.0, duration=2.0),
+        Segment(idx=1, title='Two', narration='second line', start=2.0, duration=3.0),
+    ]
+
+
+def test_graph_concats_all_segments_in_one_filtergraph():
+    inputs, fc, v, a = build_graph(_segments(), ['a0.wav', 'a1.wav'])
+    assert inputs.count('-i') == 4
+    assert '[v0][a0][v1][a1]concat=n=2:v=1:a=1[vcat][acat]' in fc
+    assert (v, a) == ('[vcat]', '[acat]')
+
+
+def test_graph_continuous_music_chain():
+    inputs, fc, v, a = build_graph(_segments(), ['a0.wav', 'a1.wav'], music_path='bed.mp3', music_outro_path='out.wav')
+    assert inputs[-4:] == ['-i', 'bed.mp3', '-i', 'out.wav']
+    assert '[4:a]aloop' in fc and '[5:a]adelay' in fc
+    assert 'sidechaincompress' in fc and a == '[mixed]'
+
+
+def test_graph_per_segment_music_splits_bed():
+    _, fc, _, a = build_graph(_segments(), ['a0.wav', 'a1.wav'], music_path='bed.mp3', continuous_music=False)
+    assert '[4:a]asplit=2[ms0][ms1]' in fc
+    assert a == '[acat]'
+
+
+def test_draft_profile_scales_whole_timeline():
+    from reelctxt.media.profiles import get_profile
+    draft = get_profile('draft')
+    _, fc, _, _ = build_graph(_segments(), ['a0.wav', 'a1.wav'], width=draft.width, height=draft.height, fps=draft.fps)
+    assert 'scale=540:960' in fc and 'fps=15' in fc and 'fontsize=26' in fc
+    assert '-preset' in draft.video_codec_args() and not draft.loudnorm
+    assert get_profile('final').video_codec_args() == ['-c:v', 'libx264', '-pix_fmt', 'yuv420p']
@@ -0,0 +1,74 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from reelctxt.ingestion import http_cache
+from reelctxt.ingestion.crawler import crawl
+from reelctxt.ingestion.http_cache import HttpCache
+from reelctxt.ingestion.text_loader import fetch_url
+
+
+class Blog(BaseHTTPRequestHandler):
+    version = 'v1'
+    requests = []
+
+    def do_GET(self):
+        etag = f'"{Blog.version}"'
+        if self.headers.get('If-None-Match') == etag:
+            Blog.requests.append((self.path, 304))
+            self.send_response(304)
+            self.end_headers()
+            return
+        Blog.requests.append((self.path, 200))
+        body = f"<html><body><p>{self.path} {Blog.version}</p><a href='/a'>a</a><a href='/b'>b</a></body></html>".encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def blog():
+    Blog.version = 'v1'
+    Blog.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Blog)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    calls = []
+    real = http_cache.extract_html
+    monkeypatch.setattr(http_cache, 'extract_html', lambda html, base: calls.append(base) or real(html, base))
+    return calls
+
+
+def test_recrawl_revalidates_without_parsing(blog, parses, tmp_path):
+    first = crawl(blog + '/', max_depth=1, cache=HttpCache(tmp_path, ttl=0))
+    assert len(first) == 3 and len(parses) == 3
+
+    Blog.requests.clear()
+    cache = HttpCache(tmp_path, ttl=0)
+    again = crawl(blog + '/', max_depth=1, cache=cache)
+    assert [p.text for p in again] == [p.text for p in first]
+    assert {status for _, status in Blog.requests} == {304}
+    assert len(parses) == 3 and cache.stats['revalidated'] == 3
+
+    Blog.requests.clear()
+    cache = HttpCache(tmp_path, ttl=3600)
+    crawl(blog + '/', max_depth=1, cache=cache)
+    assert Blog.requests == [] and cache.stats['fresh'] == 3
+
+
+def test_changed_page_is_downloaded_again(blog, parses, tmp_path):
+    cache = HttpCache(tmp_path, ttl=0)
+    assert 'v1' in fetch_url(blog + '/a', cache=cache)
+    Blog.version = 'v2'
+    assert 'v2' in fetch_url(blog + '/a/#x', cache=cache)  # same normalized key, stale ETag
+    assert Blog.requests == [('/a', 200), ('/a/', 200)] and len(parses) == 2
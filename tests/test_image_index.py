@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+from PIL import Image, ImageEnhance
+from reelctxt.ingestion.image_loader import load_images
+from reelctxt.planning.image_index import ImageFeatureIndex
+from reelctxt.planning.segment import Segment
+from reelctxt.planning.selector import select_images_for_segments
+
+
+def _image(path, seed, tint):
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 120, (6, 8, 3)).astype(np.uint8) + np.array(tint, dtype=np.uint8)
+    Image.fromarray(small).resize((320, 240), Image.BICUBIC).save(path)
+
+
+def _library(tmp_path):
+    lib = tmp_path / 'lib'
+    lib.mkdir()
+    _image(lib / 'ocean_waves.jpg', 1, (0, 40, 130))
+    copy = Image.open(lib / 'ocean_waves.jpg')
+    ImageEnhance.Brightness(copy).enhance(1.05).save(lib / 'ocean_waves_copy.jpg')
+    _image(lib / 'forest_trail.jpg', 2, (10, 130, 10))
+    _image(lib / 'IMG_0042.jpg', 3, (135, 0, 0))
+    return lib
+
+
+def _seg(i, narration):
+    return Segment(idx=i, title=f'Segment {i + 1}', narration=narration)
+
+
+def test_assignment_is_relevant_distinct_and_skips_near_duplicates(tmp_path):
+    images = load_images(_library(tmp_path))
+    segs = [_seg(0, 'Ocean waves roll in'), _seg(1, 'More ocean waves at dusk'), _seg(2, 'A forest trail')]
+    select_images_for_segments(segs, images, [])
+    names = [s.image.rsplit('/', 1)[1] for s in segs]
+    # one ocean shot only: the copy is a near-duplicate, so the other wave segment gets a different image
+    assert len({'ocean_waves.jpg', 'ocean_waves_copy.jpg'} & set(names[:2])) == 1
+    assert len(set(names)) == 3 and names[2] == 'forest_trail.jpg'
+
+    red = [_seg(0, 'Everything turns red')]
+    select_images_for_segments(red, images, [])
+    assert red[0].image.endswith('IMG_0042.jpg')  # color histogram match
+
+
+def test_feature_index_persists_memory_mapped(tmp_path):
+    images = load_images(_library(tmp_path))
+    built = ImageFeatureIndex.build(images, root=tmp_path / 'features')
+    loaded = ImageFeatureIndex.build(images, root=tmp_path / 'features')
+    assert isinstance(loaded.dhash, np.memmap) and loaded.paths == built.paths
+    assert np.array_equal(loaded.dhash, built.dhash)
+    q = ['forest trail']
+    assert np.allclose(loaded.score(q), built.score(q))
+
+
+def test_unreadable_images_are_not_duplicates_of_each_other(tmp_path):
+    lib = _library(tmp_path)
+    for name in ('broken_a.jpg', 'broken_b.jpg'):
+        (lib / name).write_bytes(b'not a jpeg')
+    images = [{'path': str(p)} for p in sorted(lib.iterdir())]
+    index = ImageFeatureIndex.from_images(images)
+    broken = [i for i, p in enumerate(index.paths) if 'broken' in p]
+    assert not index.hashed[broken].any() and index.hashed.sum() == 4
+    scores = np.zeros((2, len(images)))
+    scores[0, broken[0]] = scores[1, broken[1]] = 1.0
+    assert sorted(index.assign(scores)) == broken
+
+
+def test_old_library_indexes_are_evicted(tmp_path):
+    root = tmp_path / 'features'
+    lib = _library(tmp_path)
+    first = ImageFeatureIndex.build(load_images(lib), root=root)
+    size = sum(f.stat().st_size for d in root.iterdir() for f in d.iterdir())
+    _image(lib / 'desert.jpg', 4, (120, 100, 40))
+    ImageFeatureIndex.build(load_images(lib), root=root, max_bytes=size + size // 2)
+    libs = list(root.iterdir())
+    assert len(libs) == 1 and len(json.loads((libs[0] / 'paths.json').read_text())) == len(first) + 1
@@ -0,0 +1,42 @@
+import os
+from PIL import Image
+from reelctxt.ingestion import image_loader
+from reelctxt.ingestion.image_loader import ImageRecord, load_images
+
+
+def _jpeg(path, size, orientation=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    Image.new('RGB', size, (200, 30, 30)).save(path, exif=exif.tobytes())
+
+
+def test_records_are_lean_and_cached(tmp_path, monkeypatch):
+    lib = tmp_path / 'lib'
+    _jpeg(lib / 'wide.jpg', (2000, 1000))
+    _jpeg(lib / 'sub' / 'rotated.jpg', (1200, 800), orientation=6)
+    (lib / 'notes.txt').write_text('not an image')
+    store = tmp_path / 'images.sqlite'
+
+    recs = load_images(lib, max_dim=256, store=store)
+    assert [os.path.relpath(r.path, lib) for r in recs] == ['sub/rotated.jpg', 'wide.jpg']
+    rotated, wide = recs
+    assert (rotated.width, rotated.height, rotated.orientation) == (800, 1200, 6)
+    assert wide['path'] == wide.path and wide.thumbnail.size == (256, 128)
+    assert rotated.thumbnail.size == (171, 256)  # EXIF orientation applied
+
+    decoded = []
+    monkeypatch.setattr(image_loader, 'make_thumbnail', lambda p, d: decoded.append(p) or (1, 1, 1, b''))
+    again = load_images(lib, max_dim=256, store=store)
+    assert decoded == [] and [(r.path, r.width) for r in again] == [(r.path, r.width) for r in recs]
+
+    (lib / 'wide.jpg').unlink()
+    assert [r.path for r in load_images(lib, max_dim=256, store=store)] == [rotated.path]
+
+
+def test_unreadable_image_is_skipped(tmp_path):
+    (tmp_path / 'broken.jpg').write_bytes(b'not a jpeg')
+    _jpeg(tmp_path / 'ok.png', (10, 10))
+    recs = load_images(tmp_path)
+    assert len(recs) == 1 and isinstance(recs[0], ImageRecord) and recs[0].thumbnail.size == (10, 10)
@@ -0,0 +1,27 @@
+import numpy as np
+from PIL import Image
+from reelctxt.media.kenburns import ken_burns_boxes, ken_burns_frames
+
+
+def test_center_zoom_boxes_are_subpixel_and_centered():
+    boxes = ken_burns_boxes((1000, 2000), frames=90, zoom=1.1)
+    assert boxes.shape == (90, 4)
+    np.testing.assert_allclose(boxes[0], [0, 0, 1000, 2000])
+    np.testing.assert_allclose(boxes[-1, 2] - boxes[-1, 0], 1000 / 1.1)
+    np.testing.assert_allclose((boxes[:, 0] + boxes[:, 2]) / 2, 500)
+    assert np.any(boxes[:, 0] % 1 != 0)  # not rounded to whole pixels
+
+
+def test_pan_and_focus_paths_stay_inside_source():
+    for path in ('left', 'right', 'up', 'down', 'focus'):
+        boxes = ken_burns_boxes((1000, 2000), frames=30, zoom=1.2, path=path, focus=(1.0, 0.0))
+        assert boxes[:, :2].min() >= 0
+        assert boxes[:, 2].max() <= 1000 + 1e-9 and boxes[:, 3].max() <= 2000 + 1e-9
+    right = ken_burns_boxes((1000, 2000), frames=30, zoom=1.2, path='right')
+    assert right[-1, 0] > right[0, 0]
+
+
+def test_frames_are_raw_rgb_at_output_size():
+    frames = list(ken_burns_frames(Image.new('RGB', (120, 200)), duration=0.5, width=60, height=100, fps=10))
+    assert len(frames) == 5
+    assert all(len(f) == 60 * 100 * 3 for f in frames)
@@ -0,0 +1,82 @@
+import json
+from concurrent.futures import Future
+
+from reelctxt.media import compose, master
+from reelctxt.media.master import (
+    loudnorm_filter, loudnorm_key, measure_loudness, narration_timeline, parse_loudnorm, segment_frames,
+)
+from reelctxt.planning.segment import Segment
+from reelctxt.util.cache import DiskCache
+
+
+def _segments():
+    return [
+        Segment(idx=0, title='One', narration='first line', start=0.0, duration=2.01),
+        Segment(idx=1, title='Two', narration='second line', start=2.01, duration=3.02),
+        Segment(idx=2, title='Three', narration='third line', start=5.03, duration=2.99),
+    ]
+
+
+def test_segment_frames_do_not_drift():
+    segs = _segments()
+    frames = segment_frames(segs, 30)
+    end = segs[-1].start + segs[-1].duration
+    assert sum(frames) == round(end * 30)
+    # Every part boundary is within half a frame of its segment's start
+    t = 0
+    for seg, n in zip(segs, frames):
+        assert abs(t / 30 - seg.start) <= 0.5 / 30
+        t += n
+
+
+def test_narration_timeline_places_lines_to_the_sample():
+    fc = narration_timeline(_segments(), 1)
+    assert fc[0] == '[1:a]aresample=48000,atrim=end_sample=96480,adelay=delays=0S:all=1[n0]'
+    assert 'adelay=delays=96480S:all=1[n1]' in fc[1]
+    assert fc[-1].startswith('[n0][n1][n2]amix=inputs=3:normalize=0')
+    assert fc[-1].endswith('apad=whole_len=384960,atrim=end_sample=384960[narr]')
+
+
+def test_loudnorm_second_pass_uses_measurements():
+    stderr = 'frame stats...\n[Parsed_loudnorm_3 @ 0x1]\n' + json.dumps({
+        'input_i': '-23.10', 'input_tp': '-4.20', 'input_lra': '6.30', 'input_thresh': '-33.50',
+        'output_i': '-16.0', 'target_offset': '0.12',
+    })
+    measured = parse_loudnorm(stderr)
+    assert measured['input_i'] == '-23.10' and 'output_i' not in measured
+    f = loudnorm_filter(measured)
+    assert f.startswith('loudnorm=I=-16:LRA=11:TP=-1.5:measured_I=-23.10')
+    assert 'offset=0.12:linear=true' in f and f.endswith('aresample=48000')
+
+
+def test_cached_measurement_skips_ffmpeg(tmp_path, monkeypatch):
+    segs = _segments()
+    wavs = []
+    for i in range(3):
+        p = tmp_path / f'{i}.wav'
+        p.write_bytes(b'RIFF' + bytes([i]))
+        wavs.append(str(p))
+    cache = DiskCache(tmp_path / 'loudnorm')
+    saved = {'input_i': '-20', 'input_tp': '-2', 'input_lra': '5', 'input_thresh': '-30', 'target_offset': '0'}
+    cache.put_bytes(loudnorm_key(segs, wavs), json.dumps(saved).encode(), '.json')
+    monkeypatch.setattr(master.subprocess, 'run', lambda *a, **k: (_ for _ in ()).throw(AssertionError('ran ffmpeg')))
+    assert measure_loudness(segs, wavs, cache) == saved
+    # Moving a line on the timeline invalidates the measurement
+    moved = [s.model_copy(update={'start': s.start + 0.5}) for s in segs]
+    assert loudnorm_key(moved, wavs) != loudnorm_key(segs, wavs)
+
+
+def test_master_mode_encodes_video_only_parts(tmp_path, monkeypatch):
+    jobs, mastered = [], []
+    monkeypatch.setattr(compose.EncodePool, 'run', lambda self, batch: jobs.extend(batch))
+    monkeypatch.setattr(compose, 'run_ffmpeg', lambda cmd, name: None)
+    monkeypatch.setattr(compose, 'master_audio', lambda segs, audio, video, out, profile, **kw: mastered.append(audio))
+    pending = Future()  # narration not synthesized yet: parts must not wait for it
+    pending.set_result('late.wav')
+    compose.create_video(_segments(), ['a.wav', 'b.wav', pending], str(tmp_path / 'out.mp4'),
+                         audio_mode='master', tmp_dir=tmp_path / 'tmp', keep_temp=True)
+    assert len(jobs) == 3
+    for job, n in zip(jobs, segment_frames(_segments(), compose.FPS)):
+        assert '-an' in job.cmd and '.wav' not in ' '.join(job.cmd)
+        assert job.cmd[job.cmd.index('-frames:v') + 1] == str(n)
+    assert mastered == [['a.wav', 'b.wav', 'late.wav']]
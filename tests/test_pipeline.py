@@ -0,0 +1,74 @@
+import threading
+import time
+import pytest
+from reelctxt.llm.stream import iter_json_array
+from reelctxt.util.pipeline import Stage
+from reelctxt.util.trace import Tracer, span
+
+
+def test_json_array_elements_as_they_complete():
+    text = 'Sure:\n```json\n[{"idx": 0, "title": "A [b]"}, {"idx": 1, "title": "x\\"}"},\n 3, {"idx": 2}]\n```'
+    expected = [{'idx': 0, 'title': 'A [b]'}, {'idx': 1, 'title': 'x"}'}, 3, {'idx': 2}]
+    for step in (1, 3, 7, len(text)):
+        assert list(iter_json_array(text[i:i + step] for i in range(0, len(text), step))) == expected
+
+    seen = []
+
+    def deltas():
+        yield '[{"idx": 0}, {"id'
+        seen.append('first element already out')
+        yield 'x": 1}'
+
+    out = iter_json_array(deltas())
+    assert next(out) == {'idx': 0} and not seen
+    assert list(out) == [{'idx': 1}]
+    assert list(iter_json_array(['[{"idx": 0}, {"idx": 1, "ti'])) == [{'idx': 0}]  # truncated tail dropped
+    assert list(iter_json_array(['not json at all'])) == []
+
+
+def test_stage_backpressure_and_order():
+    gate = threading.Event()
+    stage = Stage('slow', lambda x: (gate.wait(), x * 2)[1], workers=1, maxsize=2)
+    futures = [stage.submit(i) for i in range(3)]  # 1 running + 2 queued
+    t = threading.Thread(target=lambda: futures.append(stage.submit(3)))
+    t.start()
+    time.sleep(0.1)
+    assert t.is_alive()  # queue full: the producer waits
+    gate.set()
+    t.join(5)
+    stage.close()
+    assert [f.result() for f in futures] == [0, 2, 4, 6]
+
+
+def test_stage_failure_and_cancel():
+    def fn(x):
+        if x == 0:
+            raise ValueError('boom')
+        time.sleep(0.05)
+        return x
+
+    with pytest.raises(ValueError):
+        with Stage('s', fn, workers=1, maxsize=10) as stage:
+            futures = [stage.submit(i) for i in range(10)]
+            futures[0].result()
+    assert any(f.cancelled() for f in futures[1:])
+
+
+def test_downstream_stage_waits_on_upstream_futures():
+    def synth(i):
+        with span('tts', idx=i):
+            time.sleep(0.05 * (3 - i))
+            return f'wav{i}'
+
+    tracer = Tracer()
+    with tracer.activate():
+        with span('pipeline'):
+            tts = Stage('tts', synth, workers=3)
+        with span('elsewhere'):
+            encode = Stage('encode', lambda fut: fut.result() + '.mp4', workers=2)
+            parts = [encode.submit(tts.submit(i)) for i in range(3)]
+            assert [p.result() for p in parts] == ['wav0.mp4', 'wav1.mp4', 'wav2.mp4']
+    tts.close()
+    encode.close()
+    pipeline, elsewhere = tracer.root.children
+    assert sorted(c.attrs['idx'] for c in pipeline.children) == [0, 1, 2] and not elsewhere.children
@@ -0,0 +1,23 @@
+from PIL import Image
+from reelctxt.util.cache import DiskCache
+from reelctxt.media.plates import prepare_plate, prepare_plates
+
+
+def test_plate_is_cover_cropped_and_cached(tmp_path):
+    src = tmp_path / 'wide.jpg'
+    Image.new('RGB', (1600, 900), (200, 10, 10)).save(src)
+    cache = DiskCache(tmp_path / 'plates')
+    plate = prepare_plate(src, 108, 192, cache)
+    with Image.open(plate) as im:
+        assert im.size == (108, 192)
+    mtime = (tmp_path / plate).stat().st_mtime_ns
+    assert prepare_plate(src, 108, 192, cache) == plate
+    assert prepare_plate(src, 192, 192, cache) != plate
+    assert (tmp_path / plate).stat().st_mtime_ns >= mtime
+
+
+def test_prepare_plates_dedupes_sources(tmp_path):
+    src = tmp_path / 'a.png'
+    Image.new('RGB', (300, 300)).save(src)
+    plates = prepare_plates([str(src), str(src)], 54, 96, DiskCache(tmp_path / 'plates'))
+    assert list(plates) == [str(src)]
@@ -0,0 +1,127 @@
+import json
+import wave
+
+import pytest
+
+from reelctxt.media import compose, renditions
+from reelctxt.media.renditions import RENDITIONS, mux_command, parse_rendition, parse_renditions, plan_renditions
+from reelctxt.planning.segment import Segment
+from reelctxt.util.cache import DiskCache
+
+
+def _outputs(cmd):
+    return [a for prev, a in zip([''] + cmd, cmd) if a.endswith('.mp4') and prev != '-i']
+
+
+def _fake_run(jobs_seen):
+    def run(self, batch):
+        for job in batch:
+            jobs_seen.append(job)
+            for out in _outputs(job.cmd):
+                with open(out, 'wb') as f:
+                    f.write(out.encode())
+    return run
+
+
+def _segs(n=2):
+    return [Segment(idx=i, title=f'S{i}', narration='line', start=2.0 * i, duration=2.0) for i in range(n)]
+
+
+def _wav(path, seconds):
+    with wave.open(str(path), 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(8000)
+        w.writeframes(b'\0\0' * int(8000 * seconds))
+    return str(path)
+
+
+def test_parts_split_renditions_from_their_own_frames(tmp_path, monkeypatch):
+    jobs, muxes = [], []
+    monkeypatch.setattr(compose.EncodePool, 'run', _fake_run(jobs))
+    monkeypatch.setattr(compose, 'run_ffmpeg', lambda cmd, name: None)
+    monkeypatch.setattr(renditions, 'run_ffmpeg', lambda cmd, name: muxes.append(cmd))
+    out = tmp_path / 'reel.mp4'
+    narration = _wav(tmp_path / 'a.wav', 1.5)  # shorter than the segment: -shortest cuts the part there
+    compose.create_video(_segs(), [narration, 'b.wav'], str(out), renditions=['vertical', 'square', 'preview'],
+                         tmp_dir=tmp_path / 'tmp', keep_temp=True)
+    cmd = jobs[0].cmd
+    fc = cmd[cmd.index('-filter_complex') + 1]
+    # vertical is the reel itself; the square crop would cut the captions, so it is padded
+    assert '[vout]split=3[vmain][rs0][rs1]' in fc and 'asplit' not in fc
+    assert '[rs0]scale=1080:1080:force_original_aspect_ratio=decrease,pad=1080:1080' in fc
+    assert [o.rsplit('/', 1)[1] for o in _outputs(cmd)] == ['part_0.mp4', 'part_0.square.mp4', 'part_0.preview.mp4']
+    preview = cmd[cmd.index(_outputs(cmd)[1]) + 1:]
+    # Rendition parts are video only, cut where the reel's part ends
+    assert preview[:5] == ['-map', '[rv1]', '-t', '1.500', '-an'] and preview[preview.index('-b:v') + 1] == '400k'
+    assert cmd.count('-map') == 4 and jobs[1].cmd[jobs[1].cmd.index('[rv0]') + 2] == '2.000'
+
+    # Joined by stream copy; only the audio comes from the finished reel
+    assert len(muxes) == 1
+    mux = muxes[0]
+    assert mux[mux.index('-i') + 1] == str(out) and mux.count('concat') == 2
+    assert mux[mux.index('-map') + 1] == '1:v' and mux.count('-c:v') == 2 and 'libx264' not in mux
+    assert mux[mux.index(str(tmp_path / 'reel.preview.mp4')) - 4:][:4] == ['-c:a', 'aac', '-b:a', '64k']
+    assert (tmp_path / 'tmp' / 'list.square.txt').read_text().count('part_') == 2
+
+    # The sidecar stays the segment list; the outputs are listed next to it
+    assert json.loads(out.with_suffix('.json').read_text())[0]['title'] == 'S0'
+    manifest = tmp_path / 'reel.renditions.json'
+    assert [(r['name'], r['path'], r.get('fit')) for r in json.loads(manifest.read_text())] == [
+        ('final', str(out), None), ('square', str(tmp_path / 'reel.square.mp4'), 'pad'),
+        ('preview', str(tmp_path / 'reel.preview.mp4'), 'crop'),
+    ]
+    compose.create_video(_segs(), ['a.wav', 'b.wav'], str(out), tmp_dir=tmp_path / 'tmp', keep_temp=True)
+    assert not manifest.exists()
+
+
+def test_rendition_parts_are_cached_with_the_reel_parts(tmp_path, monkeypatch):
+    jobs = []
+    monkeypatch.setattr(compose.EncodePool, 'run', _fake_run(jobs))
+    monkeypatch.setattr(compose, 'run_ffmpeg', lambda cmd, name: None)
+    monkeypatch.setattr(renditions, 'run_ffmpeg', lambda cmd, name: None)
+    opts = dict(segment_cache=DiskCache(tmp_path / 'segments'), tmp_dir=tmp_path / 'tmp', keep_temp=True)
+    render = lambda **kw: compose.create_video(_segs(1), ['a.wav'], str(tmp_path / 'reel.mp4'), **opts, **kw)
+    render()
+    render(renditions=['preview'])  # the reel's part is cached, the preview part is not
+    assert len(jobs) == 2 and len(_outputs(jobs[1].cmd)) == 2
+    render(renditions=['preview'])
+    render()
+    assert len(jobs) == 2
+
+
+def test_graph_engine_writes_renditions_in_its_one_process(tmp_path, monkeypatch):
+    jobs = []
+    monkeypatch.setattr(compose.EncodePool, 'run', _fake_run(jobs))
+    monkeypatch.setattr(renditions, 'run_ffmpeg', lambda cmd, name: pytest.fail('re-encoded the reel'))
+    out = tmp_path / 'reel.mp4'
+    compose.create_video(_segs(), ['a.wav', 'b.wav'], str(out), engine='graph', captions=False, renditions=['square'])
+    cmd = jobs[0].cmd
+    fc = cmd[cmd.index('-filter_complex') + 1]
+    assert '[vcat]split=2[vmain][rs0]' in fc and 'crop=1080:1080' in fc
+    assert _outputs(cmd) == [str(out), str(tmp_path / 'reel.square.mp4')]
+
+
+def test_plan_skips_the_reel_size_and_keeps_captions():
+    assert [r.name for r in plan_renditions(['vertical', 'square'], 1080, 1920)] == ['square']
+    assert plan_renditions(['square'], 1080, 1920)[0].fit == 'crop'
+    assert plan_renditions(['square'], 1080, 1920, captions=True)[0].fit == 'pad'
+    # An explicit fit is the user's call, captions or not
+    assert plan_renditions(['sq=1080x1080:crop'], 1080, 1920, captions=True)[0].fit == 'crop'
+    # Same aspect ratio: scaling alone cuts nothing
+    assert plan_renditions(['small=540x960'], 1080, 1920, captions=True)[0].fit == 'crop'
+    cmd = mux_command('reel.mp4', ['a.txt'], parse_renditions(['landscape']), 'out/reel.mp4')
+    assert cmd[-5:] == ['-c:v', 'copy', '-c:a', 'copy', 'out/reel.landscape.mp4']
+
+
+def test_parse_custom_and_invalid_specs():
+    r = parse_rendition('story=720x1280:pad:1.5M')
+    assert (r.width, r.height, r.fit, r.video_bitrate) == (720, 1280, 'pad', '1.5M')
+    assert '-bufsize' in r.video_args() and '3M' in r.video_args()
+    assert parse_rendition('wide=1280x720').fit is None
+    assert parse_rendition('square') is RENDITIONS['square']
+    for bad in ('huge', 'x=12', 'x=10x10:stretch'):
+        with pytest.raises(ValueError):
+            parse_rendition(bad)
+    with pytest.raises(ValueError):
+        parse_renditions(['square', 'square=500x500'])
@@ -0,0 +1,117 @@
+import json
+from concurrent.futures import Future
+from pathlib import Path
+import pytest
+from reelctxt import cli
+from reelctxt.state import JobState, state_path
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Count stage work; compose is faked since it needs ffmpeg."""
+    calls = {'summary': 0, 'storyboard': 0, 'tts': 0, 'compose': []}
+
+    def counting(name, fn):
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return fn(*args, **kwargs)
+        return wrapper
+
+    def fake_create_video(segments, audio_paths, output_path, **kwargs):
+        audio = [a.result() if isinstance(a, Future) else a for a in audio_paths]
+        assert all(Path(a).is_file() for a in audio)
+        calls['compose'].append(kwargs)
+        Path(output_path).write_bytes(b'mp4')
+        return output_path
+
+    monkeypatch.setattr(cli, 'build_summary', counting('summary', cli.build_summary))
+    monkeypatch.setattr(cli, 'iter_storyboard', counting('storyboard', cli.iter_storyboard))
+    monkeypatch.setattr(cli, 'build_storyboard', counting('storyboard', cli.build_storyboard))
+    monkeypatch.setattr(cli, '_synthesize', counting('tts', cli._synthesize))
+    monkeypatch.setattr(cli, 'create_video', fake_create_video)
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    return calls
+
+
+def _first_run(tmp_path, *extra):
+    corpus = tmp_path / 'corpus'
+    corpus.mkdir()
+    (corpus / 'a.txt').write_text('Serverless functions scale to zero. Billing is per request. Cold starts add latency. ' * 5)
+    out = tmp_path / 'reel.mp4'
+    argv = ['--prompt', 'serverless cost', '--text-folder', str(corpus), '--tts-backend', 'stub', '--segments', '4',
+            '--cache-dir', str(tmp_path / 'cache'), '--output', str(out), *extra]
+    assert cli.run(cli.parse_args(argv)) == str(out)
+    return state_path(out)
+
+
+@pytest.mark.parametrize('mode', [[], ['--no-pipeline']])
+def test_every_stage_is_checkpointed(tmp_path, calls, mode):
+    path = _first_run(tmp_path, *mode)
+    state = JobState.load(path)
+    assert set(state.stages) == {'ingest', 'summary', 'storyboard', 'images', 'tts', 'compose'}
+    tts = state.stages['tts']['output']
+    assert len(tts['audio']) == len(state.stages['storyboard']['output']) == len(tts['seconds'])
+    assert all(s > 0 for s in tts['seconds'])
+    assert JobState.read_corpus(state.stages['ingest']['output']['corpus'])
+    assert calls['tts'] == (1 if mode else 4)  # pipelined: one TTS item per streamed segment
+
+
+def test_restyle_only_reruns_compose(tmp_path, calls):
+    path = _first_run(tmp_path)
+    before = dict(calls, compose=len(calls['compose']))
+    cli.render_main(['--from', str(path), '--caption-color', 'yellow', '--no-duck'])
+    assert (calls['summary'], calls['storyboard'], calls['tts']) == (before['summary'], before['storyboard'], before['tts'])
+    assert calls['compose'][-1]['caption_color'] == 'yellow' and calls['compose'][-1]['duck'] is False
+
+
+def test_resume_from_first_invalidated_stage(tmp_path, calls):
+    path = _first_run(tmp_path)
+    summaries = calls['summary']
+    cli.render_main(['--from', str(path), '--segments', '2'])
+    assert calls['summary'] == summaries and calls['storyboard'] == 2
+    state = json.loads(path.read_text())
+    assert len(state['stages']['storyboard']['output']) == 2 and len(state['stages']['tts']['output']['audio']) == 2
+
+    # Lost narration files invalidate the TTS checkpoint only
+    for wav in state['stages']['tts']['output']['audio']:
+        Path(wav).unlink()
+    tts_calls = calls['tts']
+    cli.render_main(['--from', str(path), '--no-pipeline'])
+    assert calls['storyboard'] == 2 and calls['tts'] == tts_calls + 1
+
+
+def test_list_options_are_replaced_not_extended(tmp_path, calls):
+    path = _first_run(tmp_path, '--rendition', 'square')
+    cli.render_main(['--from', str(path), '--caption-color', 'yellow'])
+    assert calls['compose'][-1]['renditions'] == ['square']
+    cli.render_main(['--from', str(path), '--rendition', 'preview'])
+    assert calls['compose'][-1]['renditions'] == ['preview']
+    assert JobState.load(path).options['rendition'] == ['preview']
+
+
+def test_image_index_memo_follows_its_settings(tmp_path, calls, monkeypatch):
+    from PIL import Image
+    from reelctxt.planning.image_index import ImageFeatureIndex
+    imgs = tmp_path / 'imgs'
+    imgs.mkdir()
+    for color in ('red', 'blue'):
+        Image.new('RGB', (64, 48), color).save(imgs / f'{color}.jpg')
+    builds = []
+    build = ImageFeatureIndex.build
+    monkeypatch.setattr(cli.ImageFeatureIndex, 'build', lambda images, root=None, max_bytes=None:
+                        builds.append((root, max_bytes)) or build(images, root=root, max_bytes=max_bytes))
+    path = _first_run(tmp_path, '--image-folder', str(imgs))
+    ctx = cli.RunContext(tmp_dir=tmp_path / 'tmp')
+    argv = JobState.load(path).options
+    base = ['--prompt', argv['prompt'], '--text-folder', argv['text_folder'], '--image-folder', str(imgs),
+            '--tts-backend', 'stub', '--cache-dir', str(tmp_path / 'cache'), '--no-checkpoint']
+    for extra in ([], [], ['--image-index-mb', '8'], ['--no-image-index']):
+        cli.run(cli.parse_args([*base, '--output', str(tmp_path / 'b.mp4'), *extra]), ctx)
+    assert [b[1] for b in builds[1:]] == [256 << 20, 8 << 20, 256 << 20] and builds[-1][0] is None
+
+
+def test_unknown_state_version_is_rejected(tmp_path):
+    bad = tmp_path / 'x.state.json'
+    bad.write_text(json.dumps({'version': 99, 'options': {}, 'stages': {}}))
+    with pytest.raises(ValueError):
+        JobState.load(bad)
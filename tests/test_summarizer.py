@@ -0,0 +1,150 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from reelctxt.llm.cache import LLMCache
+from reelctxt.llm.client import LLMClient
+from reelctxt.planning.storyboard import build_storyboard, iter_storyboard
+from reelctxt.planning.summarizer import build_summary, pack_batches, rank_chunks
+
+
+class StubOpenAI(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible /chat/completions endpoint."""
+    lock = threading.Lock()
+    calls = []
+    sent = []  # (time, delta) of streamed chunks
+    active = peak = 0
+    fail_next = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with StubOpenAI.lock:
+            if StubOpenAI.fail_next:
+                StubOpenAI.fail_next -= 1
+                self.send_response(500)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            StubOpenAI.calls.append(body)
+            StubOpenAI.active += 1
+            StubOpenAI.peak = max(StubOpenAI.peak, StubOpenAI.active)
+        time.sleep(0.1)
+        system, user = body['messages'][0]['content'], body['messages'][1]['content']
+        if system.startswith('Extract'):
+            content = 'NOTE ' + user.split('CONTEXT:\n', 1)[1].split()[0]
+        elif system.startswith('Merge'):
+            content = 'FINAL ' + ' | '.join(line for line in user.splitlines() if line.startswith('NOTE '))
+        elif system.startswith('Create a JSON array'):
+            content = json.dumps([{'idx': i, 'title': f'T{i}', 'narration': f'line {i}', 'hint': ''} for i in range(3)])
+        else:
+            content = 'SIMPLE'
+        if body.get('stream'):
+            with StubOpenAI.lock:
+                StubOpenAI.active -= 1
+            return self._stream(body, content)
+        out = json.dumps({
+            'id': 'x', 'object': 'chat.completion', 'created': 0, 'model': body['model'],
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 10, 'completion_tokens': 5, 'total_tokens': 15},
+        }).encode()
+        with StubOpenAI.lock:
+            StubOpenAI.active -= 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def _stream(self, body, content, step=8):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        for i in range(0, len(content), step):
+            chunk = {'id': 'x', 'object': 'chat.completion.chunk', 'created': 0, 'model': body['model'],
+                     'choices': [{'index': 0, 'delta': {'content': content[i:i + step]}, 'finish_reason': None}]}
+            self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode())
+            self.wfile.flush()
+            StubOpenAI.sent.append((time.perf_counter(), content[i:i + step]))
+            time.sleep(0.02)
+        self.wfile.write(b'data: [DONE]\n\n')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def llm():
+    StubOpenAI.calls, StubOpenAI.sent, StubOpenAI.active, StubOpenAI.peak, StubOpenAI.fail_next = [], [], 0, 0, 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubOpenAI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield LLMClient(api_key='test', base_url=f'http://127.0.0.1:{server.server_port}/v1', model='stub',
+                    max_concurrency=2, max_retries=2)
+    server.shutdown()
+
+
+CHUNKS = [f'filler{i} ' + 'lorem ipsum dolor ' * 40 for i in range(20)]
+CHUNKS[13] = 'serverless cost drops to zero when idle ' * 10
+CHUNKS[17] = 'serverless billing per request keeps cost low ' * 10
+
+
+def test_ranking_and_packing():
+    ranked = rank_chunks('serverless cost', CHUNKS, top_k=5)
+    assert ranked[:2] == [CHUNKS[13], CHUNKS[17]] and len(ranked) == 5
+    batches = pack_batches(ranked, batch_tokens=250, token_budget=700)
+    assert sum(len(b) for b in batches) < 5 and all(b for b in batches)
+
+
+def test_map_reduce_against_stub_server(llm):
+    StubOpenAI.fail_next = 1  # first request gets a 500 and is retried by the client
+    summary = build_summary('serverless cost', CHUNKS, llm, top_k=6, batch_tokens=250, token_budget=2000, concurrency=4)
+    maps = [c for c in StubOpenAI.calls if c['messages'][0]['content'].startswith('Extract')]
+    reduces = [c for c in StubOpenAI.calls if c['messages'][0]['content'].startswith('Merge')]
+    batches = pack_batches(rank_chunks('serverless cost', CHUNKS, 6), 250, 2000)
+    assert len(maps) == len(batches) > 1 and len(reduces) == 1
+    assert summary.startswith('FINAL NOTE serverless') and summary.count('NOTE') == len(batches)
+    assert StubOpenAI.fail_next == 0  # the 500 was consumed and the call still succeeded
+    assert StubOpenAI.peak <= 2  # client-wide concurrency bound
+
+
+def test_simple_mode_is_one_call(llm):
+    assert build_summary('serverless cost', CHUNKS, llm, mode='simple') == 'SIMPLE'
+    assert len(StubOpenAI.calls) == 1
+
+
+def test_llm_cache_answers_repeat_requests_from_disk(llm, tmp_path):
+    cached = llm.with_cache(LLMCache(tmp_path / 'llm'))
+    first = build_summary('serverless cost', CHUNKS, cached, top_k=6, batch_tokens=250, token_budget=2000)
+    n_calls = len(StubOpenAI.calls)
+    # A fresh cache object over the same directory, as another process would open it
+    again = llm.with_cache(LLMCache(tmp_path / 'llm'))
+    t0 = time.perf_counter()
+    assert build_summary('serverless cost', CHUNKS, again, top_k=6, batch_tokens=250, token_budget=2000) == first
+    assert time.perf_counter() - t0 < 0.5
+    assert len(StubOpenAI.calls) == n_calls and again.cache.stats['hit'] == n_calls and not again.cache.stats['miss']
+    # A new request, or bypassing the cache, reaches the server again
+    again.summarize_chunks('serverless cost', ['unseen context'])
+    assert len(StubOpenAI.calls) == n_calls + 1 and again.cache.stats['miss'] == 1
+    llm.summarize('serverless cost', CHUNKS)
+    llm.summarize('serverless cost', CHUNKS)
+    assert len(StubOpenAI.calls) == n_calls + 3
+
+
+def test_llm_cache_ttl(llm, tmp_path):
+    LLMClient.summarize(llm.with_cache(LLMCache(tmp_path)), 'q', ['text'])
+    expired = llm.with_cache(LLMCache(tmp_path, ttl=0))
+    time.sleep(0.01)
+    expired.summarize('q', ['text'])
+    assert expired.cache.stats['expired'] == 1 and len(StubOpenAI.calls) == 2
+
+
+def test_storyboard_segments_arrive_while_streaming(llm, tmp_path):
+    cached = llm.with_cache(LLMCache(tmp_path))
+    arrived = []
+    for seg in iter_storyboard('p', 'summary', 3, cached):
+        arrived.append((time.perf_counter(), seg))
+    assert [s.narration for _, s in arrived] == ['line 0', 'line 1', 'line 2']
+    assert arrived[0][0] < StubOpenAI.sent[-1][0]  # first segment was usable before the response ended
+    # The streamed answer is cached under the same key as the non-streamed call
+    assert [s.narration for s in build_storyboard('p', 'summary', 3, cached)] == ['line 0', 'line 1', 'line 2']
+    assert len(StubOpenAI.calls) == 1 and cached.cache.stats['hit'] == 1
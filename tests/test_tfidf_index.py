@@ -0,0 +1,46 @@
+import numpy as np
+from reelctxt.planning import tfidf_index
+from reelctxt.planning.tfidf_index import TfidfIndex
+
+DOCS = [
+    'serverless functions scale to zero and cut idle cost',
+    'kubernetes clusters schedule containers across nodes',
+    'edge caching serves video close to the viewer',
+    'databases index rows for fast queries',
+]
+
+
+def test_batched_top_k_ranks_matching_documents():
+    top, scores = TfidfIndex().top_k(['serverless cost', 'video caching at the edge', 'kubernetes containers'], DOCS, k=2)
+    assert top.shape == (3, 2) and list(top[:, 0]) == [0, 2, 1]
+    assert np.all(scores[:, 0] >= scores[:, 1])
+
+
+def test_index_persists_and_only_vectorizes_new_documents(tmp_path, monkeypatch):
+    index = TfidfIndex(tmp_path)
+    index.top_k(['cost'], DOCS[:3])
+    index.close()
+
+    vectorized = []
+    real = tfidf_index.hasher.transform
+    monkeypatch.setattr(tfidf_index.hasher, 'transform', lambda texts: vectorized.extend(texts) or real(texts))
+    reloaded = TfidfIndex(tmp_path)
+    assert len(reloaded) == 3
+    X = reloaded.vectors(DOCS + [DOCS[0]])
+    assert vectorized == [DOCS[3]] and len(reloaded) == 4
+    assert X.shape[0] == 5 and (X[0] != X[4]).nnz == 0
+    assert (X[1] != real([DOCS[1]])).nnz == 0
+    top, _ = reloaded.top_k(['fast queries'], [DOCS[3], DOCS[0]])
+    assert top[0, 0] == 0
+
+
+def test_size_cap_evicts_least_recently_used_rows(tmp_path):
+    index = TfidfIndex(tmp_path)
+    index.vectors(DOCS)
+    per_row = index.db.execute('SELECT MAX(nbytes) FROM rows').fetchone()[0]
+    index.max_bytes = 2 * per_row
+    new = 'a brand new document about video encoding'
+    index.vectors([new])
+    assert len(index) <= 2
+    # The row of the latest job survives
+    assert index.db.execute('SELECT 1 FROM rows WHERE key = ?', (tfidf_index.text_key(new),)).fetchone()
@@ -0,0 +1,34 @@
+import io
+import json
+from reelctxt.util.trace import Tracer, span
+from reelctxt.media.workers import _read_progress
+
+
+def test_spans_nest_and_serialize(tmp_path):
+    tracer = Tracer()
+    with tracer.activate():
+        with span('compose') as outer:
+            with span('part 0', idx=0) as inner:
+                inner.set(fps=30.0)
+            outer.set(parts=1)
+    data = json.loads(tracer.write(tmp_path / 'reel.trace.json').read_text())
+    compose = data['trace']['children'][0]
+    assert compose['name'] == 'compose' and compose['attrs'] == {'parts': 1}
+    assert compose['children'][0]['attrs'] == {'idx': 0, 'fps': 30.0}
+    assert 'part 0' in tracer.summary()
+
+
+def test_span_is_noop_without_tracer():
+    with span('anything') as sp:
+        sp.set(x=1)
+    assert not sp.recording and sp.attrs == {}
+
+
+def test_ffmpeg_progress_parsed_into_span():
+    tracer = Tracer()
+    progress = b"frame=30\nfps=0.0\nout_time_us=1000000\nspeed=N/A\nprogress=continue\n" \
+               b"frame=90\nfps=45.5\nout_time_us=3000000\nspeed=1.52x\nprogress=end\n"
+    with tracer.activate():
+        with span('part 0') as sp:
+            _read_progress(io.BytesIO(progress), sp)
+    assert sp.attrs == {'frames': 90, 'speed': 1.52, 'fps': 45.5, 'mean_fps': 45.5, 'out_seconds': 3.0}
@@ -0,0 +1,46 @@
+import threading
+from pathlib import Path
+from reelctxt.media.tts import synthesize_segments
+
+
+class CountingEngine:
+    name = 'counting'
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, text, path, voice=None, rate=None):
+        with self.lock:
+            self.calls.append((text, voice))
+        Path(path).write_bytes(f'{text}|{voice}|{rate}'.encode())
+
+
+def _segs(*lines):
+    return [{'idx': i, 'narration': t} for i, t in enumerate(lines)]
+
+
+def test_tts_cache_reuses_unchanged_lines(tmp_path):
+    engine = CountingEngine()
+    first = synthesize_segments(_segs('a', 'b', 'a'), tmp_path, engine=engine, workers=2)
+    assert sorted(engine.calls) == [('a', None), ('b', None)]  # duplicate line synthesized once
+    assert first[0] == first[2] and Path(first[1]).read_bytes() == b'b|None|None'
+
+    engine.calls.clear()
+    second = synthesize_segments(_segs('a', 'c', 'b'), tmp_path, engine=engine)
+    assert engine.calls == [('c', None)]
+    assert second[0] == first[0] and second[2] == first[1]
+
+
+def test_tts_cache_key_includes_voice(tmp_path):
+    engine = CountingEngine()
+    p1 = synthesize_segments(_segs('a'), tmp_path, engine=engine)
+    p2 = synthesize_segments(_segs('a'), tmp_path, engine=engine, voice='en-us')
+    assert p1 != p2 and len(engine.calls) == 2
+
+
+def test_tts_cache_key_includes_backend_model():
+    from reelctxt.media.tts import tts_cache_key
+    from reelctxt.media.tts_worker import CoquiBackend
+    # In-process backends key on cache_name, so another model never reuses cached audio
+    assert tts_cache_key('a', CoquiBackend('model/a')) != tts_cache_key('a', CoquiBackend('model/b'))
@@ -0,0 +1,68 @@
+import importlib.util
+import pytest
+from reelctxt.media.tts import synthesize_segments
+from reelctxt.media.tts_worker import TTSWorker, estimate_word_timings, get_backend, wav_seconds
+
+
+def test_estimated_timings_cover_the_clip():
+    words = estimate_word_timings('a quick brown fox', 2.0)
+    assert [w['word'] for w in words] == ['a', 'quick', 'brown', 'fox']
+    assert words[0]['start'] == 0.0 and words[-1]['end'] <= 2.0
+    assert all(a['end'] <= b['start'] for a, b in zip(words, words[1:]))
+
+
+def test_warm_worker_serves_batches_and_caches_word_timings(tmp_path):
+    segs = [{'idx': i, 'narration': t} for i, t in enumerate(['one two three', 'four five', 'one two three'])]
+    with TTSWorker('stub') as worker:
+        pid = worker.pid
+        paths = synthesize_segments(segs, tmp_path, engine=worker)
+        assert paths[0] == paths[2]
+        assert [w['word'] for w in segs[1]['meta']['words']] == ['four', 'five']
+        assert segs[0]['meta']['words'][-1]['end'] <= wav_seconds(paths[0])
+
+        # more work later (another job) reuses the same process
+        extra = worker('six seven', tmp_path / 'x.wav')
+        assert len(extra) == 2 and worker.pid == pid
+
+    cached = [{'idx': 0, 'narration': 'four five'}]
+    idle = TTSWorker('stub')
+    synthesize_segments(cached, tmp_path, engine=idle)
+    assert idle.pid is None  # cache hit: the worker never started
+    assert cached[0]['meta']['words'] == segs[1]['meta']['words']
+
+
+def test_unknown_backend_and_load_failure():
+    with pytest.raises(ValueError):
+        get_backend('nope')
+    if importlib.util.find_spec('TTS') is not None:
+        pytest.skip('Coqui TTS installed; would download a model')
+    with TTSWorker('coqui') as worker:
+        with pytest.raises(RuntimeError, match='voice'):
+            worker('hello', 'unused.wav')
+
+
+def test_subprocess_backends_run_per_line_in_threads(tmp_path):
+    import threading
+    from reelctxt.cli import RunContext
+    from reelctxt.media.tts_worker import StubBackend
+    from reelctxt.util.trace import Tracer
+
+    ctx = RunContext()
+    assert not isinstance(ctx.tts_engine('stub'), TTSWorker) and not ctx.tts
+    assert isinstance(ctx.tts_engine('coqui'), TTSWorker)  # model backends stay warm in a worker
+
+    barrier = threading.Barrier(3, timeout=5)
+
+    class Parallel(StubBackend):
+        def synthesize(self, text, path, voice=None, rate=None):
+            barrier.wait()  # only passes when three lines are synthesized at once
+            return super().synthesize(text, path, voice, rate)
+
+    segs = [{'idx': i, 'narration': f'line number {i}'} for i in range(3)]
+    tracer = Tracer()
+    with tracer.activate():
+        synthesize_segments(segs, tmp_path, engine=Parallel(), workers=3)
+    spans = tracer.to_dict()['trace']['children']
+    assert sorted(s['attrs']['idx'] for s in spans if s['name'] == 'tts') == [0, 1, 2]
+    assert all('words' in s['meta'] for s in segs)
+    ctx.close()
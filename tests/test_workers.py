@@ -0,0 +1,58 @@
+import subprocess
+import sys
+import time
+import pytest
+from reelctxt.media.workers import EncodePool
+
+
+def _py(code: str, out: str):
+    return [sys.executable, '-c', code, out]
+
+
+def test_threads_share_inserted_before_output():
+    pool = EncodePool(workers=4, threads=16)
+    assert pool.threads_per_job == 4
+    assert pool._with_threads(['ffmpeg', '-i', 'a', 'out.mp4'])[-3:] == ['-threads', '4', 'out.mp4']
+    assert EncodePool()._with_threads(['ffmpeg', 'out.mp4']) == ['ffmpeg', 'out.mp4']
+    # Every output of a multi-output command gets its share, not just the last one
+    cmd = ['ffmpeg', '-i', 'a', '-map', '[v]', 'out.mp4', '-map', '[r]', 'out.small.mp4']
+    assert pool._with_threads(cmd, ['out.mp4', 'out.small.mp4']) == [
+        'ffmpeg', '-i', 'a', '-map', '[v]', '-threads', '4', 'out.mp4', '-map', '[r]', '-threads', '4', 'out.small.mp4']
+
+
+def test_parallel_runs_all_parts(tmp_path):
+    outs = [tmp_path / f"part_{i}" for i in range(6)]
+    code = "import sys; open(sys.argv[-1], 'w').write('x')"
+    EncodePool(workers=3, threads=3).run([_py(code, str(o)) for o in outs])
+    assert all(o.exists() for o in outs)
+
+
+def test_failure_stops_other_workers(tmp_path):
+    slow = _py("import time; time.sleep(30)", 'slow')
+    bad = _py("import sys; sys.exit(3)", 'bad')
+    t0 = time.time()
+    with pytest.raises(subprocess.CalledProcessError):
+        EncodePool(workers=2).run([slow, bad, slow])
+    assert time.time() - t0 < 20
+
+
+def test_pipelined_parts_stop_on_first_failure(tmp_path, monkeypatch):
+    from concurrent.futures import Future
+    from reelctxt.media import compose
+    from reelctxt.planning.segment import Segment
+
+    # part 1 fails fast, the others would take 30s each
+    code = "import sys, time; sys.exit(3) if sys.argv[-1].endswith('part_1.mp4') else time.sleep(30)"
+    monkeypatch.setattr(EncodePool, '_with_threads', lambda self, cmd, outputs=(): _py(code, cmd[-1]))
+    monkeypatch.setattr(compose, 'run_ffmpeg', lambda cmd, name: pytest.fail('concat after a failed part'))
+    segs = [Segment(idx=i, title=f'S{i}', narration='line', start=2.0 * i, duration=2.0) for i in range(4)]
+    audio = []
+    for _ in segs:
+        f = Future()
+        f.set_result('a.wav')
+        audio.append(f)
+    t0 = time.time()
+    with pytest.raises(subprocess.CalledProcessError):
+        compose.create_video(segs, audio, str(tmp_path / 'out.mp4'), pool=EncodePool(workers=3),
+                             tmp_dir=tmp_path / 'tmp', keep_temp=True)
+    assert time.time() - t0 < 20